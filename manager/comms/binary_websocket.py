@@ -0,0 +1,329 @@
+import os
+import struct
+import threading
+import zlib
+
+try:
+    import fcntl
+    import termios
+except ImportError:
+    fcntl = None
+
+from websocket_server import WebsocketServer
+from websocket_server.websocket_server import (
+    FIN,
+    MASKED,
+    OPCODE,
+    OPCODE_BINARY,
+    OPCODE_CLOSE_CONN,
+    OPCODE_CONTINUATION,
+    OPCODE_PING,
+    OPCODE_PONG,
+    OPCODE_TEXT,
+    PAYLOAD_LEN,
+    PAYLOAD_LEN_EXT16,
+    PAYLOAD_LEN_EXT64,
+    WebSocketHandler,
+    logger,
+)
+
+# Larger frames are refused, so a single message cannot exhaust memory
+max_frame_size = 64 * 1024 * 1024
+RSV1 = 0x40
+# Shorter messages are sent uncompressed, deflate would not pay off
+deflate_threshold = 256
+_deflate_tail = b"\x00\x00\xff\xff"
+
+
+def parse_extensions(header):
+    """
+    Parses a Sec-WebSocket-Extensions header into [(name, {param: value})]
+    """
+    extensions = []
+    for offer in header.split(","):
+        parts = [part.strip() for part in offer.split(";") if part.strip()]
+        if not parts:
+            continue
+        params = {}
+        for param in parts[1:]:
+            name, _, value = param.partition("=")
+            params[name.strip().lower()] = value.strip().strip('"') or None
+        extensions.append((parts[0].lower(), params))
+    return extensions
+
+
+class PerMessageDeflate:
+    """
+    permessage-deflate (RFC 7692) state of a connection. The server keeps its
+    compression context between messages unless the client asked otherwise, so
+    repeated updates compress to a fraction of their size.
+    """
+
+    def __init__(self, params):
+        self.server_no_context_takeover = "server_no_context_takeover" in params
+        self.server_max_window_bits = int(params.get("server_max_window_bits") or 15)
+        if not 9 <= self.server_max_window_bits <= 15:
+            raise ValueError("Unsupported server_max_window_bits")
+        self._compressor = None
+        self._decompressor = zlib.decompressobj(-15)
+
+    @classmethod
+    def negotiate(cls, header):
+        """
+        Returns the state and the response header for the first acceptable offer
+        """
+        for name, params in parse_extensions(header or ""):
+            if name != "permessage-deflate":
+                continue
+            try:
+                deflate = cls(params)
+            except ValueError:
+                continue
+            response = "permessage-deflate"
+            if deflate.server_no_context_takeover:
+                response += "; server_no_context_takeover"
+            if "server_max_window_bits" in params:
+                response += f"; server_max_window_bits={deflate.server_max_window_bits}"
+            return deflate, response
+        return None, None
+
+    def compress(self, payload):
+        if self._compressor is None or self.server_no_context_takeover:
+            self._compressor = zlib.compressobj(
+                zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -self.server_max_window_bits
+            )
+        data = self._compressor.compress(payload) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data[: -len(_deflate_tail)] if data.endswith(_deflate_tail) else data
+
+    def decompress(self, payload):
+        data = self._decompressor.decompress(payload + _deflate_tail, max_frame_size)
+        if self._decompressor.unconsumed_tail:
+            raise ValueError("Decompressed message is too big")
+        return data
+
+
+def unmask(payload, mask):
+    """
+    Applies the client mask to a whole payload at once (the library does it byte by byte)
+    """
+    length = len(payload)
+    if length == 0:
+        return b""
+    key = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, "little") ^ int.from_bytes(key, "little")).to_bytes(
+        length, "little"
+    )
+
+
+class BinaryWebSocketHandler(WebSocketHandler):
+    """
+    websocket_server handler that also accepts binary frames and can send them.
+    Binary messages are delivered to the server's binary callback as bytes.
+    """
+
+    def setup(self):
+        super().setup()
+        self.deflate = None
+
+    def handshake(self):
+        headers = self.read_http_headers()
+
+        try:
+            assert headers['upgrade'].lower() == 'websocket'
+        except AssertionError:
+            self.keep_alive = False
+            return
+
+        try:
+            key = headers['sec-websocket-key']
+        except KeyError:
+            logger.warning("Client tried to connect but was missing a key")
+            self.keep_alive = False
+            return
+
+        response = self.make_handshake_response(key)
+        if self.server.compression:
+            self.deflate, extension = PerMessageDeflate.negotiate(
+                headers.get("sec-websocket-extensions")
+            )
+            if extension is not None:
+                response = response[:-2] + f"Sec-WebSocket-Extensions: {extension}\r\n\r\n"
+        with self._send_lock:
+            self.handshake_done = self.request.send(response.encode())
+        self.valid_client = True
+        self.server._new_client_(self)
+
+    def read_next_message(self):
+        try:
+            b1, b2 = self.read_bytes(2)
+        except ConnectionResetError:
+            logger.info("Client closed connection.")
+            self.keep_alive = 0
+            return
+        except ValueError:
+            b1, b2 = 0, 0
+
+        opcode = b1 & OPCODE
+        masked = b2 & MASKED
+        payload_length = b2 & PAYLOAD_LEN
+
+        if opcode == OPCODE_CLOSE_CONN:
+            logger.info("Client asked to close connection.")
+            self.keep_alive = 0
+            return
+        if not masked:
+            logger.warning("Client must always be masked.")
+            self.keep_alive = 0
+            return
+        if opcode == OPCODE_CONTINUATION:
+            logger.warning("Continuation frames are not supported.")
+            return
+        elif opcode == OPCODE_BINARY:
+            opcode_handler = self.server._binary_message_received_
+        elif opcode == OPCODE_TEXT:
+            opcode_handler = self.server._message_received_
+        elif opcode == OPCODE_PING:
+            opcode_handler = self.server._ping_received_
+        elif opcode == OPCODE_PONG:
+            opcode_handler = self.server._pong_received_
+        else:
+            logger.warning("Unknown opcode %#x." % opcode)
+            self.keep_alive = 0
+            return
+
+        if payload_length == 126:
+            payload_length = struct.unpack(">H", self.rfile.read(2))[0]
+        elif payload_length == 127:
+            payload_length = struct.unpack(">Q", self.rfile.read(8))[0]
+        if payload_length > max_frame_size:
+            logger.warning(f"Frame of {payload_length} bytes is too big, closing connection.")
+            self.keep_alive = 0
+            return
+
+        masks = self.read_bytes(4)
+        payload = unmask(self.read_bytes(payload_length), masks)
+        self.server.traffic.received(payload_length)
+        if b1 & RSV1:
+            if self.deflate is None:
+                logger.warning("Compressed frame without permessage-deflate.")
+                self.keep_alive = 0
+                return
+            try:
+                payload = self.deflate.decompress(payload)
+            except (ValueError, zlib.error) as e:
+                logger.warning(f"Invalid compressed frame: {e}")
+                self.keep_alive = 0
+                return
+        if opcode == OPCODE_TEXT:
+            opcode_handler(self, payload.decode("utf8"))
+        else:
+            # Ping and pong payloads are arbitrary bytes, echoed as received
+            opcode_handler(self, payload)
+
+    def send_text(self, message, opcode=OPCODE_TEXT):
+        if isinstance(message, str):
+            message = message.encode("utf8")
+        self.send_frame(opcode, message)
+
+    def send_binary(self, data):
+        self.send_frame(OPCODE_BINARY, data)
+
+    def send_frame(self, opcode, payload):
+        """
+        Sends a whole message in a single frame, compressed if it was negotiated
+        and the message is long enough
+        """
+        header = bytearray()
+        first = FIN | opcode
+        with self._send_lock:
+            size = len(payload)
+            if self.deflate is not None and size >= deflate_threshold and opcode in (
+                OPCODE_TEXT,
+                OPCODE_BINARY,
+            ):
+                payload = self.deflate.compress(payload)
+                first |= RSV1
+            payload_length = len(payload)
+            header.append(first)
+            if payload_length <= 125:
+                header.append(payload_length)
+            elif payload_length <= 65535:
+                header.append(PAYLOAD_LEN_EXT16)
+                header.extend(struct.pack(">H", payload_length))
+            else:
+                header.append(PAYLOAD_LEN_EXT64)
+                header.extend(struct.pack(">Q", payload_length))
+            self.request.sendall(bytes(header) + payload)
+        self.server.traffic.sent(size, payload_length)
+
+    def send_backlog(self):
+        """
+        Bytes sent but not yet acknowledged by the client (the socket send
+        queue), or None where the platform does not report it
+        """
+        if fcntl is None or not hasattr(termios, "TIOCOUTQ"):
+            return None
+        try:
+            queued = fcntl.ioctl(self.request.fileno(), termios.TIOCOUTQ, b"\0\0\0\0")
+        except (OSError, ValueError):
+            return None
+        return struct.unpack("i", queued)[0]
+
+
+class Traffic:
+    """
+    Bytes exchanged with clients, before and after compression
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.wire_bytes_sent = 0
+        self.wire_bytes_received = 0
+
+    def sent(self, size, wire_size):
+        with self._lock:
+            self.messages_sent += 1
+            self.bytes_sent += size
+            self.wire_bytes_sent += wire_size
+
+    def received(self, wire_size):
+        with self._lock:
+            self.wire_bytes_received += wire_size
+
+    def stats(self):
+        with self._lock:
+            return {
+                "messages_sent": self.messages_sent,
+                "bytes_sent": self.bytes_sent,
+                "wire_bytes_sent": self.wire_bytes_sent,
+                "compression_ratio": (
+                    round(self.wire_bytes_sent / self.bytes_sent, 3) if self.bytes_sent else None
+                ),
+                "wire_bytes_received": self.wire_bytes_received,
+            }
+
+
+class BinaryWebsocketServer(WebsocketServer):
+    """
+    WebsocketServer that also exchanges binary messages with its clients and
+    compresses messages with permessage-deflate when the client offers it
+    (disabled with RAM_WS_COMPRESSION=0)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.RequestHandlerClass = BinaryWebSocketHandler
+        self.compression = os.environ.get("RAM_WS_COMPRESSION", "1") != "0"
+        self.traffic = Traffic()
+        self.binary_message_received = lambda client, server, data: None
+
+    def set_fn_binary_message_received(self, fn):
+        self.binary_message_received = fn
+
+    def _binary_message_received_(self, handler, data):
+        self.binary_message_received(self.handler_to_client(handler), self, data)
+
+    def send_binary(self, client, data):
+        client["handler"].send_binary(data)
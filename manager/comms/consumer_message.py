@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import json
+import time
 from functools import singledispatchmethod
 from typing import Any, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 
 class ManagerConsumerMessage(BaseModel):
@@ -17,6 +18,19 @@ class ManagerConsumerMessage(BaseModel):
     id: str
     command: str
     data: Optional[Any] = None
+    # perf_counter() timestamp taken when the message is queued for the manager
+    _enqueued_at: Optional[float] = PrivateAttr(default=None)
+
+    def mark_enqueued(self):
+        self._enqueued_at = time.perf_counter()
+
+    def queued_time(self) -> Optional[float]:
+        """
+        Returns the seconds elapsed since the message was queued, if it was
+        """
+        if self._enqueued_at is None:
+            return None
+        return time.perf_counter() - self._enqueued_at
 
     def response(self, response: Any = None) -> ManagerConsumerMessage:
         """
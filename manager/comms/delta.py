@@ -0,0 +1,197 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src.manager.comms.fast_message import dumps, loads
+
+
+def _pointer(path, token):
+    return f"{path}/{str(token).replace('~', '~0').replace('/', '~1')}"
+
+
+def _same(old, new):
+    """
+    Whether the client sees both values as equal. == alone is not enough: 1,
+    1.0 and True are equal in Python, also nested in containers, so equal
+    containers are confirmed by their JSON text (fast, and type strict).
+    """
+    if type(old) is not type(new) or old != new:
+        return False
+    if isinstance(old, (dict, list)):
+        return dumps(old) == dumps(new)
+    return True
+
+
+def diff(old, new, path=""):
+    """
+    JSON patch (RFC 6902) operations turning old into new
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in old.items():
+            if key not in new:
+                ops.append({"op": "remove", "path": _pointer(path, key)})
+            elif not _same(value, new[key]):
+                ops.extend(diff(value, new[key], _pointer(path, key)))
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(path, key), "value": value})
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        common = min(len(old), len(new))
+        for index in range(common):
+            if not _same(old[index], new[index]):
+                ops.extend(diff(old[index], new[index], _pointer(path, index)))
+        for index in range(common, len(new)):
+            ops.append({"op": "add", "path": _pointer(path, index), "value": new[index]})
+        # From the end, so the indexes stay valid
+        for index in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": _pointer(path, index)})
+        return ops
+    if _same(old, new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(document, ops):
+    """
+    Applies the add, remove and replace operations of a JSON patch, as a
+    client does. Returns the patched document, modified in place.
+    """
+    for op in ops:
+        if op["path"] == "":
+            document = op["value"]
+            continue
+        tokens = [token.replace("~1", "/").replace("~0", "~") for token in op["path"].split("/")[1:]]
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            index = len(parent) if last == "-" else int(last)
+            if op["op"] == "add":
+                parent.insert(index, op["value"])
+            elif op["op"] == "remove":
+                del parent[index]
+            else:
+                parent[index] = op["value"]
+        elif op["op"] == "remove":
+            del parent[last]
+        else:
+            parent[last] = op["value"]
+    return document
+
+
+def stream_name(value):
+    # Same kinds as the update scheduler coalesces
+    if isinstance(value, dict):
+        return str(next(iter(value), ""))
+    return ""
+
+
+class _Stream:
+    __slots__ = ("value", "text", "seq", "keyframe_time")
+
+    def __init__(self):
+        self.value = None
+        self.text = None
+        self.seq = 0
+        self.keyframe_time = 0.0
+
+
+class DeltaEncoder:
+    """
+    Encodes the GUI updates of a client as deltas of its last state.
+
+    Updates are grouped in streams by kind (their keys). The first update of
+    a stream, and one every `keyframe_interval` seconds, is a keyframe holding
+    the whole state: {"stream", "seq", "update"}. The others carry the JSON
+    patch from the previous state: {"stream", "seq", "patch"}; updates that
+    change nothing are not sent. A client that misses a seq, or loses its
+    state, sends `resync` and gets keyframes of the current states.
+
+    Callers hold `lock` while encoding and sending, so messages leave in seq order.
+    """
+
+    def __init__(self, keyframe_interval=None, max_streams=64):
+        self.keyframe_interval = float(keyframe_interval or os.environ.get("RAM_DELTA_KEYFRAME") or 10)
+        self.max_streams = max_streams
+        self.lock = threading.RLock()
+        self.keyframes_sent = 0
+        self.patches_sent = 0
+        self.unchanged = 0
+        self.full_bytes = 0
+        self.sent_bytes = 0
+        self._streams = OrderedDict()
+
+    def encode(self, text):
+        """
+        Returns the data of the update message for an update (JSON text), or
+        None when the state did not change
+        """
+        value = loads(text)
+        name = stream_name(value)
+        stream = self._streams.get(name)
+        if stream is None:
+            if len(self._streams) >= self.max_streams:
+                self._streams.popitem(last=False)
+            stream = self._streams[name] = _Stream()
+        self._streams.move_to_end(name)
+        self.full_bytes += len(text)
+        now = time.monotonic()
+        if stream.text is not None and now - stream.keyframe_time < self.keyframe_interval:
+            ops = diff(stream.value, value)
+            if not ops:
+                self.unchanged += 1
+                return None
+            stream.seq += 1
+            data = dumps({"stream": name, "seq": stream.seq, "patch": ops})
+            # A patch larger than the state would not pay off
+            if len(data) < len(text):
+                stream.value = value
+                stream.text = text
+                self.patches_sent += 1
+                self.sent_bytes += len(data)
+                return data
+        else:
+            stream.seq += 1
+        stream.value = value
+        stream.text = text
+        stream.keyframe_time = now
+        return self._keyframe(name, stream)
+
+    def _keyframe(self, name, stream):
+        data = f'{{"stream":{dumps(name)},"seq":{stream.seq},"update":{stream.text}}}'
+        self.keyframes_sent += 1
+        self.sent_bytes += len(data)
+        return data
+
+    def keyframes(self, name=None):
+        """
+        Data of keyframes of the current state of a stream, or of every stream
+        """
+        now = time.monotonic()
+        frames = []
+        for key, stream in self._streams.items():
+            if name is not None and key != name:
+                continue
+            stream.keyframe_time = now
+            frames.append(self._keyframe(key, stream))
+        return frames
+
+    def reset(self):
+        with self.lock:
+            self._streams.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "streams": len(self._streams),
+                "keyframes": self.keyframes_sent,
+                "patches": self.patches_sent,
+                "unchanged": self.unchanged,
+                "full_bytes": self.full_bytes,
+                "sent_bytes": self.sent_bytes,
+            }
@@ -0,0 +1,95 @@
+import itertools
+import json
+import re
+import uuid
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Commands exchanged at GUI frequency, handled without pydantic
+fast_commands = frozenset(("update", "ack", "gui"))
+
+# Ids are unique per RAM process (prefix) and per message (counter), without
+# the cost of uuid4()
+_id_prefix = uuid.uuid4().hex[:12]
+_id_counter = itertools.count(1)
+
+
+def next_id():
+    return f"{_id_prefix}-{next(_id_counter)}"
+
+
+if orjson is not None:
+    _orjson_options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj):
+        return orjson.dumps(obj, default=str, option=_orjson_options).decode()
+
+    loads = orjson.loads
+else:
+    _encoder = json.JSONEncoder(separators=(",", ":"), default=str)
+    dumps = _encoder.encode
+    loads = json.loads
+
+
+_first_key = re.compile(r'\s*\{\s*"((?:[^"\\]|\\.)*)"')
+
+
+class RawJson:
+    """
+    JSON text forwarded as is. FastMessage splices it into the message without
+    parsing it; it is only parsed when the message must be re-encoded (MessagePack).
+    """
+
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+    def first_key(self):
+        """
+        First key of a JSON object, found without parsing it, or None
+        """
+        match = _first_key.match(self.text, 0, 512)
+        return match.group(1) if match is not None else None
+
+    def value(self):
+        return loads(self.text)
+
+
+class FastMessage:
+    """
+    Lightweight counterpart of ManagerConsumerMessage for the hot messages
+    (`update`, `ack`, `gui`): no validation, serialized with orjson when it is
+    installed. Control commands keep going through ManagerConsumerMessage.
+    When data is RawJson, its text is spliced into the message as is.
+    """
+
+    __slots__ = ("id", "command", "data")
+
+    def __init__(self, id, command, data=None):
+        self.id = id
+        self.command = command
+        self.data = data
+
+    @classmethod
+    def new(cls, command, data=None):
+        return cls(next_id(), command, data)
+
+    def to_dict(self):
+        data = self.data.value() if isinstance(self.data, RawJson) else self.data
+        return {"id": self.id, "command": self.command, "data": data}
+
+    # Same name as the pydantic method, so both message types can be encoded alike
+    def model_dump(self):
+        return self.to_dict()
+
+    def __str__(self):
+        if isinstance(self.data, RawJson):
+            return f'{{"id":{dumps(self.id)},"command":{dumps(self.command)},"data":{self.data.text}}}'
+        return dumps(self.to_dict())
+
+    def __repr__(self):
+        return str(self)
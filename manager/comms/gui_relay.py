@@ -0,0 +1,89 @@
+import re
+import threading
+from collections import OrderedDict
+
+from src.manager.ram_logging.log_manager import LogManager
+
+
+class GuiRelay(threading.Thread):
+    """
+    Low latency path for gui messages, from the client straight to the exercise GUI server.
+
+    Messages do not go through the manager command queue, so they are never stuck
+    behind a transition. Pending messages are bounded: a newer message of the same kind
+    (same leading '#command') replaces the older one (latest wins), and when the buffer
+    is full the oldest message is dropped.
+    """
+
+    coalescing_pattern = re.compile(r"#\w+")
+
+    def __init__(self, max_pending=64):
+        super().__init__(daemon=True, name="GuiRelay")
+        self.max_pending = max_pending
+        self.sink = None
+        self.forwarded = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self._pending = OrderedDict()
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+
+    def coalescing_key(self, data):
+        if isinstance(data, str):
+            match = self.coalescing_pattern.match(data)
+            if match is not None:
+                return match.group(0)
+        # Messages of unknown kind are never merged
+        self._sequence += 1
+        return self._sequence
+
+    def set_sink(self, sink):
+        """
+        Sets the callable that delivers messages to the GUI server, None discards them
+        """
+        with self._condition:
+            self.sink = sink
+
+    def put(self, data):
+        with self._condition:
+            key = self.coalescing_key(data)
+            if key in self._pending:
+                del self._pending[key]
+                self.coalesced += 1
+            elif len(self._pending) >= self.max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            self._pending[key] = data
+            self._condition.notify()
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            with self._condition:
+                while not self._pending and not self._stop.is_set():
+                    self._condition.wait()
+                if self._stop.is_set():
+                    return
+                _, data = self._pending.popitem(last=False)
+                sink = self.sink
+            if sink is None:
+                self.dropped += 1
+                continue
+            try:
+                sink(data)
+                self.forwarded += 1
+            except Exception:
+                LogManager.logger.exception("Exception relaying gui message")
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stop.set()
+            self._pending.clear()
+            self._condition.notify()
+
+    def stats(self):
+        return {
+            "forwarded": self.forwarded,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+        }
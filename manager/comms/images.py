@@ -0,0 +1,127 @@
+import base64
+import json
+import re
+import struct
+import threading
+from collections import OrderedDict
+
+# Binary frame carrying an image:
+# magic, image id, format, width, height, channels (big endian), image bytes.
+# Raw images are rows of RGB (or RGBA, grey) pixels
+image_magic = b"RAMI"
+image_header = struct.Struct(">4sIBHHB")
+formats = {0: "raw", 1: "jpeg", 2: "png"}
+# Reference to an image in a JSON update: {"$image": <id>}
+_reference = re.compile(r'\{\s*"\$image"\s*:\s*(\d+)\s*\}')
+
+
+class ImageError(Exception):
+    pass
+
+
+def is_image(data):
+    return data[: len(image_magic)] == image_magic
+
+
+def pack_image(image_id, image_format, width, height, channels, payload):
+    return image_header.pack(image_magic, image_id, image_format, width, height, channels) + payload
+
+
+def references(text):
+    return [int(match) for match in _reference.findall(text)]
+
+
+class ImageStore:
+    """
+    Latest binary image frames received from the exercise GUI, by id.
+
+    The GUI sends an image as a binary frame, then a JSON update referencing it
+    with {"$image": <id>}. Images are kept until the update referencing them is
+    sent: clients that accept binary images get the frame as is before the
+    update, the others get the reference replaced by the base64 image bytes.
+    Images of updates dropped by the update scheduler are eventually evicted.
+    """
+
+    def __init__(self, max_images=16):
+        self.max_images = max_images
+        self.received = 0
+        self.sent_binary = 0
+        self.sent_base64 = 0
+        self.missing = 0
+        self.evicted = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, frame):
+        if len(frame) < image_header.size or not is_image(frame):
+            raise ImageError("Not an image frame")
+        image_format = frame[8]
+        if image_format not in formats:
+            raise ImageError(f"Unknown image format {image_format}")
+        image_id = struct.unpack_from(">I", frame, 4)[0]
+        with self._lock:
+            self._images.pop(image_id, None)
+            self._images[image_id] = frame
+            self.received += 1
+            while len(self._images) > self.max_images:
+                self._images.popitem(last=False)
+                self.evicted += 1
+
+    def take(self, image_ids):
+        """
+        Removes and returns the frames of the given ids that are still stored
+        """
+        frames = []
+        with self._lock:
+            for image_id in image_ids:
+                frame = self._images.pop(image_id, None)
+                if frame is None:
+                    self.missing += 1
+                else:
+                    frames.append(frame)
+        return frames
+
+    def frames(self, text, transform=None):
+        """
+        Frames of the images referenced by a JSON text, for clients with binary
+        images. transform, if given, maps each frame to the one sent (transcoding).
+        """
+        frames = self.take(references(text))
+        if transform is not None:
+            frames = [transform(frame) for frame in frames]
+        with self._lock:
+            self.sent_binary += len(frames)
+        return frames
+
+    def inline(self, text, transform=None):
+        """
+        Replaces the image references of a JSON text by the base64 image bytes,
+        for clients without binary images
+        """
+
+        def replace(match):
+            frames = self.take([int(match.group(1))])
+            if not frames:
+                return "null"
+            if transform is not None:
+                frames = [transform(frames[0])]
+            with self._lock:
+                self.sent_base64 += 1
+            return json.dumps(base64.b64encode(memoryview(frames[0])[image_header.size :]).decode())
+
+        return _reference.sub(replace, text)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "received": self.received,
+                "sent_binary": self.sent_binary,
+                "sent_base64": self.sent_base64,
+                "missing": self.missing,
+                "evicted": self.evicted,
+                "stored": len(self._images),
+            }
@@ -1,11 +1,15 @@
-import json
 import logging
-from queue import Queue
+from queue import SimpleQueue
 from uuid import uuid4
-from websocket_server import WebsocketServer
 from datetime import datetime
 
+from src.manager.comms.binary_websocket import BinaryWebsocketServer
 from src.manager.comms.consumer_message import ManagerConsumerMessageException, ManagerConsumerMessage
+from src.manager.comms.delta import DeltaEncoder
+from src.manager.comms.fast_message import FastMessage, RawJson, fast_commands, loads
+from src.manager.comms.gui_relay import GuiRelay
+from src.manager.comms.protocol import Protocol, ProtocolError, capabilities
+from src.manager.comms.uploads import UploadError, UploadStore, is_chunk
 from src.manager.ram_logging.log_manager import LogManager
 
 
@@ -23,10 +27,13 @@ class ManagerConsumer:
     TODO: Better handling of single client connections, closing and redirecting
     """
 
-    def __init__(self, host, port, manager_queue: Queue):
+    # Longer messages (zips in data URLs) are logged by command and size only
+    max_logged_message = 1024
+
+    def __init__(self, host, port, manager_queue: SimpleQueue):
         self.host = host
         self.port = port
-        self.server = WebsocketServer(
+        self.server = BinaryWebsocketServer(
             host=host, port=port, loglevel=logging.INFO)
 
         # Configurar el logger de websocket_server para salida a consola
@@ -43,16 +50,31 @@ class ManagerConsumer:
         self.server.set_fn_new_client(self.handle_client_new)
         self.server.set_fn_client_left(self.handle_client_disconnect)
         self.server.set_fn_message_received(self.handle_message_received)
+        self.server.set_fn_binary_message_received(self.handle_binary_received)
         self.client = None
         self.manager_queue = manager_queue
+        # gui messages skip the manager queue so they never wait behind a transition
+        self.gui_relay = GuiRelay()
+        # Uploads are written by the websocket thread, the manager only gets the file
+        self.uploads = UploadStore()
+        self.upload_commands = {
+            "upload_start": self.uploads.start,
+            "upload_finish": self.uploads.finish,
+        }
+        self.protocol = Protocol()
+        # Last GUI state sent to the client, for delta updates
+        self.deltas = DeltaEncoder()
 
     def handle_client_new(self, client, server):
         LogManager.logger.info(f"client connected: {client}")
+        self.protocol.reset()
+        self.deltas.reset()
         self.client = client
         self.server.deny_new_connections()
 
     def handle_client_disconnect(self, client, server):
-        if client is None:
+        # Clients closed by reset() are not the current client anymore
+        if client is None or client != self.client:
             return
         LogManager.logger.info(f"client disconnected: {client}")
         now = datetime.now()
@@ -60,18 +82,43 @@ class ManagerConsumer:
         print(time_string)
         message = ManagerConsumerMessage(
             **{'id': str(uuid4()), 'command': 'disconnect'})
-        self.manager_queue.put(message)
         self.client = None
-        self.server.allow_new_connections()
+        # New connections are allowed again by reset(), once the manager is idle
+        self.enqueue(message)
 
     def handle_message_received(self, client, server, websocket_message):
-        LogManager.logger.info(
-            f"message received: {websocket_message} from client {client}")
+        try:
+            s = loads(websocket_message)
+        except Exception as e:
+            self.send(client, ManagerConsumerMessageException(id=str(uuid4()), message=str(e)))
+            raise e
+        self.handle_message(client, s, len(websocket_message))
+
+    def handle_message(self, client, s, size):
         message = None
         try:
-            s = json.loads(websocket_message)
+            if isinstance(s, dict) and s.get("command") == "gui":
+                # Hot path, not validated
+                LogManager.logger.debug(f"gui message received: {str(s.get('data'))[:30]}")
+                self.gui_relay.put(s.get("data"))
+                return
             message = ManagerConsumerMessage(**s)
-            self.manager_queue.put(message)
+            if message.command in self.upload_commands:
+                self.handle_upload_command(client, message)
+                return
+            if message.command == "set_protocol":
+                self.handle_set_protocol(client, message)
+                return
+            if message.command == "resync":
+                self.handle_resync(client, message)
+                return
+            if size > self.max_logged_message:
+                LogManager.logger.info(
+                    f"message received: {message.command} ({size} bytes) from client {client}")
+            else:
+                LogManager.logger.info(
+                    f"message received: {message} from client {client}")
+            self.enqueue(message)
         except Exception as e:
             if message is not None:
                 ex = ManagerConsumerMessageException(
@@ -79,23 +126,172 @@ class ManagerConsumer:
             else:
                 ex = ManagerConsumerMessageException(
                     id=str(uuid4()), message=str(e))
-            self.server.send_message(client, str(ex))
+            self.send(client, ex)
             raise e
 
+    def handle_upload_command(self, client, message):
+        try:
+            result = self.upload_commands[message.command](message.data)
+        except (UploadError, OSError) as e:
+            # A failed upload must not close the connection
+            LogManager.logger.warning(f"{message.command} failed: {e}")
+            self.send(client, ManagerConsumerMessageException(id=message.id, message=str(e)))
+            return
+        self.send(client, FastMessage(message.id, "ack", result))
+
+    def handle_set_protocol(self, client, message):
+        """
+        Switches the encoding, the image transport and/or the update mode of the
+        connection. The ack is still sent with the previous encoding, the
+        messages after it use the new one.
+        """
+        previous = self.protocol.encoding
+        previous_transport = self.protocol.image_transport
+        try:
+            options = message.data or {}
+            encoding = options.get("encoding", previous)
+            image_transport = options.get("image_transport", self.protocol.image_transport)
+            updates = options.get("updates", self.protocol.updates)
+            self.protocol.select(encoding)
+            self.protocol.select_image_transport(image_transport)
+            with self.deltas.lock:
+                if updates != self.protocol.updates:
+                    self.protocol.select_updates(updates)
+                    # Deltas start over from keyframes
+                    self.deltas.reset()
+        except (ProtocolError, AttributeError) as e:
+            self.protocol.select(previous)
+            self.protocol.select_image_transport(previous_transport)
+            self.send(client, ManagerConsumerMessageException(id=message.id, message=str(e)))
+            return
+        LogManager.logger.info(
+            f"Client switched to {encoding} messages, {image_transport} images, {updates} updates"
+        )
+        self.send(
+            client,
+            FastMessage(message.id, "ack", self.protocol_state(client)),
+            encoding=previous,
+        )
+
+    def handle_resync(self, client, message):
+        """
+        Sends keyframes of the current GUI state, of one stream if given, to a
+        client that lost track of the deltas
+        """
+        stream = message.data.get("stream") if isinstance(message.data, dict) else None
+        with self.deltas.lock:
+            keyframes = self.deltas.keyframes(stream)
+            for data in keyframes:
+                self.send(client, FastMessage.new("update", RawJson(data)))
+        self.send(client, FastMessage(message.id, "ack", {"keyframes": len(keyframes)}))
+
+    def handle_binary_received(self, client, server, data):
+        if is_chunk(data):
+            try:
+                self.uploads.write_chunk(data)
+            except (UploadError, OSError) as e:
+                LogManager.logger.warning(f"Upload chunk rejected: {e}")
+                self.send(client, ManagerConsumerMessageException(id=str(uuid4()), message=str(e)))
+            return
+        try:
+            s = self.protocol.decode(data)
+        except ProtocolError as e:
+            LogManager.logger.warning(f"Binary message of {len(data)} bytes rejected: {e}")
+            self.send(client, ManagerConsumerMessageException(id=str(uuid4()), message=str(e)))
+            return
+        self.handle_message(client, s, len(data))
+
+    def protocol_state(self, client=None):
+        """
+        Protocol options RAM supports and the ones active for the client
+        """
+        client = client or self.client
+        state = capabilities(self.server.compression)
+        state["encoding"] = self.protocol.encoding
+        state["image_transport"] = self.protocol.image_transport
+        state["updates"] = self.protocol.updates
+        state["compressed"] = client is not None and client["handler"].deflate is not None
+        return state
+
+    def enqueue(self, message: ManagerConsumerMessage):
+        """
+        Queues a message for the manager, stamping it to measure dispatch latency
+        """
+        message.mark_enqueued()
+        self.manager_queue.put(message)
+
     def send_message(self, message_data, command=None):
         if self.client is not None and self.server is not None:
-            if isinstance(message_data, ManagerConsumerMessage):
+            if isinstance(message_data, (ManagerConsumerMessage, FastMessage)):
                 message = message_data
             elif isinstance(message_data, ManagerConsumerMessageException):
                 message = message_data.consumer_message()
+            elif command in fast_commands:
+                message = FastMessage.new(command, message_data)
             else:
                 message = ManagerConsumerMessage(
                     id=str(uuid4()), command=command, data=message_data)
 
-            self.server.send_message(self.client, str(message))
+            self.send(self.client, message)
+
+    def send(self, client, message, encoding=None):
+        """
+        Sends a ManagerConsumerMessage, FastMessage or exception with the encoding
+        negotiated by the client
+        """
+        if isinstance(message, ManagerConsumerMessageException):
+            message = message.consumer_message()
+        payload = self.protocol.encode(message, encoding)
+        if isinstance(payload, bytes):
+            self.server.send_binary(client, payload)
+        else:
+            self.server.send_message(client, payload)
+
+    def send_update(self, text):
+        """
+        Sends a GUI update (JSON text) to the current client: whole, or as a
+        delta of the previous state of its stream if the client asked for deltas
+        """
+        if self.protocol.updates != "delta":
+            # Template payload spliced into the envelope without parsing it
+            self.send_message(RawJson('{"update":' + text + "}"), command="update")
+            return
+        with self.deltas.lock:
+            data = self.deltas.encode(text)
+            if data is not None:
+                self.send_message(RawJson(data), command="update")
+
+    def send_binary(self, data):
+        """
+        Sends a binary frame (an image) to the current client
+        """
+        client = self.client
+        if client is not None:
+            self.server.send_binary(client, data)
+
+    def send_backlog(self):
+        """
+        Bytes queued for the current client that it has not received yet
+        """
+        client = self.client
+        if client is None:
+            return None
+        return client["handler"].send_backlog()
+
+    def reset(self):
+        """
+        Closes the connection with the current client, if any, and accepts new clients
+        """
+        client = self.client
+        self.client = None
+        if client is not None:
+            self.server.disconnect_clients_gracefully()
+        self.server.allow_new_connections()
 
     def start(self):
+        self.gui_relay.start()
         self.server.run_forever(threaded=True)
 
     def stop(self):
+        self.gui_relay.stop()
         self.server.shutdown_gracefully()
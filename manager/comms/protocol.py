@@ -0,0 +1,90 @@
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Encodings of the messages exchanged with the client, JSON text is the default
+encodings = ("json", "msgpack") if msgpack is not None else ("json",)
+# How GUI images reach the client: inside the update, or as binary frames (see images.py)
+image_transports = ("base64", "binary")
+# GUI updates with the whole state, or as deltas of the previous state (see delta.py)
+update_modes = ("full", "delta")
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class Protocol:
+    """
+    Encoding of the messages of a client connection.
+
+    Every client starts with JSON text frames. The introspection message lists
+    the encodings RAM supports, and the client can switch with `set_protocol`:
+    with "msgpack" the messages travel as MessagePack maps in binary frames,
+    in both directions. Likewise GUI images are sent as base64 strings unless
+    the client asks for binary image frames, and GUI updates carry the whole
+    state unless the client asks for deltas.
+    """
+
+    def __init__(self):
+        self.encoding = "json"
+        self.image_transport = "base64"
+        self.updates = "full"
+
+    def reset(self):
+        self.encoding = "json"
+        self.image_transport = "base64"
+        self.updates = "full"
+
+    def select(self, encoding):
+        if encoding not in encodings:
+            raise ProtocolError(f"Unsupported encoding {encoding}, expected one of {encodings}")
+        self.encoding = encoding
+
+    def select_image_transport(self, transport):
+        if transport not in image_transports:
+            raise ProtocolError(
+                f"Unsupported image transport {transport}, expected one of {image_transports}"
+            )
+        self.image_transport = transport
+
+    def select_updates(self, mode):
+        if mode not in update_modes:
+            raise ProtocolError(f"Unsupported update mode {mode}, expected one of {update_modes}")
+        self.updates = mode
+
+    def encode(self, message, encoding=None):
+        """
+        Returns the frame payload of a ManagerConsumerMessage: str for text
+        frames, bytes for binary frames
+        """
+        if (encoding or self.encoding) == "msgpack":
+            return msgpack.packb(message.model_dump(), default=str)
+        return str(message)
+
+    def decode(self, data):
+        """
+        Decodes a binary frame into the message dict
+        """
+        if msgpack is None:
+            raise ProtocolError("MessagePack is not available")
+        try:
+            message = msgpack.unpackb(data)
+        except (ValueError, TypeError) as e:
+            raise ProtocolError(f"Invalid MessagePack message: {e}")
+        if not isinstance(message, dict):
+            raise ProtocolError("Messages must be maps")
+        return message
+
+
+def capabilities(compression):
+    """
+    Protocol options advertised to the client in the introspection message
+    """
+    return {
+        "encodings": list(encodings),
+        "compression": ["permessage-deflate"] if compression else [],
+        "image_transports": list(image_transports),
+        "update_modes": list(update_modes),
+    }
@@ -0,0 +1,268 @@
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.manager.comms.images import ImageError, formats, image_header, pack_image
+from src.manager.ram_logging.log_manager import LogManager
+
+try:
+    import cv2
+    import numpy
+except ImportError:
+    cv2 = None
+
+_jpeg = 1
+_raw = 0
+
+
+class Transcoder:
+    """
+    Fits the GUI images sent to the client to the bandwidth of its link.
+
+    Every update carrying images is observed once sent: when sending blocked
+    (the socket buffer was full) or the socket send queue holds more than the
+    update just sent (earlier updates did not drain), the link is congested and
+    the target bitrate drops below the measured throughput; otherwise it grows
+    back slowly, and transcoding disengages once the original images fit.
+    The client may also cap the bitrate of its session (`transcoding` command).
+
+    While engaged, updates with images are handed to a bounded thread pool that
+    downscales and recompresses their images (JPEG) to the per image budget,
+    then sends them in the order they were submitted. When the pool is full
+    the update is skipped, the next one carries a newer image anyway, so the
+    relay never waits for a slow link or a busy CPU. Needs OpenCV
+    (RAM_TRANSCODE=0 disables it).
+    """
+
+    # Sending an update that takes longer means the socket buffer was full
+    blocked_limit = 0.05
+    # Bitrate changes: cut on congestion, slow growth otherwise
+    decrease = 0.75
+    increase = 1.02
+    # Updates in a row whose original images fit before transcoding disengages
+    fits_to_disengage = 30
+    min_scale = 0.25
+    quality = 75
+    min_quality = 40
+
+    def __init__(self, workers=None, max_pending=None, min_bitrate=256_000):
+        self.available = cv2 is not None and os.environ.get("RAM_TRANSCODE", "1") != "0"
+        self.workers = int(workers or os.environ.get("RAM_TRANSCODE_WORKERS") or 2)
+        self.max_pending = max_pending or 2 * self.workers
+        self.min_bitrate = min_bitrate
+        self.enabled = self.available
+        # Bits per second: requested by the client, estimated from the link
+        self.max_bitrate = None
+        self.target = None
+        self.submitted = 0
+        self.skipped = 0
+        self.transcoded = 0
+        self.forwarded = 0
+        self.failed = 0
+        self.congestions = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._interval = None
+        self._last_sent = None
+        self._fits = 0
+        # Bytes per pixel of the JPEG images at `quality`, learnt while transcoding
+        self._bytes_per_pixel = 0.15
+        self._pending = 0
+        self._last_job = None
+        self._lock = threading.Lock()
+        self._pool = None
+        if self.available:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="Transcoder")
+
+    def configure(self, enabled=None, max_bitrate=None):
+        """
+        Session options: turns transcoding on or off, and caps the bitrate
+        (bits per second, None for no cap)
+        """
+        if max_bitrate is not None and float(max_bitrate) < self.min_bitrate:
+            raise ValueError(f"The maximum bitrate must be at least {self.min_bitrate} bits/s")
+        with self._lock:
+            if enabled is not None:
+                if enabled and not self.available:
+                    raise ValueError("Image transcoding is not available")
+                self.enabled = bool(enabled)
+            self.max_bitrate = float(max_bitrate) if max_bitrate is not None else None
+
+    def reset(self):
+        """
+        Forgets the link estimate and the options of the previous session
+        """
+        with self._lock:
+            self.enabled = self.available
+            self.max_bitrate = None
+            self.target = None
+            self._interval = None
+            self._last_sent = None
+            self._fits = 0
+
+    def bitrate(self):
+        """
+        Bitrate the images must fit in, None when they are sent as they are
+        """
+        limits = [limit for limit in (self.target, self.max_bitrate) if limit is not None]
+        return min(limits) if limits else None
+
+    def engaged(self):
+        return self.enabled and (self.bitrate() is not None or self._pending > 0)
+
+    def observe(self, size, seconds, backlog):
+        """
+        Accounts an update with images sent to the client: its size in bytes,
+        the seconds sending it took and the bytes left in the socket send queue
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._last_sent is not None:
+                interval = now - self._last_sent
+                self._interval = interval if self._interval is None else 0.8 * self._interval + 0.2 * interval
+            self._last_sent = now
+            blocked = seconds > self.blocked_limit
+            if blocked or (backlog is not None and backlog > size + 16 * 1024):
+                self.congestions += 1
+                if blocked:
+                    throughput = 8 * size / seconds
+                else:
+                    throughput = 8 * size / (self._interval or seconds or 1)
+                current = self.target if self.target is not None else throughput
+                self.target = max(self.min_bitrate, self.decrease * min(current, throughput))
+                self._fits = 0
+            elif self.target is not None:
+                if self._fits >= self.fits_to_disengage:
+                    self.target = None
+                else:
+                    self.target *= self.increase
+
+    def image_budget(self, images):
+        """
+        Bytes each image of an update may take to stay within the bitrate
+        """
+        bitrate = self.bitrate()
+        if bitrate is None:
+            return None
+        interval = self._interval or 1 / 30
+        return max(1024, int(bitrate / 8 * interval / max(images, 1)))
+
+    def submit(self, prepare, deliver, images):
+        """
+        Transcodes and sends an update in the pool: prepare(transform) resolves
+        its images and returns the arguments of deliver, which sends them.
+        Returns False when the update was skipped because the pool is full.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.skipped += 1
+                return False
+            self._pending += 1
+            self.submitted += 1
+            previous = self._last_job
+            job = self._pool.submit(self._run, prepare, deliver, images, previous)
+            self._last_job = job
+        return True
+
+    def _run(self, prepare, deliver, images, previous):
+        try:
+            budget = self.image_budget(images)
+            if budget is None:
+                prepared = prepare(None)
+            else:
+                prepared = prepare(lambda frame: self.transcode(frame, budget))
+            # Sent in order, after the updates submitted before
+            if previous is not None:
+                previous.exception()
+            deliver(*prepared)
+        except Exception:
+            LogManager.logger.exception("Exception sending transcoded update")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def transcode(self, frame, budget):
+        """
+        Returns the frame as is if it fits in budget bytes, otherwise a JPEG
+        frame downscaled and recompressed to fit
+        """
+        if len(frame) - image_header.size <= budget:
+            with self._lock:
+                self.forwarded += 1
+                self._fits += 1
+            return frame
+        try:
+            transcoded = self._transcode(frame, budget)
+        except (ImageError, cv2.error, ValueError) as e:
+            LogManager.logger.debug(f"Image not transcoded: {e}")
+            with self._lock:
+                self.failed += 1
+            return frame
+        with self._lock:
+            self.transcoded += 1
+            self.bytes_in += len(frame)
+            self.bytes_out += len(transcoded)
+            self._fits = 0
+        return transcoded
+
+    def _transcode(self, frame, budget):
+        _, image_id, image_format, width, height, channels = image_header.unpack_from(frame)
+        payload = numpy.frombuffer(memoryview(frame)[image_header.size :], dtype=numpy.uint8)
+        if image_format == _raw:
+            if channels not in (1, 3, 4) or payload.size != width * height * channels:
+                raise ImageError(f"Raw image of {payload.size} bytes is not {width}x{height}x{channels}")
+            conversions = {1: cv2.COLOR_GRAY2BGR, 3: cv2.COLOR_RGB2BGR, 4: cv2.COLOR_RGBA2BGR}
+            image = cv2.cvtColor(payload.reshape(height, width, channels), conversions[channels])
+        elif image_format in formats:
+            image = cv2.imdecode(payload, cv2.IMREAD_COLOR)
+            if image is None:
+                raise ImageError(f"Cannot decode {formats[image_format]} image {image_id}")
+        else:
+            raise ImageError(f"Unknown image format {image_format}")
+        height, width = image.shape[:2]
+        pixels = width * height
+        scale = min(1.0, math.sqrt(budget / (self._bytes_per_pixel * pixels)))
+        quality = self.quality
+        if scale < self.min_scale:
+            # Smaller images would be useless, the quality goes down instead
+            quality = max(self.min_quality, int(self.quality * scale / self.min_scale))
+            scale = self.min_scale
+        if scale < 1.0:
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode(".jpg", image, (cv2.IMWRITE_JPEG_QUALITY, quality))
+        if not ok:
+            raise ImageError(f"Cannot encode image {image_id}")
+        height, width = image.shape[:2]
+        if quality == self.quality:
+            with self._lock:
+                self._bytes_per_pixel = 0.8 * self._bytes_per_pixel + 0.2 * encoded.size / (width * height)
+        if image_format == _jpeg and encoded.size >= len(frame) - image_header.size:
+            return frame
+        return pack_image(image_id, _jpeg, width, height, 3, encoded.tobytes())
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            bitrate = self.bitrate()
+            return {
+                "available": self.available,
+                "enabled": self.enabled,
+                "engaged": self.enabled and bitrate is not None,
+                "target_bitrate": round(bitrate) if bitrate is not None else None,
+                "max_bitrate": self.max_bitrate,
+                "submitted": self.submitted,
+                "skipped": self.skipped,
+                "pending": self._pending,
+                "transcoded": self.transcoded,
+                "forwarded": self.forwarded,
+                "failed": self.failed,
+                "congestions": self.congestions,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+            }
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src.manager.comms.fast_message import RawJson
+from src.manager.ram_logging.log_manager import LogManager
+
+
+class UpdateScheduler(threading.Thread):
+    """
+    Sends the exercise GUI updates to the client at a bounded rate.
+
+    Updates wait in a pending buffer until the next flush, at most `hz` flushes
+    per second. Updates with the same first key (the same kind of GUI message,
+    parsed or not) replace each other while they wait, so only the latest is
+    sent (latest wins); a flush sends the pending updates in the order their kind first
+    arrived. An update arriving after a quiet period is sent right away.
+    The buffer is bounded: when it is full the oldest update is dropped.
+    """
+
+    def __init__(self, hz=None, max_pending=64):
+        super().__init__(daemon=True, name="UpdateScheduler")
+        self.default_hz = float(hz or os.environ.get("RAM_UPDATE_HZ") or 30)
+        self.hz = self.default_hz
+        self.max_pending = max_pending
+        self.sink = None
+        self.received = 0
+        self.sent = 0
+        self.merged = 0
+        self.dropped = 0
+        self.flushes = 0
+        self._pending = OrderedDict()
+        self._sequence = 0
+        self._last_flush = 0.0
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+
+    def coalescing_key(self, data):
+        # The first key tells the kind, the only one known of unparsed updates
+        if isinstance(data, dict):
+            key = next(iter(data), None)
+        elif isinstance(data, RawJson):
+            key = data.first_key()
+        else:
+            key = None
+        if key is not None:
+            return ("kind", str(key))
+        # Updates of unknown kind are never merged
+        self._sequence += 1
+        return self._sequence
+
+    def set_sink(self, sink):
+        with self._condition:
+            self.sink = sink
+
+    def set_rate(self, hz):
+        hz = float(hz)
+        if not 0 < hz <= 1000:
+            raise ValueError("The update rate must be between 0 and 1000 Hz")
+        with self._condition:
+            self.hz = hz
+            self._condition.notify()
+
+    def reset(self):
+        """
+        Discards the pending updates and restores the default rate, for a new session
+        """
+        with self._condition:
+            self._pending.clear()
+            self.hz = self.default_hz
+
+    def put(self, data):
+        with self._condition:
+            self.received += 1
+            key = self.coalescing_key(data)
+            if key in self._pending:
+                # Keeps the position of the kind, so a busy kind cannot starve the others
+                self._pending[key] = data
+                self.merged += 1
+            else:
+                if len(self._pending) >= self.max_pending:
+                    self._pending.popitem(last=False)
+                    self.dropped += 1
+                self._pending[key] = data
+            self._condition.notify()
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            with self._condition:
+                while not self._pending and not self._stop.is_set():
+                    self._condition.wait()
+                # Waits for the next flush slot, merging the updates that arrive meanwhile
+                while not self._stop.is_set():
+                    remaining = self._last_flush + 1 / self.hz - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._stop.is_set():
+                    return
+                if not self._pending:
+                    continue
+                updates = list(self._pending.values())
+                self._pending.clear()
+                self._last_flush = time.monotonic()
+                self.flushes += 1
+                sink = self.sink
+            if sink is None:
+                self.dropped += len(updates)
+                continue
+            for data in updates:
+                try:
+                    sink(data)
+                    self.sent += 1
+                except Exception:
+                    LogManager.logger.exception("Exception sending update")
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stop.set()
+            self._pending.clear()
+            self._condition.notify()
+
+    def stats(self):
+        return {
+            "hz": self.hz,
+            "received": self.received,
+            "sent": self.sent,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+        }
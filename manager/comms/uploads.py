@@ -0,0 +1,223 @@
+import base64
+import hashlib
+import os
+import re
+import struct
+import threading
+
+from src.manager.ram_logging.log_manager import LogManager
+
+# Binary frame carrying a chunk of an upload:
+# magic, sha256 digest of the whole file, offset of the chunk (big endian), chunk bytes
+chunk_magic = b"RAMU"
+chunk_header = struct.Struct(">4s32sQ")
+# Chunk size suggested to clients, small enough to keep frames cheap to buffer
+chunk_size = 1024 * 1024
+max_upload_size = 4 * 1024 * 1024 * 1024
+# Characters of a data URL decoded at a time, a multiple of 4
+decode_block = 4 * 1024 * 1024
+_sha256_pattern = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadError(Exception):
+    pass
+
+
+def is_chunk(data):
+    return data[: len(chunk_magic)] == chunk_magic
+
+
+def file_sha256(path):
+    """
+    Hashes a file without reading it at once
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest
+
+
+def write_data_url(data_url, destination):
+    """
+    Decodes a base64 data URL into destination a block at a time, so the
+    decoded file is never held in memory. Returns the sha256 of the file.
+    """
+    start = data_url.find("base64,")
+    start = 0 if start == -1 else start + len("base64,")
+    digest = hashlib.sha256()
+    with open(destination, "wb") as f:
+        for offset in range(start, len(data_url), decode_block):
+            block = base64.b64decode(data_url[offset : offset + decode_block])
+            digest.update(block)
+            f.write(block)
+    return digest.hexdigest()
+
+
+class Upload:
+    """
+    A file being received. Chunks are appended in order and hashed as they
+    arrive, so finishing the upload does not read the file again.
+    """
+
+    def __init__(self, sha256, size, part_path):
+        self.sha256 = sha256
+        self.size = size
+        self.part_path = part_path
+        self.digest = hashlib.sha256()
+        self.received = 0
+
+    def resume(self):
+        """
+        Continues from the bytes already on disk, after a reconnection or a
+        restart of RAM
+        """
+        if not os.path.exists(self.part_path):
+            return
+        on_disk = os.path.getsize(self.part_path)
+        if on_disk > self.size:
+            os.truncate(self.part_path, self.size)
+            on_disk = self.size
+        self.digest = file_sha256(self.part_path)
+        self.received = on_disk
+
+
+class UploadStore:
+    """
+    Receives files through binary websocket frames.
+
+    The client announces the file with `upload_start` (sha256 and size) and gets
+    the offset to send from, 0 for a new upload or the bytes already received
+    for an interrupted one. It then sends the chunks as binary frames and
+    completes the upload with `upload_finish`, which checks the size and the
+    checksum. Completed files are named after their sha256, so they can be
+    referenced by later commands and are never uploaded twice.
+    """
+
+    def __init__(self, directory="/workspace/uploads"):
+        self.directory = directory
+        self._uploads = {}
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.bytes_received = 0
+        # Called with the size of a new upload, to make room for it
+        self.before_upload = None
+
+    def path(self, sha256):
+        """
+        Path of a completed upload
+        """
+        path = os.path.join(self.directory, str(sha256))
+        if not _sha256_pattern.match(str(sha256)) or not os.path.isfile(path):
+            raise UploadError(f"Unknown upload {sha256}")
+        # Marks the upload as recently used
+        os.utime(path)
+        return path
+
+    def active_paths(self):
+        with self._lock:
+            return {os.path.abspath(upload.part_path) for upload in self._uploads.values()}
+
+    def start(self, data):
+        data = data or {}
+        sha256 = str(data.get("sha256", "")).lower()
+        if not _sha256_pattern.match(sha256):
+            raise UploadError("upload_start requires the sha256 of the file")
+        try:
+            size = int(data["size"])
+        except (KeyError, TypeError, ValueError):
+            raise UploadError("upload_start requires the size of the file")
+        if not 0 <= size <= max_upload_size:
+            raise UploadError(f"Uploads are limited to {max_upload_size} bytes")
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, sha256)
+        with self._lock:
+            known = self._uploads.get(sha256)
+            new = known is None or known.size != size
+        # Outside the lock, making room asks which uploads are in progress
+        if new and not os.path.isfile(path) and self.before_upload is not None:
+            self.before_upload(size)
+        with self._lock:
+            if os.path.isfile(path):
+                self._uploads.pop(sha256, None)
+                return self._status(sha256, size, size, complete=True)
+            upload = self._uploads.get(sha256)
+            if upload is None or upload.size != size:
+                upload = Upload(sha256, size, path + ".part")
+                upload.resume()
+                self._uploads[sha256] = upload
+            LogManager.logger.info(
+                f"Upload {sha256[:12]} of {size} bytes {data.get('name', '')} "
+                f"starting at offset {upload.received}"
+            )
+            return self._status(sha256, size, upload.received, complete=False)
+
+    def _status(self, sha256, size, offset, complete):
+        return {
+            "upload": sha256,
+            "size": size,
+            "offset": offset,
+            "chunk_size": chunk_size,
+            "complete": complete,
+        }
+
+    def write_chunk(self, data):
+        """
+        Appends the chunk carried by a binary frame. Returns the upload and the
+        offset expected next.
+        """
+        if len(data) < chunk_header.size:
+            raise UploadError("Truncated upload chunk")
+        _, digest, offset = chunk_header.unpack_from(data)
+        sha256 = digest.hex()
+        with self._lock:
+            upload = self._uploads.get(sha256)
+            if upload is None:
+                raise UploadError(f"Upload {sha256} was not started")
+            if offset != upload.received:
+                raise UploadError(
+                    f"Upload {sha256} expected offset {upload.received}, got {offset}"
+                )
+            chunk = memoryview(data)[chunk_header.size :]
+            if upload.received + len(chunk) > upload.size:
+                raise UploadError(f"Upload {sha256} is larger than announced")
+            with open(upload.part_path, "ab") as f:
+                f.write(chunk)
+            upload.digest.update(chunk)
+            upload.received += len(chunk)
+            self.bytes_received += len(chunk)
+            return sha256, upload.received
+
+    def finish(self, data):
+        sha256 = str((data or {}).get("sha256", "")).lower()
+        with self._lock:
+            upload = self._uploads.get(sha256)
+            if upload is None:
+                # Finishing twice is harmless
+                path = self.path(sha256)
+                return {"upload": sha256, "size": os.path.getsize(path), "complete": True}
+            if upload.received != upload.size:
+                raise UploadError(
+                    f"Upload {sha256} incomplete: {upload.received} of {upload.size} bytes"
+                )
+            if not os.path.exists(upload.part_path):
+                # Empty file, no chunk was written
+                open(upload.part_path, "wb").close()
+            if upload.digest.hexdigest() != sha256:
+                del self._uploads[sha256]
+                os.remove(upload.part_path)
+                raise UploadError(f"Upload {sha256} checksum mismatch, upload it again")
+            os.replace(upload.part_path, os.path.join(self.directory, sha256))
+            del self._uploads[sha256]
+            self.completed += 1
+        LogManager.logger.info(f"Upload {sha256[:12]} completed")
+        return {"upload": sha256, "size": upload.size, "complete": True}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_progress": len(self._uploads),
+                "completed": self.completed,
+                "bytes_received": self.bytes_received,
+            }
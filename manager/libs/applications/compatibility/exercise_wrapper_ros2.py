@@ -9,6 +9,7 @@ from threading import Thread
 
 from src.manager.libs.applications.compatibility.client import Client
 from src.manager.libs.process_utils import stop_process_and_children
+from src.manager.libs.simulation_control import get_simulation_control
 from src.manager.ram_logging.log_manager import LogManager
 from src.manager.manager.application.robotics_python_application_interface import IRoboticsPythonApplication
 from src.manager.manager.lint.linter import Lint
@@ -21,6 +22,7 @@ class CompatibilityExerciseWrapperRos2(IRoboticsPythonApplication):
         home_dir = os.path.expanduser('~')
         self.running = False
         self.linter = Lint()
+        self.simulation_control = get_simulation_control()
         self.brain_ready_event = threading.Event()
         # TODO: review hardcoded values
         process_ready, self.exercise_server = self._run_exercise_server(f"python3 {exercise_command}",
@@ -112,26 +114,20 @@ class CompatibilityExerciseWrapperRos2(IRoboticsPythonApplication):
         self.update_callback(payload)
         self.exercise_connection.send("#ack")
 
-    def call_service(self, service, service_type):
-        command = f"ros2 service call {service} {service_type}"
-        subprocess.call(f"{command}", shell=True, stdout=sys.stdout, stderr=subprocess.STDOUT, bufsize=1024,
-                                   universal_newlines=True)
-    
     def run(self):
-        self.call_service("/unpause_physics","std_srvs/srv/Empty")
+        self.simulation_control.unpause()
         self.exercise_connection.send("#play")
 
     def stop(self):
-        self.call_service("/pause_physics","std_srvs/srv/Empty")
-        self.call_service("/reset_world","std_srvs/srv/Empty")
+        self.simulation_control.pause_and_reset()
         self.exercise_connection.send("#rest")
 
     def resume(self):
-        self.call_service("/unpause_physics","std_srvs/srv/Empty")
+        self.simulation_control.unpause()
         self.exercise_connection.send("#play")
 
     def pause(self):
-        self.call_service("/pause_physics","std_srvs/srv/Empty")
+        self.simulation_control.pause()
         self.exercise_connection.send("#stop")
 
     def restart(self):
@@ -1,8 +1,9 @@
+import os
 import threading
 import json
 
-from websocket_server import WebsocketServer
-
+from src.manager.comms.binary_websocket import BinaryWebsocketServer
+from src.manager.comms.fast_message import RawJson
 from src.manager.ram_logging.log_manager import LogManager
 
 
@@ -11,13 +12,19 @@ class Server(threading.Thread):
         self,
         port,
         callback,
+        image_callback=None,
     ):
         super().__init__()
         self.update_callback = callback
-        self.server = WebsocketServer(port=port, host="127.0.0.1")
+        # Receives the binary image frames of the template (see comms/images.py)
+        self.image_callback = image_callback
+        self.server = BinaryWebsocketServer(port=port, host="127.0.0.1")
+        # Template messages are forwarded without parsing them, unless validation is enabled
+        self.validate = os.environ.get("RAM_GUI_VALIDATE", "0") == "1"
         self.server.set_fn_new_client(self.on_open)
         self.server.set_fn_client_left(self.on_close)
         self.server.set_fn_message_received(self.on_message)
+        self.server.set_fn_binary_message_received(self.on_binary_message)
         self.current_client = None
         self.client_lock = threading.Lock() # Used to avoid concurrency problems
         self._stop = threading.Event()
@@ -40,9 +47,18 @@ class Server(threading.Thread):
                 self.server.send_message(self.current_client, data)
 
     def on_message(self, client, server, message):
-        payload = json.loads(message)
+        payload = json.loads(message) if self.validate else RawJson(message)
         self.update_callback(payload)
         LogManager.logger.debug(f"Message received from template: {message[:30]}")
+
+    def on_binary_message(self, client, server, data):
+        if self.image_callback is None:
+            LogManager.logger.warning("Binary message from template ignored")
+            return
+        try:
+            self.image_callback(data)
+        except Exception as e:
+            LogManager.logger.warning(f"Invalid binary message from template: {e}")
         
 
     def on_close(self, client, server):
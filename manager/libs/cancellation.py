@@ -0,0 +1,85 @@
+import contextvars
+import threading
+import time
+
+
+class TransitionCancelled(Exception):
+    """
+    Raised inside a transition when it has been cancelled or its deadline expired
+    """
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation and progress reporting for a running transition.
+
+    The token of the transition being executed is stored in a context variable,
+    so the blocking helpers used by launchers (waiting for ports, processes,
+    X servers...) can check it without having it passed down explicitly.
+    """
+
+    def __init__(self, on_progress=None):
+        self._event = threading.Event()
+        self.reason = None
+        self.stage = None
+        self.on_progress = on_progress
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def check(self):
+        if self._event.is_set():
+            raise TransitionCancelled(self.reason)
+
+    def sleep(self, seconds):
+        if self._event.wait(seconds):
+            raise TransitionCancelled(self.reason)
+
+    def report(self, stage):
+        self.stage = stage
+        if self.on_progress is not None:
+            self.on_progress()
+
+
+_current_token = contextvars.ContextVar("cancellation_token", default=None)
+
+
+def run_with_token(token, fn, *args, **kwargs):
+    """
+    Runs fn making token the current cancellation token
+    """
+    reset = _current_token.set(token)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _current_token.reset(reset)
+
+
+def check_cancelled():
+    token = _current_token.get()
+    if token is not None:
+        token.check()
+
+
+def cancellable_sleep(seconds):
+    """
+    Same as time.sleep, but returns early raising TransitionCancelled if the
+    current transition is cancelled
+    """
+    token = _current_token.get()
+    if token is None:
+        time.sleep(seconds)
+    else:
+        token.sleep(seconds)
+
+
+def report_progress(stage):
+    token = _current_token.get()
+    if token is not None:
+        token.report(stage)
@@ -0,0 +1,134 @@
+import os
+import stat
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.manager.libs.singleton import singleton
+from src.manager.ram_logging.log_manager import LogManager
+
+
+@singleton
+class RuntimeEnvironment:
+    """
+    Host facts shared by the manager and the launchers.
+
+    Facts are probed once, in parallel on background threads, and cached until they
+    are explicitly invalidated. Accessors block only if their probe is still running.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._facts = {}
+        self._devices = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="environment"
+        )
+        self._probes = {
+            "ros_distro": lambda: os.environ.get("ROS_DISTRO", "").strip(),
+            "ros_version": lambda: os.environ.get("ROS_VERSION", "").strip(),
+            "image_tag": lambda: os.environ.get("IMAGE_TAG", "").strip(),
+            "gpu_acceleration": self._probe_gpu_acceleration,
+            "dri_path": self._probe_dri_path,
+            "detected_dri_path": self._probe_detected_dri_path,
+        }
+
+    def refresh(self):
+        """
+        Starts probing every fact that is not cached yet, without waiting for them
+        """
+        for name in self._probes:
+            self._future(name)
+
+    def invalidate(self, *names):
+        """
+        Drops the given cached facts (all of them if none is given) so they are
+        probed again the next time they are needed
+        """
+        with self._lock:
+            for name in names or list(self._facts):
+                self._facts.pop(name, None)
+            if not names:
+                self._devices.clear()
+
+    def _future(self, name):
+        with self._lock:
+            future = self._facts.get(name)
+            if future is None:
+                future = self._executor.submit(self._probes[name])
+                self._facts[name] = future
+            return future
+
+    def _get(self, name):
+        return self._future(name).result()
+
+    @property
+    def ros_distro(self) -> str:
+        return self._get("ros_distro")
+
+    @property
+    def ros_version(self) -> str:
+        return self._get("ros_version")
+
+    @property
+    def image_tag(self) -> str:
+        return self._get("image_tag")
+
+    @property
+    def gpu_acceleration(self) -> bool:
+        return self._get("gpu_acceleration")
+
+    @property
+    def dri_path(self) -> str:
+        """
+        DRI device set by DRI_NAME, card0 by default
+        """
+        return self._get("dri_path")
+
+    @property
+    def detected_dri_path(self) -> str:
+        """
+        DRI device set by DRI_NAME, card1 by default if it exists (empty without /dev/dri)
+        """
+        return self._get("detected_dri_path")
+
+    def is_char_device(self, device_path: str) -> bool:
+        with self._lock:
+            if device_path not in self._devices:
+                try:
+                    self._devices[device_path] = stat.S_ISCHR(
+                        os.lstat(device_path)[stat.ST_MODE]
+                    )
+                except Exception:
+                    self._devices[device_path] = False
+            return self._devices[device_path]
+
+    def _probe_gpu_acceleration(self):
+        try:
+            if not os.path.exists("/dev/dri"):
+                LogManager.logger.error("/dev/dri does not exist. No direct GPU access.")
+                return False
+
+            result = subprocess.check_output(
+                "glxinfo | grep direct", shell=True
+            ).decode("utf-8")
+            LogManager.logger.debug(result)
+
+            return "direct rendering: Yes" in result
+        except Exception as e:
+            LogManager.logger.error(f"Error probing GPU acceleration: {e}")
+            return False
+
+    def _probe_dri_path(self):
+        return os.path.join("/dev/dri", os.environ.get("DRI_NAME", "card0"))
+
+    def _probe_detected_dri_path(self):
+        directory_path = "/dev/dri"
+        dri_path = ""
+        if os.path.exists(directory_path) and os.path.isdir(directory_path):
+            files = os.listdir(directory_path)
+            if "card1" in files:
+                dri_path = os.path.join("/dev/dri", os.environ.get("DRI_NAME", "card1"))
+            else:
+                dri_path = os.path.join("/dev/dri", os.environ.get("DRI_NAME", "card0"))
+        return dri_path
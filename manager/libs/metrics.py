@@ -0,0 +1,39 @@
+import threading
+
+
+class LatencyStats:
+    """
+    Thread safe accumulator for latency samples, grouped by a key (for instance
+    the command name). Samples are given in seconds and reported in milliseconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def add(self, key, seconds):
+        with self._lock:
+            entry = self._stats.setdefault(
+                key, {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0}
+            )
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["last"] = seconds
+            if seconds > entry["max"]:
+                entry["max"] = seconds
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                key: {
+                    "count": entry["count"],
+                    "mean_ms": round(entry["total"] / entry["count"] * 1000, 3),
+                    "max_ms": round(entry["max"] * 1000, 3),
+                    "last_ms": round(entry["last"] * 1000, 3),
+                }
+                for key, entry in self._stats.items()
+            }
@@ -12,6 +12,8 @@ import base64
 import psutil
 
 from src.manager.ram_logging.log_manager import LogManager
+from src.manager.libs.cancellation import cancellable_sleep, report_progress
+from src.manager.libs.environment import RuntimeEnvironment
 
 
 def get_class(kls):
@@ -38,13 +40,32 @@ def class_from_module(module: str):
     return ''.join([s.capitalize() for s in module.split('_')])
 
 
+def running_process(process):
+    """
+    psutil handle of a Popen or ZygoteProcess that is still running. Raises
+    psutil.NoSuchProcess if it exited, also when its pid was reused since.
+    """
+    handle = getattr(process, "psutil_process", None)
+    if handle is None:
+        if hasattr(process, "psutil_process"):
+            raise psutil.NoSuchProcess(process.pid)
+        return psutil.Process(process.pid)
+    if not handle.is_running():
+        raise psutil.NoSuchProcess(process.pid)
+    return handle
+
+
 def stop_process_and_children(process: Popen, signal: int = 9, timeout: int = None):
     """
-    Stops a list of processes waiting for them to stop
+    Stops a list of processes waiting for them to stop. A process that already
+    exited is not an error.
     """
     # collect processes to stop
-    proc = psutil.Process(process.pid)
-    children = proc.children(recursive=True)
+    try:
+        proc = running_process(process)
+        children = proc.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return [], []
     children.append(proc)
 
     # send signal to processes
@@ -83,12 +104,13 @@ def wait_for_xserver(display, timeout=30):
     display by checking the existence of the Unix domain socket associated with the X server.
     It waits until the X server is available or until the timeout is reached, 
     whichever comes first."""
+    report_progress(f"Waiting for Xserver on {display}")
     start_time = time.time()
     while time.time() - start_time < timeout:
         if is_xserver_running(display):
             print(f"Xserver on {display} is running!")
             return
-        time.sleep(0.1)
+        cancellable_sleep(0.1)
     print(
         f"Timeout: Xserver on {display} is not available after {timeout} seconds.")
 
@@ -118,40 +140,23 @@ def wait_for_process_to_start(process_name, timeout=60):
     - process_name (str): The name of the process to wait for.
     - timeout (int, optional): The number of seconds to wait before giving up. Default is 60.
     """
+    report_progress(f"Waiting for {process_name} to start")
     start_time = time.time()
     while time.time() - start_time < timeout:
         if is_process_running(process_name):
             print(f"{process_name} is running!")
             return True
-        time.sleep(1)
+        cancellable_sleep(1)
     print(f"Timeout: {process_name} did not start within {timeout} seconds.")
     return False
 
 
 def check_gpu_acceleration():
-    try:
-        # Verifica si /dev/dri existe
-        if not os.path.exists("/dev/dri"):
-            LogManager.logger.error(
-                "/dev/dri does not exist. No direct GPU access.")
-            return False
-
-        # Obtiene la salida de glxinfo
-        result = subprocess.check_output(
-            "glxinfo | grep direct", shell=True).decode('utf-8')
-        print(result)
-
-        # Verifica si la aceleración directa está habilitada
-        return "direct rendering: Yes" in result
-
-    except Exception as e:
-        print(f"Error: {e}")
-        return False
+    return RuntimeEnvironment.gpu_acceleration
 
 
 def get_ros_version():
-    output = subprocess.check_output(['bash', '-c', 'echo $ROS_VERSION'])
-    return output.decode('utf-8')[0]
+    return RuntimeEnvironment.ros_version[:1]
 
 
 def get_user_world(launch_file):
@@ -0,0 +1,59 @@
+import os
+import threading
+
+import psutil
+
+
+class ResourceSnapshot:
+    """
+    Threads, file descriptors and child processes owned by the RAM process at a given time.
+    Used to check that a session reset releases everything the session acquired.
+    """
+
+    def __init__(self):
+        self.threads = {
+            thread.ident: thread.name for thread in threading.enumerate()
+        }
+        try:
+            self.fds = set(os.listdir("/proc/self/fd"))
+        except OSError:
+            self.fds = set()
+        self.children = {
+            child.pid: child.name()
+            for child in self._children()
+        }
+
+    @staticmethod
+    def _children():
+        children = []
+        for child in psutil.Process().children(recursive=True):
+            try:
+                child.name()
+                children.append(child)
+            except psutil.NoSuchProcess:
+                pass
+        return children
+
+    def leaks(self, baseline, persistent_threads=(), persistent_pids=()):
+        """
+        Returns what this snapshot holds that baseline did not, ignoring the threads whose
+        name starts with one of persistent_threads and the processes in persistent_pids
+        """
+        threads = [
+            name
+            for ident, name in self.threads.items()
+            if ident not in baseline.threads and not name.startswith(tuple(persistent_threads))
+        ]
+        children = [
+            f"{name} ({pid})"
+            for pid, name in self.children.items()
+            if pid not in baseline.children and pid not in persistent_pids
+        ]
+        leaks = {}
+        if threads:
+            leaks["threads"] = threads
+        if len(self.fds) > len(baseline.fds):
+            leaks["fds"] = len(self.fds) - len(baseline.fds)
+        if children:
+            leaks["children"] = children
+        return leaks
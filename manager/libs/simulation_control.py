@@ -0,0 +1,208 @@
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import rclpy
+    from rclpy.executors import SingleThreadedExecutor
+    from std_srvs.srv import Empty
+except ImportError:
+    rclpy = None
+
+from src.manager.ram_logging.log_manager import LogManager
+
+
+class SimulationControlError(Exception):
+    pass
+
+
+class SimulationControl:
+    """
+    Long lived ROS 2 client for the simulation control services (pause, unpause and reset).
+
+    The node and its service clients are created once and spun on a background thread,
+    so every call reuses warm handles instead of paying the startup and discovery cost
+    of `ros2 service call`. When rclpy is not available it falls back to the CLI.
+    """
+
+    services = {
+        "pause": "/pause_physics",
+        "unpause": "/unpause_physics",
+        "reset": "/reset_world",
+    }
+
+    def __init__(self, timeout=2.0, services=None):
+        self.timeout = timeout
+        if services is not None:
+            self.services = services
+        self.context = None
+        self.node = None
+        self.clients = {}
+        self.executor = None
+        self.thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        return rclpy is not None
+
+    def start(self):
+        with self._lock:
+            if self.node is not None or not self.available:
+                return
+            self.context = rclpy.Context()
+            rclpy.init(context=self.context)
+            self.node = rclpy.create_node(
+                "ram_simulation_control", context=self.context
+            )
+            self.clients = {
+                name: self.node.create_client(Empty, service)
+                for name, service in self.services.items()
+            }
+            self.executor = SingleThreadedExecutor(context=self.context)
+            self.executor.add_node(self.node)
+            self.thread = threading.Thread(
+                target=self.executor.spin, daemon=True, name="SimulationControl"
+            )
+            self.thread.start()
+
+    def shutdown(self):
+        with self._lock:
+            if self.node is None:
+                return
+            self.executor.shutdown()
+            self.node.destroy_node()
+            rclpy.shutdown(context=self.context)
+            self.thread.join(timeout=self.timeout)
+            self.node = None
+            self.clients = {}
+            self.executor = None
+            self.thread = None
+            self.context = None
+
+    def call(self, *names, timeout=None):
+        """
+        Calls the given services concurrently and waits until all of them answer
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if not self.available:
+            for name in names:
+                self._call_cli(self.services[name])
+            return
+
+        self.start()
+        deadline = time.monotonic() + timeout
+        pending = []
+        for name in names:
+            client = self.clients[name]
+            if not client.service_is_ready() and not client.wait_for_service(
+                timeout_sec=max(0.0, deadline - time.monotonic())
+            ):
+                raise SimulationControlError(
+                    f"Service {self.services[name]} is not available"
+                )
+            pending.append((name, client.call_async(Empty.Request())))
+
+        for name, future in pending:
+            if not self._wait(future, deadline - time.monotonic()):
+                future.cancel()
+                raise SimulationControlError(
+                    f"Service {self.services[name]} did not answer within {timeout} seconds"
+                )
+            if future.exception() is not None:
+                raise SimulationControlError(str(future.exception()))
+
+    @staticmethod
+    def _wait(future, timeout):
+        if future.done():
+            return True
+        done = threading.Event()
+        future.add_done_callback(lambda _: done.set())
+        return done.wait(max(0.0, timeout))
+
+    def pause(self):
+        self.call("pause")
+
+    def unpause(self):
+        self.call("unpause")
+
+    def reset(self):
+        self.call("reset")
+
+    def pause_and_reset(self):
+        self.call("pause", "reset")
+
+    def _call_cli(self, service):
+        command = f"ros2 service call {service} std_srvs/srv/Empty"
+        subprocess.call(
+            f"{command}",
+            shell=True,
+            stdout=sys.stdout,
+            stderr=subprocess.STDOUT,
+            bufsize=1024,
+            universal_newlines=True,
+        )
+
+
+_simulation_control = None
+_simulation_control_lock = threading.Lock()
+
+
+def get_simulation_control():
+    """
+    Returns the simulation control client shared by the whole RAM process
+    """
+    global _simulation_control
+    with _simulation_control_lock:
+        if _simulation_control is None:
+            _simulation_control = SimulationControl()
+        return _simulation_control
+
+
+class SimulationServicesStandIn:
+    """
+    Local stand-in for the Gazebo simulation control services, so SimulationControl
+    can be exercised without a simulator. It records every call it receives.
+
+    Run it with `python3 -m src.manager.libs.simulation_control`.
+    """
+
+    def __init__(self, services=None):
+        services = services or SimulationControl.services
+        self.calls = []
+        self.context = rclpy.Context()
+        rclpy.init(context=self.context)
+        self.node = rclpy.create_node("simulation_services_stand_in", context=self.context)
+        self.servers = [
+            self.node.create_service(Empty, service, self._handler(service))
+            for service in services.values()
+        ]
+        self.executor = SingleThreadedExecutor(context=self.context)
+        self.executor.add_node(self.node)
+
+    def _handler(self, service):
+        def handle(request, response):
+            self.calls.append(service)
+            LogManager.logger.info(f"Stand-in service {service} called")
+            return response
+
+        return handle
+
+    def spin(self):
+        self.executor.spin()
+
+    def shutdown(self):
+        self.executor.shutdown()
+        self.node.destroy_node()
+        rclpy.shutdown(context=self.context)
+
+
+if __name__ == "__main__":
+    if rclpy is None:
+        sys.exit("rclpy is required to run the simulation services stand-in")
+    stand_in = SimulationServicesStandIn()
+    try:
+        stand_in.spin()
+    except KeyboardInterrupt:
+        stand_in.shutdown()
@@ -0,0 +1,212 @@
+import os
+import re
+import shutil
+import threading
+import time
+
+from src.manager.ram_logging.log_manager import LogManager
+
+# Artifacts younger than this are never evicted, they are about to be used
+min_age = 120
+_size_pattern = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*$", re.IGNORECASE)
+_units = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30, "t": 1 << 40}
+
+
+def parse_size(value):
+    """
+    Parses a byte count such as 5000000, "500M" or "20GiB"
+    """
+    match = _size_pattern.match(str(value))
+    if match is None:
+        raise ValueError(f"Invalid size {value}")
+    return int(float(match.group(1)) * _units[match.group(2).lower()])
+
+
+def tree_size(path):
+    """
+    Bytes used by a file or directory tree. A file hardlinked n times counts
+    1/n of its size, so trees sharing files add up to the space really used.
+    """
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return 0
+    if not os.path.isdir(path) or os.path.islink(path):
+        return st.st_size // max(st.st_nlink, 1)
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            total += tree_size(os.path.join(root, name))
+    return total
+
+
+class Artifact:
+    def __init__(self, kind, path, size, last_used, extra=()):
+        self.kind = kind
+        self.path = path
+        self.size = size
+        self.last_used = last_used
+        # Files removed along with the artifact (manifests)
+        self.extra = extra
+
+
+class WorkspaceStorage:
+    """
+    Keeps the artifacts RAM writes in /workspace (extracted universes, uploads,
+    legacy world zips and binaries) within a byte budget.
+
+    When the budget is exceeded, the least recently used artifacts are removed
+    until usage is back under it. Artifacts in use are never removed: the
+    universe of the running world, uploads in progress, anything younger than
+    min_age and everything under /workspace/code, which is the live application
+    folder and only counts towards usage.
+    """
+
+    def __init__(
+        self,
+        universe_cache,
+        uploads,
+        budget=None,
+        workspace="/workspace",
+        protected=lambda: (),
+    ):
+        if budget is None:
+            budget = os.environ.get("RAM_STORAGE_BUDGET") or "20G"
+        self.budget = parse_size(budget)
+        self.universe_cache = universe_cache
+        self.uploads = uploads
+        self.workspace = workspace
+        self.protected = protected
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self._lock = threading.Lock()
+        # Store entries never change once extracted, so their size is computed once
+        self._store_sizes = {}
+
+    def artifacts(self):
+        artifacts = []
+        store = self.universe_cache.store
+        if os.path.isdir(store):
+            for entry in os.scandir(store):
+                if not entry.is_dir(follow_symlinks=False) or ".tmp-" in entry.name:
+                    continue
+                manifest = os.path.join(store, entry.name + ".manifest.json")
+                if not os.path.exists(manifest):
+                    continue
+                if entry.name not in self._store_sizes:
+                    self._store_sizes[entry.name] = tree_size(entry.path)
+                artifacts.append(
+                    Artifact(
+                        "universe",
+                        entry.path,
+                        self._store_sizes[entry.name],
+                        os.stat(manifest).st_mtime,
+                        extra=(manifest,),
+                    )
+                )
+
+        worlds = self.universe_cache.directory
+        if os.path.isdir(worlds):
+            for entry in os.scandir(worlds):
+                if entry.name == ".store" or entry.is_symlink():
+                    continue
+                # Zips and trees written by previous versions of RAM
+                artifacts.append(
+                    Artifact("world", entry.path, tree_size(entry.path), entry.stat().st_mtime)
+                )
+
+        for kind, folder in (("upload", self.uploads.directory), ("binary", self.binaries)):
+            if not os.path.isdir(folder):
+                continue
+            for entry in os.scandir(folder):
+                st = entry.stat(follow_symlinks=False)
+                artifacts.append(
+                    Artifact(kind, entry.path, tree_size(entry.path), max(st.st_mtime, st.st_atime))
+                )
+        return artifacts
+
+    @property
+    def binaries(self):
+        return os.path.join(self.workspace, "binaries")
+
+    @property
+    def code(self):
+        return os.path.join(self.workspace, "code")
+
+    def _protected_paths(self):
+        protected = set(os.path.abspath(path) for path in self.protected())
+        protected.update(self.uploads.active_paths())
+        return protected
+
+    def enforce(self, reserve=0):
+        """
+        Evicts least recently used artifacts until usage plus reserve bytes fits
+        the budget. Returns the evicted paths.
+        """
+        with self._lock, self.universe_cache.lock:
+            artifacts = self.artifacts()
+            usage = sum(artifact.size for artifact in artifacts) + tree_size(self.code)
+            if usage + reserve <= self.budget:
+                return []
+            protected = self._protected_paths()
+            now = time.time()
+            evicted = []
+            for artifact in sorted(artifacts, key=lambda artifact: artifact.last_used):
+                if usage + reserve <= self.budget:
+                    break
+                if artifact.path in protected or now - artifact.last_used < min_age:
+                    continue
+                self._remove(artifact)
+                usage -= artifact.size
+                self.evictions += 1
+                self.evicted_bytes += artifact.size
+                evicted.append(artifact.path)
+            if usage + reserve > self.budget:
+                LogManager.logger.warning(
+                    f"Workspace uses {usage} bytes and needs {reserve} more, over its "
+                    f"budget of {self.budget}, but everything left is in use"
+                )
+            if evicted:
+                LogManager.logger.info(f"Evicted from the workspace: {evicted}")
+            return evicted
+
+    def _remove(self, artifact):
+        if os.path.isdir(artifact.path) and not os.path.islink(artifact.path):
+            shutil.rmtree(artifact.path, ignore_errors=True)
+        else:
+            os.remove(artifact.path)
+        for path in artifact.extra:
+            os.remove(path)
+        if artifact.kind == "universe":
+            sha256 = os.path.basename(artifact.path)
+            self._store_sizes.pop(sha256, None)
+            for entry in os.scandir(self.universe_cache.directory):
+                if entry.is_symlink() and self.universe_cache.current(entry.name) == sha256:
+                    os.remove(entry.path)
+
+    def stats(self):
+        with self._lock:
+            artifacts = self.artifacts()
+            protected = self._protected_paths()
+        kinds = {}
+        for artifact in artifacts:
+            usage = kinds.setdefault(artifact.kind, {"count": 0, "bytes": 0})
+            usage["count"] += 1
+            usage["bytes"] += artifact.size
+        kinds["code"] = {"count": 1, "bytes": tree_size(self.code)}
+        used = sum(usage["bytes"] for usage in kinds.values())
+        try:
+            disk = shutil.disk_usage(self.workspace)
+            free = disk.free
+        except OSError:
+            free = None
+        return {
+            "budget": self.budget,
+            "used": used,
+            "used_ratio": round(used / self.budget, 4) if self.budget else None,
+            "disk_free": free,
+            "by_kind": kinds,
+            "protected": sorted(path for path in protected if os.path.exists(path)),
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+        }
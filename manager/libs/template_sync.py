@@ -0,0 +1,102 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+
+
+class TemplateSync:
+    """
+    Incremental copy of exercise templates into the code workspace.
+
+    Keeps a manifest of each template (content hash per file, refreshed only when
+    the file size or modification time changes) and of what has been staged in each
+    destination. A sync only copies the files whose content changed in the template
+    or that were modified in the destination since they were staged. Once the
+    template is staged a sync reads and writes no file content, but it still walks
+    both trees and stats every file, so it stays linear in the number of files.
+
+    The destination itself is the staging directory kept between runs: the
+    application runs from it, so a separate staging directory would cost one more
+    copy on every run.
+
+    Files are copied, not hardlinked: the application runs from the destination and
+    must not be able to modify the template through it.
+    """
+
+    def __init__(self):
+        self._templates = {}
+        self._staged = {}
+        self._lock = threading.Lock()
+        self.last_report = None
+
+    @staticmethod
+    def _digest(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def manifest(self, source):
+        """
+        Returns {relative path: (size, mtime_ns, sha256)} for the template files
+        """
+        previous = self._templates.get(source, {})
+        manifest = {}
+        for root, dirs, files in os.walk(source, followlinks=True):
+            for name in files:
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, source)
+                st = os.stat(path)
+                known = previous.get(relative)
+                if known is not None and known[:2] == (st.st_size, st.st_mtime_ns):
+                    manifest[relative] = known
+                else:
+                    manifest[relative] = (st.st_size, st.st_mtime_ns, self._digest(path))
+            for name in dirs:
+                manifest.setdefault(os.path.relpath(os.path.join(root, name), source) + os.sep, None)
+        self._templates[source] = manifest
+        return manifest
+
+    def sync(self, source, destination):
+        """
+        Makes destination contain the template files of source. Files already in
+        destination that are not part of the template are left untouched.
+        Returns a report of the files checked and copied.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            manifest = self.manifest(source)
+            staged = self._staged.setdefault(destination, {})
+            copied = 0
+            copied_bytes = 0
+            for relative, entry in manifest.items():
+                target = os.path.join(destination, relative)
+                if entry is None:
+                    os.makedirs(target, exist_ok=True)
+                    continue
+                digest = entry[2]
+                try:
+                    st = os.stat(target)
+                    current = (st.st_size, st.st_mtime_ns)
+                except FileNotFoundError:
+                    current = None
+                if current is not None and staged.get(relative) == (digest, current):
+                    continue
+
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(os.path.join(source, relative), target)
+                st = os.stat(target)
+                staged[relative] = (digest, (st.st_size, st.st_mtime_ns))
+                copied += 1
+                copied_bytes += st.st_size
+
+            self.last_report = {
+                "template": source,
+                "files": sum(1 for entry in manifest.values() if entry is not None),
+                "files_copied": copied,
+                "bytes_copied": copied_bytes,
+                "seconds": round(time.perf_counter() - start, 4),
+            }
+            return self.last_report
@@ -0,0 +1,181 @@
+import contextvars
+import json
+import os
+import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from src.manager.libs.cancellation import check_cancelled, report_progress
+
+# Archives with fewer uncompressed bytes are extracted by a single thread
+parallel_threshold = 16 * 1024 * 1024
+
+
+def _safe_name(name):
+    """
+    Entries that zipfile would extract under their own name
+    """
+    parts = name.split("/")
+    return not name.startswith("/") and "\\" not in name and ".." not in parts and ":" not in name
+
+
+def _extract_entries(archive, names, destination):
+    with zipfile.ZipFile(archive) as zip_ref:
+        for name in names:
+            check_cancelled()
+            zip_ref.extract(name, destination)
+
+
+def _link_or_copy(source, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+class UniverseCache:
+    """
+    Extracted custom universes, stored by the sha256 of their zip.
+
+    `<worlds>/<name>` is a symlink to `<worlds>/.store/<sha256>`, so launching a
+    universe that was already extracted only swaps the symlink. A new version of
+    a universe only extracts the entries whose CRC or size changed since the
+    version the name pointed to; the others are hardlinked from it. This is safe
+    because store entries are never modified once complete. Large archives are
+    extracted by several threads, each with its own handle on the zip.
+    """
+
+    def __init__(self, directory="/workspace/worlds", workers=None):
+        self.directory = directory
+        self.store = os.path.join(directory, ".store")
+        self.workers = workers or os.cpu_count() or 1
+        # Also held by the storage manager while it evicts
+        self.lock = threading.Lock()
+        self.last_report = None
+
+    def _manifest_path(self, sha256):
+        return os.path.join(self.store, sha256 + ".manifest.json")
+
+    def _manifest(self, sha256):
+        try:
+            with open(self._manifest_path(sha256)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def current(self, name):
+        """
+        sha256 of the universe the name points to, if any
+        """
+        link = os.path.join(self.directory, name)
+        if not os.path.islink(link):
+            return None
+        return os.path.basename(os.readlink(link))
+
+    def entry(self, sha256):
+        return os.path.join(self.store, sha256)
+
+    def install(self, name, archive, sha256):
+        """
+        Makes `<worlds>/<name>` contain the universe in archive, whose content
+        hash is sha256. Returns a report of what had to be extracted.
+        """
+        start = time.perf_counter()
+        with self.lock:
+            os.makedirs(self.store, exist_ok=True)
+            previous = self.current(name)
+            report = {"name": name, "sha256": sha256, "cached": True}
+            if self._manifest(sha256) is None:
+                report.update(self._extract(archive, sha256, previous))
+                report["cached"] = False
+            # Last use, read by the storage manager to evict unused universes
+            os.utime(self._manifest_path(sha256))
+            self._point(name, sha256)
+            report["seconds"] = round(time.perf_counter() - start, 4)
+            self.last_report = report
+            return report
+
+    def _extract(self, archive, sha256, previous):
+        target = os.path.join(self.store, sha256)
+        staging = f"{target}.tmp-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        with zipfile.ZipFile(archive) as zip_ref:
+            entries = [info for info in zip_ref.infolist() if not info.is_dir()]
+            directories = [info.filename for info in zip_ref.infolist() if info.is_dir()]
+        manifest = {info.filename: [info.CRC, info.file_size] for info in entries}
+        previous_manifest = self._manifest(previous) if previous else None
+        previous_folder = os.path.join(self.store, previous) if previous else None
+
+        reused = []
+        changed = []
+        for info in entries:
+            if (
+                previous_manifest is not None
+                and previous_manifest.get(info.filename) == manifest[info.filename]
+                and _safe_name(info.filename)
+            ):
+                reused.append(info.filename)
+            else:
+                changed.append(info)
+
+        try:
+            report_progress(f"Extracting {len(changed)} of {len(entries)} universe files")
+            for name in directories:
+                if _safe_name(name):
+                    os.makedirs(os.path.join(staging, name), exist_ok=True)
+            for name in reused:
+                _link_or_copy(os.path.join(previous_folder, name), os.path.join(staging, name))
+            self._extract_parallel(archive, changed, staging)
+            os.replace(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        # Written last: a store entry without manifest is incomplete
+        with open(self._manifest_path(sha256) + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(self._manifest_path(sha256) + ".tmp", self._manifest_path(sha256))
+        return {
+            "files": len(entries),
+            "files_extracted": len(changed),
+            "files_reused": len(reused),
+            "bytes_extracted": sum(info.file_size for info in changed),
+        }
+
+    def _extract_parallel(self, archive, entries, destination):
+        size = sum(info.file_size for info in entries)
+        workers = min(self.workers, len(entries))
+        if workers <= 1 or size < parallel_threshold:
+            _extract_entries(archive, [info.filename for info in entries], destination)
+            return
+        # Largest entries first, each to the least loaded worker
+        shares = [[0, []] for _ in range(workers)]
+        for info in sorted(entries, key=lambda info: info.file_size, reverse=True):
+            share = min(shares, key=lambda share: share[0])
+            share[0] += info.file_size
+            share[1].append(info.filename)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="unzip") as pool:
+            futures = [
+                pool.submit(
+                    contextvars.copy_context().run, _extract_entries, archive, names, destination
+                )
+                for _, names in shares
+            ]
+            for future in futures:
+                future.result()
+
+    def _point(self, name, sha256):
+        link = os.path.join(self.directory, name)
+        if os.path.isdir(link) and not os.path.islink(link):
+            # Extracted in place by a previous version of RAM
+            shutil.rmtree(link)
+        temporary = f"{link}.link-{os.getpid()}"
+        if os.path.lexists(temporary):
+            os.remove(temporary)
+        os.symlink(os.path.join(".store", sha256), temporary)
+        os.replace(temporary, link)
@@ -0,0 +1,48 @@
+import ast
+import os
+
+from src.manager.manager.lint.fast_check import find_main_loop
+
+# Files copied next to the application, among them the rate control module
+workspace_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "workspace")
+
+default_frequency = 50
+rate_policies = ("skip", "catch_up")
+
+
+def add_frequency_control(code, frequency=default_frequency, policy="skip", telemetry=None):
+    """
+    Makes each iteration of the main loop wait for its deadline at the given
+    frequency (Hz). Only the loop condition is rewritten, on its own line, so line
+    numbers in tracebacks still match the user code. The main loop is the one the
+    linter requires (see fast_check.find_main_loop); code without it is returned
+    unchanged. If telemetry is given, the loop publishes its statistics
+    in that shared memory file.
+    """
+    if frequency <= 0:
+        raise ValueError(f"Invalid frequency {frequency}, it must be positive")
+    if policy not in rate_policies:
+        raise ValueError(f"Invalid rate policy {policy}, expected one of {rate_policies}")
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return code
+    loop = find_main_loop(tree)
+    if loop is None:
+        return code
+
+    test = loop.test
+    lines = code.splitlines(keepends=True)
+    line = lines[test.lineno - 1]
+    # AST offsets count UTF-8 bytes
+    encoded = line.encode()
+    arguments = f"{float(frequency)!r}, {policy!r}"
+    if telemetry is not None:
+        arguments += f", {telemetry!r}"
+    tick = f'__import__("ram_rate_control").tick({arguments})'
+    lines[test.lineno - 1] = (
+        encoded[: test.col_offset].decode()
+        + tick
+        + encoded[test.end_col_offset :].decode()
+    )
+    return "".join(lines)
@@ -0,0 +1,158 @@
+import glob
+import os
+import threading
+
+from src.manager.manager.application.workspace.ram_rate_control import (
+    TelemetryBlock,
+    bucket_limit_us,
+)
+from src.manager.ram_logging.log_manager import LogManager
+
+
+def percentile(histogram, fraction):
+    """
+    Upper bound, in milliseconds, of the histogram bucket holding the given fraction
+    """
+    total = sum(histogram)
+    if total == 0:
+        return None
+    target = fraction * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= target:
+            break
+    return bucket_limit_us(index) / 1000
+
+
+class LoopTelemetry(threading.Thread):
+    """
+    Reads the statistics the application main loop publishes in shared memory
+    (see workspace/ram_rate_control.py) and forwards them to the client.
+
+    The block is polled every `interval` seconds; an update is only sent when the
+    loop made progress since the previous one, so a paused or finished
+    application sends nothing.
+    """
+
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else "/tmp"
+
+    def __init__(self, interval=1.0):
+        super().__init__(daemon=True, name="LoopTelemetry")
+        self.interval = interval
+        self.sink = None
+        self.latest = None
+        self.path = None
+        self.runs = 0
+        self._block = None
+        self._previous = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def set_sink(self, sink):
+        with self._lock:
+            self.sink = sink
+
+    def reset(self):
+        """
+        Creates the block of a new application run and returns its path.
+        Every run gets its own file, so a previous application still mapping
+        the old one cannot corrupt it.
+        """
+        with self._lock:
+            self._release()
+            self.runs += 1
+            self.path = os.path.join(
+                self.directory, f"ram_loop_telemetry_{os.getpid()}_{self.runs}"
+            )
+            TelemetryBlock.create(self.path)
+            self._previous = None
+            self.latest = None
+            return self.path
+
+    def clear(self):
+        """
+        Forgets the block of the previous run, for runs without a rate
+        controlled main loop and once the application is terminated
+        """
+        with self._lock:
+            self._release()
+            self._previous = None
+            self.latest = None
+
+    def _release(self):
+        if self._block is not None:
+            self._block.close()
+            self._block = None
+        if self.path is not None:
+            # The block and the profiles of the run (see profiler.py)
+            for path in glob.glob(glob.escape(self.path) + "*"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.path = None
+
+    def sample(self):
+        with self._lock:
+            if self.path is None:
+                return None
+            if self._block is None:
+                try:
+                    self._block = TelemetryBlock(self.path, writable=False)
+                except (OSError, ValueError):
+                    return None
+            read = self._block.read()
+            if read is None:
+                return None
+            header, periods, jitters = read
+            (_, pid, iterations, overruns, skipped, sleep_ns, work_ns, published_ns,
+             period_ns, frequency) = header
+            if iterations == 0 or (
+                self._previous is not None and self._previous[0] == iterations
+            ):
+                return None
+
+            achieved = None
+            if self._previous is not None and published_ns > self._previous[1]:
+                achieved = (iterations - self._previous[0]) * 1e9 / (
+                    published_ns - self._previous[1]
+                )
+            self._previous = (iterations, published_ns)
+            busy = sleep_ns + work_ns
+            self.latest = {
+                "pid": pid,
+                "target_hz": frequency,
+                "achieved_hz": None if achieved is None else round(achieved, 2),
+                "iterations": iterations,
+                "overruns": overruns,
+                "skipped": skipped,
+                "sleep_ratio": round(sleep_ns / busy, 3) if busy else None,
+                "period_ms": {
+                    "target": period_ns / 1e6,
+                    "p50": percentile(periods, 0.5),
+                    "p99": percentile(periods, 0.99),
+                },
+                "jitter_ms": {
+                    "p50": percentile(jitters, 0.5),
+                    "p99": percentile(jitters, 0.99),
+                },
+                "period_histogram": list(periods),
+            }
+            return self.latest
+
+    def run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                stats = self.sample()
+            except Exception:
+                LogManager.logger.exception("Exception reading loop telemetry")
+                continue
+            sink = self.sink
+            if stats is not None and sink is not None:
+                sink(stats)
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            self._release()
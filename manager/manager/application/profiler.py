@@ -0,0 +1,102 @@
+import json
+import os
+import signal
+import threading
+import time
+
+from src.manager.ram_logging.log_manager import LogManager
+
+
+class ProfilerError(Exception):
+    pass
+
+
+class ApplicationProfiler:
+    """
+    Starts the sampling profiler embedded in the running application (see
+    workspace/ram_profiler.py) and collects its report.
+
+    The application keeps running while it is profiled. Results are delivered to
+    a callback once the profile is over, so the caller does not block.
+    """
+
+    max_duration = 60
+    # Seconds to wait for the report after the profile should have finished
+    grace = 5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = None
+
+    def start(self, pid, telemetry_path, duration, interval, on_report):
+        """
+        Profiles the application with the given pid for duration seconds and
+        returns the paths of the report and collapsed stack files
+        """
+        if not 0 < duration <= self.max_duration:
+            raise ProfilerError(
+                f"Profile duration must be between 0 and {self.max_duration} seconds"
+            )
+        if not 0.001 <= interval <= 1:
+            raise ProfilerError("Sampling interval must be between 0.001 and 1 seconds")
+        with self._lock:
+            if self._running is not None and self._running.is_alive():
+                raise ProfilerError("A profile is already running")
+
+            control_path = telemetry_path + ".profile"
+            if not self.installed(control_path, pid):
+                # Without the handler, SIGUSR2 would terminate the application
+                raise ProfilerError(
+                    "The application cannot be profiled: it needs a main loop in its "
+                    "main thread, and SIGUSR2 and SIGALRM free for RAM"
+                )
+            output = control_path + ".json"
+            for path in (output, output + ".collapsed"):
+                if os.path.exists(path):
+                    os.remove(path)
+            with open(control_path, "w") as f:
+                json.dump({"duration": duration, "interval": interval, "output": output}, f)
+            try:
+                os.kill(pid, signal.SIGUSR2)
+            except ProcessLookupError:
+                raise ProfilerError("The application is not running")
+
+            self._running = threading.Thread(
+                target=self._wait_report,
+                args=(output, time.monotonic() + duration + self.grace, on_report),
+                daemon=True,
+                name="Profiler",
+            )
+            self._running.start()
+        return {"report": output, "collapsed": output + ".collapsed"}
+
+    @staticmethod
+    def installed(control_path, pid):
+        """
+        Whether the application with the given pid set up the SIGUSR2 handler
+        (see ram_profiler.install)
+        """
+        try:
+            with open(control_path + ".ready") as f:
+                return int(f.read()) == pid
+        except (OSError, ValueError):
+            return False
+
+    def _wait_report(self, output, deadline, on_report):
+        while time.monotonic() < deadline:
+            if os.path.exists(output):
+                try:
+                    with open(output) as f:
+                        report = json.load(f)
+                except (OSError, ValueError) as e:
+                    report = {"error": f"Could not read the profile report: {e}"}
+                on_report(report)
+                return
+            time.sleep(0.1)
+        LogManager.logger.warning("The application did not produce a profile report")
+        on_report(
+            {
+                "error": "The application did not produce a profile report. "
+                "Profiling requires a main loop and a SIGUSR2 handler free for RAM."
+            }
+        )
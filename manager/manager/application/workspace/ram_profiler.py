@@ -0,0 +1,187 @@
+"""
+On demand sampling profiler for robotics applications.
+
+ram_rate_control installs it when the main loop starts. RAM starts a profile
+by writing a request next to the telemetry block (`<telemetry>.profile`, a JSON
+document with the duration and the sampling interval) and sending SIGUSR2 to the
+application. An interval timer then samples the stack of the main thread at the
+given interval, without stopping the application, and when the duration is over
+writes a JSON report and a collapsed stack file (flamegraph.pl / speedscope
+format) next to the request.
+
+This module is copied next to the application and must only depend on the
+standard library.
+"""
+
+import collections
+import json
+import linecache
+import os
+import signal
+import sys
+import threading
+import time
+
+rate_control_file = "ram_rate_control.py"
+hot_lines_reported = 10
+# Signal delivery itself takes up to a few hundred microseconds, only longer
+# delays are counted as the main thread being blocked
+late_threshold = 0.001
+
+
+class Sampler:
+    """
+    Samples the main thread from a SIGALRM interval timer. The handler runs in
+    the main thread as soon as the interpreter can, so it sees the exact line
+    being executed, including in code that never releases the GIL. The delay
+    between the timer expiring and the handler running is time the main thread
+    could not run Python code: waiting for the GIL, or inside a long C call.
+    """
+
+    def __init__(self, request, output):
+        self.duration = float(request.get("duration", 5))
+        self.interval = float(request.get("interval", 0.005))
+        self.output = output
+        self.main_file = os.path.abspath(sys.argv[0])
+        self.code_folder = os.path.dirname(self.main_file)
+        self.samples = 0
+        self.categories = collections.Counter()
+        self.lines = collections.Counter()
+        self.stacks = collections.Counter()
+        self.late_seconds = 0.0
+        self.running = False
+        self._previous_handler = None
+        self._start = None
+        self._expected = None
+
+    def start(self):
+        self._previous_handler = signal.signal(signal.SIGALRM, self.on_timer)
+        self._start = time.perf_counter()
+        self._expected = self._start + self.interval
+        self.running = True
+        signal.setitimer(signal.ITIMER_REAL, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, self._previous_handler)
+        self.running = False
+        self.write(time.perf_counter() - self._start)
+
+    def on_timer(self, signum, frame):
+        now = time.perf_counter()
+        late = now - self._expected
+        if late > late_threshold:
+            self.late_seconds += late
+        while self._expected <= now:
+            self._expected += self.interval
+        if now - self._start >= self.duration:
+            self.stop()
+            return
+        self.sample(frame)
+
+    def category(self, frames):
+        innermost = os.path.basename(frames[-1].f_code.co_filename)
+        if innermost == rate_control_file:
+            return "sleep"
+        for frame in frames:
+            filename = os.path.abspath(frame.f_code.co_filename)
+            if (
+                filename != self.main_file
+                and os.path.dirname(filename) == self.code_folder
+            ):
+                return "hal_gui"
+        if os.path.abspath(frames[-1].f_code.co_filename) == self.main_file:
+            return "user"
+        return "libraries"
+
+    def sample(self, frame):
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        if not frames:
+            return
+        self.samples += 1
+        self.categories[self.category(frames)] += 1
+        for frame in reversed(frames):
+            if os.path.abspath(frame.f_code.co_filename) == self.main_file:
+                self.lines[frame.f_lineno] += 1
+                break
+        self.stacks[
+            ";".join(
+                f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})"
+                for frame in frames
+            )
+        ] += 1
+
+    def report(self, elapsed):
+        samples = self.samples or 1
+        return {
+            "pid": os.getpid(),
+            "file": self.main_file,
+            "duration": round(elapsed, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "breakdown": {
+                category: round(self.categories[category] / samples, 3)
+                for category in ("user", "hal_gui", "libraries", "sleep")
+            },
+            "hot_lines": [
+                {
+                    "line": line,
+                    "samples": count,
+                    "ratio": round(count / samples, 3),
+                    "code": linecache.getline(self.main_file, line).strip(),
+                }
+                for line, count in self.lines.most_common(hot_lines_reported)
+            ],
+            "gil_wait_ms": round(self.late_seconds * 1000, 3),
+            "gil_wait_ratio": round(self.late_seconds / elapsed, 4) if elapsed else 0.0,
+            "collapsed": self.output + ".collapsed",
+        }
+
+    def write(self, elapsed):
+        with open(self.output + ".collapsed", "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        # Written aside and renamed, RAM waits for the report to appear
+        with open(self.output + ".tmp", "w") as f:
+            json.dump(self.report(elapsed), f)
+        os.replace(self.output + ".tmp", self.output)
+
+
+def install(control_path):
+    """
+    Makes SIGUSR2 start the profile requested in control_path. Must be called
+    from the main thread; does nothing if the application handles SIGUSR2 or
+    SIGALRM itself. Once the handler is set, the pid of the application is
+    written to `<control_path>.ready`: RAM only sends SIGUSR2 when it is there,
+    otherwise the signal would kill the application.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    for signum in (signal.SIGUSR2, signal.SIGALRM):
+        if signal.getsignal(signum) not in (signal.SIG_DFL, None):
+            return False
+    running = []
+
+    def start(signum, frame):
+        if running and running[0].running:
+            return
+        if signal.getsignal(signal.SIGALRM) not in (signal.SIG_DFL, None):
+            return
+        try:
+            with open(control_path) as f:
+                request = json.load(f)
+        except (OSError, ValueError):
+            return
+        sampler = Sampler(request, request["output"])
+        running[:] = [sampler]
+        sampler.start()
+
+    signal.signal(signal.SIGUSR2, start)
+    with open(control_path + ".ready.tmp", "w") as f:
+        f.write(str(os.getpid()))
+    os.replace(control_path + ".ready.tmp", control_path + ".ready")
+    return True
@@ -0,0 +1,226 @@
+"""
+Rate control for the main loop of robotics applications.
+
+RAM rewrites the header of the application main loop, `while True:`, into
+`while __import__("ram_rate_control").tick(<frequency>, "<policy>", <telemetry>):`,
+so every iteration waits for its deadline. This module is copied next to the
+application and must only depend on the standard library.
+
+Loop statistics are published to RAM through a small shared memory block (a
+file in /dev/shm) protected by a sequence lock: the writer makes the sequence
+odd while it updates the block and even when it is done, readers retry until
+they copy the block with the same even sequence before and after.
+"""
+
+import mmap
+import os
+import struct
+import time
+
+policies = ("skip", "catch_up")
+
+# Log-linear histogram of durations in microseconds: exact below 4 us, then
+# every power of two is split in 4 buckets (at most 25% wide), up to ~16 s
+histogram_buckets = 96
+telemetry_header = struct.Struct("<QQQQQQQQQd")
+telemetry_histogram = struct.Struct(f"<{histogram_buckets}Q")
+telemetry_size = telemetry_header.size + 2 * telemetry_histogram.size
+# Nanoseconds between two publications of the loop statistics
+publish_interval_ns = 50_000_000
+
+
+def bucket(duration_ns):
+    us = duration_ns // 1000
+    if us < 4:
+        return us
+    exponent = us.bit_length() - 1
+    index = (exponent - 1) * 4 + ((us >> (exponent - 2)) & 3)
+    return min(index, histogram_buckets - 1)
+
+
+def bucket_limit_us(index):
+    """
+    Upper limit (exclusive) of the durations counted by a bucket
+    """
+    if index < 4:
+        return index + 1
+    exponent = index // 4 + 1
+    return (5 + index % 4) << (exponent - 2)
+
+
+class TelemetryBlock:
+    """
+    Shared memory block with the loop statistics. Layout:
+    sequence, pid, iterations, overruns, skipped, sleep_ns, work_ns, published_ns,
+    period_ns, target frequency, then the histograms of the iteration period and
+    of the jitter (distance between the period and the target period).
+    """
+
+    def __init__(self, path, writable=True):
+        self.file = open(path, "r+b" if writable else "rb")
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        self.map = mmap.mmap(self.file.fileno(), telemetry_size, access=access)
+
+    @staticmethod
+    def create(path):
+        """
+        Creates (or clears) the block, before the application starts
+        """
+        with open(path, "wb") as f:
+            f.write(bytes(telemetry_size))
+
+    def write(self, fields, periods, jitters):
+        sequence = struct.unpack_from("<Q", self.map, 0)[0] + 1
+        struct.pack_into("<Q", self.map, 0, sequence)
+        telemetry_header.pack_into(self.map, 0, sequence, *fields)
+        telemetry_histogram.pack_into(self.map, telemetry_header.size, *periods)
+        telemetry_histogram.pack_into(
+            self.map, telemetry_header.size + telemetry_histogram.size, *jitters
+        )
+        struct.pack_into("<Q", self.map, 0, sequence + 1)
+
+    def read(self, retries=100):
+        """
+        Returns (header fields, periods, jitters), or None if the writer kept
+        updating the block
+        """
+        for _ in range(retries):
+            sequence = struct.unpack_from("<Q", self.map, 0)[0]
+            if sequence % 2:
+                continue
+            data = self.map[:telemetry_size]
+            if struct.unpack_from("<Q", self.map, 0)[0] != sequence:
+                continue
+            header = telemetry_header.unpack_from(data, 0)
+            periods = telemetry_histogram.unpack_from(data, telemetry_header.size)
+            jitters = telemetry_histogram.unpack_from(
+                data, telemetry_header.size + telemetry_histogram.size
+            )
+            return header, periods, jitters
+        return None
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+class RateController:
+    """
+    Deadline scheduler based on time.perf_counter_ns.
+
+    Deadlines are spaced exactly one period apart, so sleep inaccuracies do not
+    accumulate into drift. When an iteration overruns its deadline, the "skip"
+    policy drops the missed cycles and keeps the original phase, while "catch_up"
+    runs the missed cycles back to back (at most max_burst of them) to keep the
+    average frequency.
+    """
+
+    def __init__(self, frequency, policy="skip", max_burst=10, telemetry=None):
+        if frequency <= 0:
+            raise ValueError(f"Invalid frequency {frequency}")
+        if policy not in policies:
+            raise ValueError(f"Invalid policy {policy}, expected one of {policies}")
+        self.frequency = frequency
+        self.period_ns = int(1e9 / frequency)
+        self.policy = policy
+        self.max_burst = max_burst
+        self.deadline = None
+        self.iterations = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.sleep_ns = 0
+        self.work_ns = 0
+        # Time spent in the loop body by the last iteration
+        self.last_work_ns = 0
+        self.periods = [0] * histogram_buckets
+        self.jitters = [0] * histogram_buckets
+        # When the last iteration started
+        self._last_tick = None
+        self._published = 0
+        self.telemetry = None
+        if telemetry is not None:
+            try:
+                self.telemetry = TelemetryBlock(telemetry)
+            except (OSError, ValueError):
+                pass
+            try:
+                import ram_profiler
+
+                ram_profiler.install(telemetry + ".profile")
+            except Exception:
+                pass
+
+    def tick(self):
+        now = time.perf_counter_ns()
+        if self._last_tick is not None:
+            self.last_work_ns = now - self._last_tick
+            self.work_ns += self.last_work_ns
+        self.iterations += 1
+
+        if self.deadline is None:
+            self.deadline = now + self.period_ns
+            self._last_tick = now
+            return True
+
+        if now < self.deadline:
+            time.sleep((self.deadline - now) / 1e9)
+            self.deadline += self.period_ns
+        else:
+            self.overruns += 1
+            missed = (now - self.deadline) // self.period_ns + 1
+            if self.policy == "catch_up" and missed <= self.max_burst:
+                self.deadline += self.period_ns
+            else:
+                self.skipped += missed - 1
+                self.deadline += missed * self.period_ns
+
+        start = time.perf_counter_ns()
+        self.sleep_ns += start - now
+        period = start - self._last_tick
+        self.periods[bucket(period)] += 1
+        self.jitters[bucket(abs(period - self.period_ns))] += 1
+        self._last_tick = start
+        if self.telemetry is not None and start - self._published >= publish_interval_ns:
+            self.publish(start)
+        return True
+
+    def publish(self, now):
+        self._published = now
+        self.telemetry.write(
+            (
+                os.getpid(),
+                self.iterations,
+                self.overruns,
+                self.skipped,
+                self.sleep_ns,
+                self.work_ns,
+                now,
+                self.period_ns,
+                float(self.frequency),
+            ),
+            self.periods,
+            self.jitters,
+        )
+
+    def stats(self):
+        return {
+            "frequency": self.frequency,
+            "policy": self.policy,
+            "iterations": self.iterations,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "last_work_ms": self.last_work_ns / 1e6,
+        }
+
+
+RATE = None
+
+
+def tick(frequency, policy="skip", telemetry=None):
+    """
+    Waits until the next iteration of the main loop is due. Always returns True.
+    """
+    global RATE
+    if RATE is None:
+        RATE = RateController(frequency, policy, telemetry=telemetry)
+    return RATE.tick()
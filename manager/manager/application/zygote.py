@@ -0,0 +1,307 @@
+import ast
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+
+from src.manager.ram_logging.log_manager import LogManager
+
+zygote_script = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "zygote_server.py"
+)
+
+
+def template_imports(folder):
+    """
+    Modules imported by the python files of an exercise template, except the
+    template's own modules. They are imported, never the template modules
+    themselves: HAL and GUI create ROS nodes and threads when imported, which
+    would not survive a fork.
+    """
+    if not os.path.isdir(folder):
+        return []
+    local = {name[:-3] for name in os.listdir(folder) if name.endswith(".py")}
+    local.update(
+        name for name in os.listdir(folder) if os.path.isdir(os.path.join(folder, name))
+    )
+    modules = []
+    for name in sorted(os.listdir(folder)):
+        if not name.endswith(".py"):
+            continue
+        try:
+            with open(os.path.join(folder, name)) as f:
+                tree = ast.parse(f.read())
+        except (OSError, SyntaxError, ValueError):
+            continue
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+            else:
+                continue
+            for module in names:
+                if module.split(".")[0] not in local and module not in modules:
+                    modules.append(module)
+    return modules
+
+
+class ZygoteProcess:
+    """
+    Handle of an application forked by a zygote. Like a Popen, it can be given to
+    stop_process_and_children, suspended and resumed (see running_process).
+
+    The zygote, not RAM, reaps the application as soon as it exits, so its pid
+    may be reused by an unrelated process. The handle keeps the psutil process
+    taken right after the fork, which identifies it by pid and creation time.
+    The zygote reports the exit status, kept in returncode.
+    """
+
+    def __init__(self, pid, zygote):
+        self.pid = pid
+        self.zygote = zygote
+        try:
+            self.psutil_process = psutil.Process(pid)
+        except psutil.NoSuchProcess:
+            # Exited before RAM got the reply
+            self.psutil_process = None
+
+    @property
+    def returncode(self):
+        return self.zygote.returncode(self.pid)
+
+    def poll(self):
+        """
+        Like Popen.poll, the exit status once the zygote reported it, None
+        before. A crash is reported as a non zero status, a signal as its
+        negated number.
+        """
+        return self.returncode
+
+
+class Zygote:
+    """
+    Handle of a zygote_server.py process
+    """
+
+    def __init__(self, modules):
+        reply_read, reply_write = os.pipe()
+        self.started_at = time.perf_counter()
+        self.process = subprocess.Popen(
+            ["python3", zygote_script, str(reply_write)] + list(modules),
+            stdin=subprocess.PIPE,
+            stdout=sys.stdout,
+            stderr=subprocess.STDOUT,
+            pass_fds=(reply_write,),
+            text=True,
+            bufsize=1,
+        )
+        os.close(reply_write)
+        self.replies = os.fdopen(reply_read, "r")
+        self.requests = 0
+        self.info = {}
+        # Seconds from spawning the interpreter to being able to fork
+        self.cold_start_seconds = None
+        self.started = threading.Event()
+        self._lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._replies = {}
+        self._returncodes = {}
+        self._cancelled = set()
+        self._closed = False
+        threading.Thread(target=self._read_replies, daemon=True, name="Zygote").start()
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    @property
+    def ready(self):
+        return (
+            self.started.is_set()
+            and self.info.get("ready", False)
+            and self.process.poll() is None
+        )
+
+    def _read_replies(self):
+        try:
+            line = self.replies.readline()
+            if line:
+                self.info = json.loads(line)
+                self.cold_start_seconds = time.perf_counter() - self.started_at
+                if not self.info.get("ready"):
+                    LogManager.logger.warning(
+                        f"Zygote {self.pid} cannot fork, preloading started "
+                        f"{self.info.get('threads')} threads"
+                    )
+            self.started.set()
+            for line in self.replies:
+                reply = json.loads(line)
+                with self._condition:
+                    if "exited" in reply:
+                        self._returncodes[reply["exited"]] = reply["returncode"]
+                    elif reply["id"] in self._cancelled:
+                        # Forked after fork() gave up, in case the zygote dies before the cancel
+                        self._kill_group(reply.get("pid"))
+                    else:
+                        self._replies[reply["id"]] = reply
+                    self._condition.notify_all()
+        except (OSError, ValueError):
+            # Replies closed by stop()
+            pass
+        finally:
+            self.started.set()
+            with self._condition:
+                self._closed = True
+                self._condition.notify_all()
+
+    @staticmethod
+    def _kill_group(pid):
+        if pid is None:
+            return
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    def returncode(self, pid):
+        with self._condition:
+            return self._returncodes.get(pid)
+
+    def fork(self, path, timeout=5):
+        with self._lock:
+            self.requests += 1
+            request_id = self.requests
+            self.process.stdin.write(json.dumps({"id": request_id, "path": path}) + "\n")
+            self.process.stdin.flush()
+
+            deadline = time.monotonic() + timeout
+            with self._condition:
+                while request_id not in self._replies:
+                    remaining = deadline - time.monotonic()
+                    if self._closed:
+                        raise RuntimeError(f"Zygote {self.pid} exited")
+                    if remaining <= 0:
+                        # The zygote kills the application if it forks it later
+                        self._cancelled.add(request_id)
+                        self.process.stdin.write(json.dumps({"cancel": request_id}) + "\n")
+                        self.process.stdin.flush()
+                        raise TimeoutError(f"Zygote {self.pid} did not fork within {timeout} seconds")
+                    self._condition.wait(remaining)
+                reply = self._replies.pop(request_id)
+            if "error" in reply:
+                raise RuntimeError(reply["error"])
+            return ZygoteProcess(reply["pid"], self)
+
+    def stop(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=1)
+        except Exception:
+            self.process.kill()
+            self.process.wait()
+        self.replies.close()
+
+
+class ZygotePool:
+    """
+    Warm zygotes, one per exercise template, that fork applications with the
+    heavy modules already imported.
+
+    The first run of a template starts its zygote and spawns the application
+    cold; once the zygote is ready, the following runs are forked from it.
+    """
+
+    def __init__(self):
+        self.zygotes = {}
+        self.forks = 0
+        self.cold_spawns = 0
+        self.saved_seconds = 0.0
+        self.last_fork_seconds = None
+        self._lock = threading.Lock()
+
+    def spawn(self, key, path, modules):
+        """
+        Starts the application at path, forked from the zygote of key when it is ready
+        """
+        zygote = self._zygote(key, modules)
+        if zygote.ready:
+            start = time.perf_counter()
+            try:
+                process = zygote.fork(path)
+                fork_seconds = time.perf_counter() - start
+                with self._lock:
+                    self.forks += 1
+                    self.last_fork_seconds = fork_seconds
+                    self.saved_seconds += max(zygote.cold_start_seconds - fork_seconds, 0)
+                LogManager.logger.info(
+                    f"Forked application {process.pid} from zygote in {fork_seconds * 1000:.1f} ms "
+                    f"(cold start {zygote.cold_start_seconds * 1000:.0f} ms)"
+                )
+                return process
+            except Exception as e:
+                LogManager.logger.warning(f"Zygote fork failed, spawning cold: {e}")
+                self.discard(key)
+
+        with self._lock:
+            self.cold_spawns += 1
+        return subprocess.Popen(
+            ["python3", path],
+            stdout=sys.stdout,
+            stderr=subprocess.STDOUT,
+            bufsize=1024,
+            universal_newlines=True,
+        )
+
+    def _zygote(self, key, modules):
+        with self._lock:
+            zygote = self.zygotes.get(key)
+            if zygote is not None and zygote.process.poll() is not None:
+                zygote = None
+            if zygote is None:
+                zygote = Zygote(modules)
+                self.zygotes[key] = zygote
+            return zygote
+
+    def discard(self, key):
+        with self._lock:
+            zygote = self.zygotes.pop(key, None)
+        if zygote is not None:
+            zygote.stop()
+
+    def pids(self):
+        with self._lock:
+            return {zygote.pid for zygote in self.zygotes.values()}
+
+    def shutdown(self):
+        with self._lock:
+            zygotes = list(self.zygotes.values())
+            self.zygotes.clear()
+        for zygote in zygotes:
+            zygote.stop()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "forks": self.forks,
+                "cold_spawns": self.cold_spawns,
+                "last_fork_ms": None
+                if self.last_fork_seconds is None
+                else round(self.last_fork_seconds * 1000, 3),
+                "saved_seconds": round(self.saved_seconds, 3),
+                "zygotes": {
+                    key: {
+                        "ready": zygote.ready,
+                        "cold_start_ms": None
+                        if zygote.cold_start_seconds is None
+                        else round(zygote.cold_start_seconds * 1000, 1),
+                        "modules": zygote.info.get("modules", []),
+                    }
+                    for key, zygote in self.zygotes.items()
+                },
+            }
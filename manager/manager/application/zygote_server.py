@@ -0,0 +1,192 @@
+"""
+Zygote for robotics applications.
+
+Imports the heavy modules used by exercises once, then forks a child per
+application run, so the child starts with those modules already loaded. It is
+driven by RAM (see zygote.py): requests arrive on stdin and replies are written
+to the file descriptor given as first argument, one JSON document per line.
+
+    python3 zygote_server.py <reply fd> <module> [<module> ...]
+
+    {"id": 1, "path": "/workspace/code/academy.py"}
+    {"id": 1, "pid": 1234}
+
+The zygote reaps its children and reports how they exited, with the exit code
+of Popen.returncode (negative for a signal):
+
+    {"exited": 1234, "returncode": -9}
+
+RAM cancels a request it stopped waiting for. The application forked for it,
+if any, is killed with its process group:
+
+    {"cancel": 1}
+
+This file must not import anything from RAM: it runs in its own interpreter.
+"""
+
+import importlib
+import json
+import os
+import runpy
+import select
+import signal
+import sys
+import threading
+import time
+
+
+def preload(modules):
+    loaded = []
+    for module in modules:
+        try:
+            importlib.import_module(module)
+            loaded.append(module)
+        except Exception:
+            pass
+    return loaded
+
+
+# (pid, returncode) of the children reaped and not reported yet
+exited = []
+
+
+def reap_children(signum, frame):
+    while True:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        exited.append((pid, os.waitstatus_to_exitcode(status)))
+
+
+def run_child(path, reply_fd, wake_fds):
+    """
+    Runs in the forked child, never returns
+    """
+    exit_code = 0
+    try:
+        os.close(reply_fd)
+        for fd in wake_fds:
+            os.close(fd)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        # Own process group, so a cancelled application is killed with its children
+        os.setpgid(0, 0)
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        # Same environment python3 <path> would give the application
+        sys.argv = [path]
+        sys.path[0] = os.path.dirname(os.path.abspath(path))
+        runpy.run_path(path, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(exit_code)
+
+
+def main():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    reply_fd = int(sys.argv[1])
+    reply = os.fdopen(reply_fd, "w", buffering=1)
+
+    start = time.perf_counter()
+    loaded = preload(sys.argv[2:])
+    preload_seconds = time.perf_counter() - start
+
+    # Forking only copies the calling thread, a module that started threads
+    # would be broken in the children
+    threads = threading.active_count()
+    reply.write(
+        json.dumps(
+            {
+                "ready": threads == 1,
+                "modules": loaded,
+                "preload_seconds": preload_seconds,
+                "threads": threads,
+            }
+        )
+        + "\n"
+    )
+    if threads != 1:
+        return
+
+    # SIGCHLD wakes up the loop below, which reports the children reaped
+    wake_read, wake_write = os.pipe()
+    os.set_blocking(wake_read, False)
+    os.set_blocking(wake_write, False)
+    signal.set_wakeup_fd(wake_write)
+    signal.signal(signal.SIGCHLD, reap_children)
+
+    forked = {}
+    pending = b""
+    while True:
+        while exited:
+            pid, returncode = exited.pop(0)
+            forked = {key: child for key, child in forked.items() if child != pid}
+            reply.write(json.dumps({"exited": pid, "returncode": returncode}) + "\n")
+        ready, _, _ = select.select([0, wake_read], [], [])
+        if wake_read in ready:
+            try:
+                os.read(wake_read, 512)
+            except BlockingIOError:
+                pass
+        if 0 not in ready:
+            continue
+        data = os.read(0, 65536)
+        if not data:
+            # RAM stops the zygote by closing its stdin
+            return
+        pending += data
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            if "cancel" in request:
+                pid = forked.pop(request["cancel"], None)
+                if pid is not None:
+                    try:
+                        os.killpg(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                continue
+            sys.stdout.flush()
+            sys.stderr.flush()
+            try:
+                pid = os.fork()
+            except OSError as e:
+                reply.write(json.dumps({"id": request["id"], "error": str(e)}) + "\n")
+                continue
+            if pid == 0:
+                run_child(request["path"], reply_fd, (wake_read, wake_write))
+            try:
+                # Also set in the child, the group must exist before a cancel kills it
+                os.setpgid(pid, pid)
+            except OSError:
+                pass
+            forked[request["id"]] = pid
+            reply.write(json.dumps({"id": request["id"], "pid": pid}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
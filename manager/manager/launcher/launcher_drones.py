@@ -38,7 +38,7 @@ class LauncherDrones(ILauncher):
 
     def terminate(self):
         try:
-            for thread in self.threads:
+            for thread in list(self.threads):
                 if thread.is_alive():
                     thread.terminate()
                     thread.join()
@@ -43,7 +43,7 @@ class LauncherDronesRos2(ILauncher):
 
     def terminate(self):
         if self.is_running():
-            for thread in self.threads:
+            for thread in list(self.threads):
                 if thread.is_alive():
                     thread.terminate()
                     thread.join()
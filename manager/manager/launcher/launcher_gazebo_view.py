@@ -7,8 +7,6 @@ from src.manager.libs.process_utils import (
 )
 import subprocess
 import time
-import os
-import stat
 from typing import List, Any
 
 
@@ -23,8 +21,8 @@ class LauncherGazeboView(ILauncher):
     gz_vnc: Any = Vnc_server()
 
     def run(self, callback):
-        DRI_PATH = self.get_dri_path()
-        ACCELERATION_ENABLED = self.check_device(DRI_PATH)
+        DRI_PATH = self.environment.detected_dri_path
+        ACCELERATION_ENABLED = self.environment.is_char_device(DRI_PATH)
 
         # Configure browser screen width and height for gzclient
         gzclient_config_cmds = f"echo [geometry] > ~/.gazebo/gui.ini; echo x=0 >> ~/.gazebo/gui.ini; echo y=0 >> ~/.gazebo/gui.ini; echo width={self.width} >> ~/.gazebo/gui.ini; echo height={self.height} >> ~/.gazebo/gui.ini;"
@@ -51,18 +49,12 @@ class LauncherGazeboView(ILauncher):
 
         self.running = True
 
-    def check_device(self, device_path):
-        try:
-            return stat.S_ISCHR(os.lstat(device_path)[stat.ST_MODE])
-        except:
-            return False
-
     def is_running(self):
         return self.running
 
     def terminate(self):
         self.gz_vnc.terminate()
-        for thread in self.threads:
+        for thread in list(self.threads):
             if thread.is_alive():
                 thread.terminate()
                 thread.join()
@@ -71,14 +63,3 @@ class LauncherGazeboView(ILauncher):
 
     def died(self):
         pass
-
-    def get_dri_path(self):
-        directory_path = "/dev/dri"
-        dri_path = ""
-        if os.path.exists(directory_path) and os.path.isdir(directory_path):
-            files = os.listdir(directory_path)
-            if "card1" in files:
-                dri_path = os.path.join("/dev/dri", os.environ.get("DRI_NAME", "card1"))
-            else:
-                dri_path = os.path.join("/dev/dri", os.environ.get("DRI_NAME", "card0"))
-        return dri_path
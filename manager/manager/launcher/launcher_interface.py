@@ -1,7 +1,16 @@
 from pydantic import BaseModel
 
+from src.manager.libs.environment import RuntimeEnvironment
+
 
 class ILauncher(BaseModel):
+    @property
+    def environment(self):
+        """
+        Cached host facts (ROS version, DRI device, GPU acceleration...)
+        """
+        return RuntimeEnvironment
+
     def run(self, callback: callable):
         raise NotImplemented("Launcher must implement run method")
 
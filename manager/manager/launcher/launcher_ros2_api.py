@@ -1,7 +1,5 @@
-import os
 from typing import List, Any
 import time
-import stat
 
 from src.manager.manager.launcher.launcher_interface import ILauncher, LauncherException
 from src.manager.manager.docker_thread.docker_thread import DockerThread
@@ -17,8 +15,8 @@ class LauncherRos2Api(ILauncher):
     threads: List[Any] = []
 
     def run(self, callback):
-        DRI_PATH = os.path.join("/dev/dri", os.environ.get("DRI_NAME", "card0"))
-        ACCELERATION_ENABLED = self.check_device(DRI_PATH)
+        DRI_PATH = self.environment.dri_path
+        ACCELERATION_ENABLED = self.environment.is_char_device(DRI_PATH)
 
         logging.getLogger("roslaunch").setLevel(logging.CRITICAL)
 
@@ -37,15 +35,9 @@ class LauncherRos2Api(ILauncher):
         exercise_launch_thread = DockerThread(exercise_launch_cmd)
         exercise_launch_thread.start()
 
-    def check_device(self, device_path):
-        try:
-            return stat.S_ISCHR(os.lstat(device_path)[stat.ST_MODE])
-        except:
-            return False
-
     def terminate(self):
         if self.threads is not None:
-            for thread in self.threads:
+            for thread in list(self.threads):
                 if thread.is_alive():
                     thread.terminate()
                     thread.join()
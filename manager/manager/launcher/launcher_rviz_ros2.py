@@ -1,8 +1,6 @@
 from src.manager.manager.launcher.launcher_interface import ILauncher
 from src.manager.manager.docker_thread.docker_thread import DockerThread
 from src.manager.manager.vnc.vnc_server import Vnc_server
-import os
-import stat
 
 class LauncherRvizRos2(ILauncher):
     display: str
@@ -12,8 +10,8 @@ class LauncherRvizRos2(ILauncher):
     threads = []
 
     def run(self, callback):
-        DRI_PATH = os.path.join("/dev/dri", os.environ.get("DRI_NAME", "card0"))
-        ACCELERATION_ENABLED = self.check_device(DRI_PATH)
+        DRI_PATH = self.environment.dri_path
+        ACCELERATION_ENABLED = self.environment.is_char_device(DRI_PATH)
         rviz_vnc = Vnc_server()
 
         if ACCELERATION_ENABLED:
@@ -28,17 +26,11 @@ class LauncherRvizRos2(ILauncher):
         self.threads.append(rviz_thread)
         self.running = True
 
-    def check_device(self, device_path):
-        try:
-            return stat.S_ISCHR(os.lstat(device_path)[stat.ST_MODE])
-        except:
-            return False
-
     def is_running(self):
         return self.running
 
     def terminate(self):
-        for thread in self.threads:
+        for thread in list(self.threads):
             if thread.is_alive():
                 thread.terminate()
                 thread.join()
@@ -5,6 +5,7 @@ from pydantic import BaseModel
 
 from src.manager.libs.process_utils import get_class, class_from_module, get_ros_version
 from src.manager.ram_logging.log_manager import LogManager
+from src.manager.libs.cancellation import TransitionCancelled, report_progress
 from src.manager.manager.launcher.launcher_interface import ILauncher
 
 
@@ -118,6 +119,7 @@ class LauncherVisualization(BaseModel):
 
     def run(self):
         for module in visualization[self.visualization]:
+            report_progress(f"Launching {module['module']}")
             launcher = self.launch_module(module)
             self.launchers.append(launcher)
 
@@ -140,7 +142,12 @@ class LauncherVisualization(BaseModel):
         launcher_module = f"{self.module}.launcher_{launcher_module_name}.Launcher{class_from_module(launcher_module_name)}"
         launcher_class = get_class(launcher_module)
         launcher = launcher_class.from_config(launcher_class, configuration)
-        launcher.run(process_terminated)
+        try:
+            launcher.run(process_terminated)
+        except TransitionCancelled:
+            # The launcher is not tracked yet, so clean up what it started
+            launcher.terminate()
+            raise
         return launcher
 
     def launch_command(self, configuration):
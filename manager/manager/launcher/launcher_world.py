@@ -3,6 +3,7 @@ from pydantic import BaseModel
 
 from src.manager.libs.process_utils import get_class, class_from_module, get_ros_version
 from src.manager.ram_logging.log_manager import LogManager
+from src.manager.libs.cancellation import TransitionCancelled, report_progress
 from src.manager.manager.launcher.launcher_interface import ILauncher
 
 worlds = {
@@ -61,6 +62,7 @@ class LauncherWorld(BaseModel):
 
     def run(self):
         for module in worlds[self.world][str(self.ros_version)]:
+            report_progress(f"Launching {module['module']}")
             module["launch_file"] = self.launch_file_path
             launcher = self.launch_module(module)
             self.launchers.append(launcher)
@@ -84,7 +86,12 @@ class LauncherWorld(BaseModel):
         launcher_module = f"{self.module}.launcher_{launcher_module_name}.Launcher{class_from_module(launcher_module_name)}"
         launcher_class = get_class(launcher_module)
         launcher = launcher_class.from_config(launcher_class, configuration)
-        launcher.run(process_terminated)
+        try:
+            launcher.run(process_terminated)
+        except TransitionCancelled:
+            # The launcher is not tracked yet, so clean up what it started
+            launcher.terminate()
+            raise
         return launcher
 
     def launch_command(self, configuration):
@@ -0,0 +1,105 @@
+import threading
+import time
+
+from src.manager.ram_logging.log_manager import LogManager
+
+
+class BackgroundLinter(threading.Thread):
+    """
+    Lints the code the client is editing ahead of time, so run_application finds
+    the verdict already cached.
+
+    Requests are debounced: only the latest code is linted once no newer code has
+    arrived for `debounce` seconds. Every request gets a generation number; a result
+    whose generation is no longer the latest is discarded instead of published.
+    """
+
+    def __init__(self, linter, debounce=0.4):
+        super().__init__(daemon=True, name="BackgroundLint")
+        self.linter = linter
+        self.debounce = debounce
+        self.sink = None
+        self.generation = 0
+        self.linted = 0
+        self.discarded = 0
+        self._pending = None
+        self._submitted_at = 0.0
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+
+    def set_sink(self, sink):
+        """
+        Sets the callable that receives (generation, errors) for each fresh result
+        """
+        with self._condition:
+            self.sink = sink
+
+    def submit(self, code, exercise_id, ros_version, py_lint_source="pylint_checker.py"):
+        """
+        Queues code to be linted, replacing any code not linted yet.
+        Returns the generation of the request.
+        """
+        with self._condition:
+            self.generation += 1
+            if self._pending is not None:
+                self.discarded += 1
+            self._pending = (self.generation, code, exercise_id, ros_version, py_lint_source)
+            self._submitted_at = time.monotonic()
+            self._condition.notify()
+            return self.generation
+
+    def cancel(self):
+        """
+        Drops the queued request and the result of the one being linted
+        """
+        with self._condition:
+            self.generation += 1
+            if self._pending is not None:
+                self.discarded += 1
+            self._pending = None
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            with self._condition:
+                while not self._stop.is_set():
+                    if self._pending is None:
+                        self._condition.wait()
+                        continue
+                    remaining = self._submitted_at + self.debounce - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._stop.is_set():
+                    return
+                generation, code, exercise_id, ros_version, py_lint_source = self._pending
+                self._pending = None
+
+            try:
+                errors = self.linter.evaluate_code(
+                    code, exercise_id, ros_version, py_lint_source=py_lint_source
+                )
+            except Exception:
+                LogManager.logger.exception("Exception linting in background")
+                continue
+
+            with self._condition:
+                if generation != self.generation:
+                    self.discarded += 1
+                    continue
+                self.linted += 1
+                sink = self.sink
+            if sink is not None:
+                sink(generation, errors)
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stop.set()
+            self._pending = None
+            self._condition.notify()
+
+    def stats(self):
+        return {
+            "generation": self.generation,
+            "linted": self.linted,
+            "discarded": self.discarded,
+        }
@@ -0,0 +1,146 @@
+import ast
+import builtins
+
+# Names defined in every module namespace
+module_names = {
+    "__annotations__",
+    "__builtins__",
+    "__class__",
+    "__doc__",
+    "__file__",
+    "__loader__",
+    "__name__",
+    "__package__",
+    "__spec__",
+}
+# Names defined in every class body
+class_names = {
+    "__module__",
+    "__qualname__",
+}
+
+
+def find_main_loop(tree):
+    """
+    Returns the top level infinite loop (while True / while 1) of the exercise code.
+    The linter requires it, and it is the loop frequency_control rate limits.
+    """
+    for node in tree.body:
+        if (
+            isinstance(node, ast.While)
+            and isinstance(node.test, ast.Constant)
+            and node.test.value in (True, 1)
+            and not isinstance(node.test.value, float)
+        ):
+            return node
+    return None
+
+
+def bound_names(tree):
+    """
+    Every name the code binds, in any scope. Returns None if a star import makes
+    the set unknown.
+    """
+    names = set(dir(builtins)) | module_names
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            names.add(node.id)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name == "*":
+                    return None
+                names.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.ClassDef):
+            names.add(node.name)
+            names.update(class_names)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            names.update(node.names)
+        elif getattr(ast, "MatchAs", None) and isinstance(
+            node, (ast.MatchAs, ast.MatchStar)
+        ):
+            if node.name:
+                names.add(node.name)
+        elif getattr(ast, "MatchMapping", None) and isinstance(node, ast.MatchMapping):
+            if node.rest:
+                names.add(node.rest)
+    return names
+
+
+def handles_name_error(node):
+    for handler in node.handlers:
+        types = handler.type
+        if isinstance(types, ast.Tuple):
+            types = types.elts
+        else:
+            types = [types]
+        if any(isinstance(t, ast.Name) and t.id == "NameError" for t in types):
+            return True
+    return False
+
+
+def undefined_names(tree):
+    """
+    Names that are read but never bound anywhere in the code, as (line, column, name).
+
+    The check ignores scopes and ordering, so it never reports a name pylint would
+    accept; pylint still finds the subtler cases afterwards.
+    """
+    names = bound_names(tree)
+    if names is None:
+        return []
+
+    # Like pylint, names guarded by an except NameError are not reported
+    guarded = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Try) and handles_name_error(node):
+            for statement in node.body:
+                guarded.update(id(child) for child in ast.walk(statement))
+
+    return sorted(
+        (node.lineno, node.col_offset, node.id)
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Name)
+        and isinstance(node.ctx, ast.Load)
+        and node.id not in names
+        and id(node) not in guarded
+    )
+
+
+def fast_check(code):
+    """
+    In process checks run before pylint, taking a few milliseconds.
+
+    Returns the errors found, formatted like pylint output so they go through the
+    same cleaning, and the main loop node (None if the code has no main loop or
+    could not be parsed).
+    """
+    try:
+        tree = ast.parse(code, "user_code")
+        compile(tree, "user_code", "exec")
+    except SyntaxError as e:
+        line = e.lineno or 1
+        column = max((e.offset or 1) - 1, 0)
+        return (
+            f"user_code:{line}:{column}: E0001: Parsing failed: "
+            f"'{e.msg} (user_code, line {line})' (syntax-error)\n",
+            None,
+        )
+    except ValueError as e:
+        # Null bytes in the source
+        return f"user_code:1:0: E0001: Parsing failed: '{e}' (syntax-error)\n", None
+
+    main_loop = find_main_loop(tree)
+    if main_loop is None:
+        return "", None
+
+    output = "".join(
+        f"user_code:{line}:{column}: E0602: Undefined variable '{name}' (undefined-variable)\n"
+        for line, column, name in undefined_names(tree)
+    )
+    return output, main_loop
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+try:
+    from importlib.metadata import version, PackageNotFoundError
+except ImportError:
+    version = None
+
+from src.manager.ram_logging.log_manager import LogManager
+
+
+def pylint_version():
+    if version is None:
+        return "unknown"
+    try:
+        return version("pylint")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+class LintCache:
+    """
+    Content addressed cache of cleaned lint results.
+
+    Entries are keyed by a hash of the preprocessed code together with everything
+    else the result depends on (exercise, ROS distro, checker, pylint version).
+    They are kept in memory with an LRU bound and, if a directory is given, also
+    on disk so they survive RAM restarts.
+    """
+
+    def __init__(self, max_entries=256, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._pylint_version = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def pylint_version(self):
+        if self._pylint_version is None:
+            self._pylint_version = pylint_version()
+        return self._pylint_version
+
+    def key(self, code, exercise_id, ros_version, checker, warnings=False):
+        digest = hashlib.sha256()
+        for part in (
+            self.pylint_version,
+            checker,
+            str(ros_version),
+            str(exercise_id),
+            str(warnings),
+        ):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        digest.update(code.encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        result = self._load(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, result)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._store(key, result)
+        if self.directory is not None:
+            self._save(key, result)
+
+    def _store(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)["result"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self, key, result):
+        try:
+            # Written aside and renamed, so readers never see a partial entry
+            fd, path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"result": result}, f)
+            os.replace(path, self._path(key))
+        except OSError as e:
+            LogManager.logger.warning(f"Could not store lint result on disk: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+                "entries": len(self._entries),
+            }
@@ -0,0 +1,83 @@
+"""
+Long lived pylint worker.
+
+Keeps pylint and astroid loaded, together with the modules astroid already
+inferred (HAL, GUI...), and lints the code it receives over stdin. Requests and
+replies are JSON documents, one per line:
+
+    {"id": 1, "code": "...", "options": ["--disable=C0114"], "anonymize": false}
+    {"id": 1, "output": "..."}
+
+The output is the same text pylint_checker.py prints.
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+
+from pylint.lint import Run
+from pylint.reporters.text import TextReporter
+
+import astroid
+
+warmup_code = "import HAL\nimport GUI\n"
+
+
+def lint(code, options, anonymize=False):
+    code_file = tempfile.NamedTemporaryFile(delete=False)
+    code_file.write(code.encode())
+    code_file.close()
+
+    output = io.StringIO()
+    try:
+        try:
+            Run([code_file.name] + options, reporter=TextReporter(output), exit=False)
+        except SystemExit:
+            pass
+    finally:
+        os.remove(code_file.name)
+        # Forget the user module, keep everything it imported
+        module_name = os.path.basename(code_file.name)
+        astroid.MANAGER.astroid_cache.pop(module_name, None)
+
+    stdout = output.getvalue()
+    if anonymize:
+        stdout = stdout.replace(code_file.name, "user_code")
+        stdout = stdout.replace(code_file.name.replace("/tmp/", ""), "user_code")
+    # pylint_checker.py prints its output
+    return stdout + "\n"
+
+
+def main():
+    protocol = sys.stdout
+    # Anything pylint prints must not break the protocol
+    sys.stdout = sys.stderr
+
+    try:
+        lint(warmup_code, [])
+    except Exception:
+        pass
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        try:
+            reply = {
+                "id": request["id"],
+                "output": lint(
+                    request["code"],
+                    request.get("options", []),
+                    request.get("anonymize", False),
+                ),
+            }
+        except Exception as e:
+            reply = {"id": request["id"], "error": f"{type(e).__name__}: {e}"}
+        protocol.write(json.dumps(reply) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    main()
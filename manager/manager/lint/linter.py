@@ -1,9 +1,76 @@
 import re
 import os
 import subprocess
+import threading
+
+from src.manager.manager.lint.fast_check import fast_check
+from src.manager.manager.lint.lint_cache import LintCache
+from src.manager.manager.lint.worker_pool import LintWorkerPool
+from src.manager.ram_logging.log_manager import LogManager
 
 class Lint:
 
+    # pylint options and whether the temporary file name is hidden, per checker
+    profiles = {
+        "pylint_checker.py": (
+            ["--enable=similarities", "--disable=C0114,C0116"],
+            False,
+        ),
+        "pylint_checker_style.py": (
+            [
+                "--enable=similarities",
+                "--disable=C0114,C0116,C0411,E0401,R0022,W0012",
+                "--max-line-length=80",
+                "--reports=y",
+            ],
+            True,
+        ),
+    }
+
+    def __init__(self):
+        self.pool = LintWorkerPool()
+        # Set RAM_LINT_CACHE_DIR to keep lint results across RAM restarts
+        self.cache = LintCache(directory=os.environ.get("RAM_LINT_CACHE_DIR") or None)
+        # Cache keys being linted, so the same code is never linted twice at once
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+    def template_path(self, exercise_id, ros_version):
+        if "humble" in str(ros_version):
+            return f"/RoboticsAcademy/exercises/static/exercises/{exercise_id}/python_template/ros2_humble"
+        return f"/RoboticsAcademy/exercises/static/exercises/{exercise_id}/python_template/ros1_noetic"
+
+    def run_pylint(self, code, exercise_id, ros_version, py_lint_source):
+        """
+        Lints code on a warm worker, falling back to a one shot checker process
+        """
+        pythonpath = self.template_path(exercise_id, ros_version)
+        if py_lint_source in self.profiles:
+            options, anonymize = self.profiles[py_lint_source]
+            try:
+                return self.pool.lint(
+                    (str(ros_version), pythonpath), pythonpath, code, options, anonymize
+                )
+            except Exception as e:
+                LogManager.logger.warning(f"Lint worker failed, running {py_lint_source}: {e}")
+
+        f = open("user_code.py", "w")
+        f.write(code)
+        f.close()
+
+        command = f"export PYTHONPATH=$PYTHONPATH:{pythonpath}; python3 RoboticsAcademy/src/manager/manager/lint/{py_lint_source}"
+
+        ret = subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+            shell=True
+        )
+        return ret.stdout
+
     def clean_pylint_output(self, result, warnings=False):
 
         # result = result.replace(os.path.basename(code_file_name), 'user_code')
@@ -50,6 +117,23 @@ class Lint:
 
         return result
 
+    def unroll_main_loop(self, code, main_loop):
+        """
+        Moves the body of the main loop to the module level, keeping line numbers
+        """
+        lines = code.splitlines(keepends=True)
+        sequential_code = "".join(lines[:main_loop.lineno - 1])
+        first = main_loop.body[0]
+        if first.lineno == main_loop.lineno:
+            # Single line loop: while True: do_something()
+            iterative_code = lines[first.lineno - 1][first.col_offset:]
+            iterative_code += "".join(lines[first.lineno:])
+            return sequential_code + iterative_code
+        iterative_code = "\n" * (first.lineno - main_loop.lineno)
+        iterative_code += "".join(lines[first.lineno - 1:])
+        iterative_code = re.sub(r"^[ \t]{%d}" % first.col_offset, "", iterative_code, flags=re.M)
+        return sequential_code + iterative_code
+
     def evaluate_code(self, code, exercise_id, ros_version, warnings=False, py_lint_source="pylint_checker.py"):
         try:
             code = re.sub(r'from HAL import HAL', 'from hal import HAL', code)
@@ -57,42 +141,45 @@ class Lint:
             code = re.sub(r'from MAP import MAP', 'from map import MAP', code)
             code = re.sub(r'\nimport cv2\n', '\nfrom cv2 import cv2\n', code)
 
-            # Avoids EOF error when iterative code is empty (which prevents other errors from showing)
-            while_position = re.search(
-                r'[^ ]while\s*\(\s*True\s*\)\s*:|[^ ]while\s*True\s*:|[^ ]while\s*1\s*:|[^ ]while\s*\(\s*1\s*\)\s*:', code)
-            if while_position is None:
+            errors, main_loop = fast_check(code)
+            if errors:
+                cleaned_result = self.clean_pylint_output(errors + "\n")
+                return self.append_rating_if_missing(cleaned_result).strip()
+            if main_loop is None:
                 while_error = "ERROR: While loop is required and was not found.\n"
                 return while_error.strip()
-            sequential_code = code[:while_position.start()]
-            iterative_code = code[while_position.start():]
-            iterative_code = re.sub(
-                r'[^ ]while\s*\(\s*True\s*\)\s*:|[^ ]while\s*True\s*:|[^ ]while\s*1\s*:|[^ ]while\s*\(\s*1\s*\)\s*:', '\n', iterative_code, 1)
-            iterative_code = re.sub(r'^[ ]{4}', '', iterative_code, flags=re.M)
-            code = sequential_code + iterative_code
-            
-            f = open("user_code.py", "w")
-            f.write(code)
-            f.close()
-
-            command = ""
-            if "humble" in str(ros_version):                
-                command = f"export PYTHONPATH=$PYTHONPATH:/RoboticsAcademy/exercises/static/exercises/{exercise_id}/python_template/ros2_humble; python3 RoboticsAcademy/src/manager/manager/lint/{py_lint_source}"
-            else:
-                command = f"export PYTHONPATH=$PYTHONPATH:/RoboticsAcademy/exercises/static/exercises/{exercise_id}/python_template/ros1_noetic; python3 RoboticsAcademy/src/manager/manager/lint/{py_lint_source}"
-            
-            ret = subprocess.run(
-                command,
-                capture_output=True, 
-                text=True,
-                shell=True
-            )
-            
-            result = ret.stdout
-            result = result + "\n"
-
-            cleaned_result = self.clean_pylint_output(result)
-            final_result = self.append_rating_if_missing(cleaned_result)
 
+            # Avoids EOF error when iterative code is empty (which prevents other errors from showing)
+            code = self.unroll_main_loop(code, main_loop)
+
+            cache_key = self.cache.key(code, exercise_id, ros_version, py_lint_source, warnings)
+            cached_result = self.cache.get(cache_key)
+            if cached_result is not None:
+                return cached_result
+
+            while True:
+                with self._in_flight_lock:
+                    linting = self._in_flight.get(cache_key)
+                    if linting is None:
+                        self._in_flight[cache_key] = threading.Event()
+                        break
+                # Same code already being linted (in the background), wait for it
+                linting.wait()
+                cached_result = self.cache.get(cache_key)
+                if cached_result is not None:
+                    return cached_result
+
+            try:
+                result = self.run_pylint(code, exercise_id, ros_version, py_lint_source)
+                result = result + "\n"
+
+                cleaned_result = self.clean_pylint_output(result)
+                final_result = self.append_rating_if_missing(cleaned_result)
+
+                self.cache.put(cache_key, final_result.strip())
+            finally:
+                with self._in_flight_lock:
+                    self._in_flight.pop(cache_key).set()
             return final_result.strip()
         except Exception as ex:
             print(ex)
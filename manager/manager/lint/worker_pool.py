@@ -0,0 +1,185 @@
+import json
+import os
+import select
+import subprocess
+import threading
+import time
+
+from src.manager.ram_logging.log_manager import LogManager
+
+worker_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lint_worker.py")
+
+
+class LintWorkerError(Exception):
+    pass
+
+
+class LintWorker:
+    """
+    Handle of a lint_worker.py process. Serves one request at a time.
+    """
+
+    def __init__(self, pythonpath):
+        env = os.environ.copy()
+        env["PYTHONPATH"] = ":".join(
+            path for path in (env.get("PYTHONPATH", ""), pythonpath) if path
+        )
+        self.process = subprocess.Popen(
+            ["python3", worker_script],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            text=True,
+            bufsize=1,
+        )
+        self.requests = 0
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def lint(self, code, options, anonymize, timeout):
+        self.requests += 1
+        request = {
+            "id": self.requests,
+            "code": code,
+            "options": options,
+            "anonymize": anonymize,
+        }
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise LintWorkerError(f"Lint worker {self.pid} is not running: {e}")
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LintWorkerError(
+                    f"Lint worker {self.pid} did not answer within {timeout} seconds"
+                )
+            ready, _, _ = select.select([self.process.stdout], [], [], remaining)
+            if not ready:
+                continue
+            line = self.process.stdout.readline()
+            if not line:
+                raise LintWorkerError(f"Lint worker {self.pid} exited")
+            reply = json.loads(line)
+            if reply.get("id") != self.requests:
+                continue
+            if "error" in reply:
+                raise LintWorkerError(reply["error"])
+            return reply["output"]
+
+    def stop(self):
+        if not self.alive:
+            self.process.wait()
+            return
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=1)
+        except Exception:
+            self.process.kill()
+            self.process.wait()
+
+
+class LintWorkerPool:
+    """
+    Warm pylint workers, one pool per ROS distro and exercise PYTHONPATH.
+
+    Workers keep pylint and astroid loaded between requests, so a lint pays
+    neither the interpreter start up nor the inference of the exercise modules
+    again. Each worker serves a single request at a time and lints it in its own
+    temporary file, so concurrent requests never share files.
+    """
+
+    def __init__(self, max_workers=2, max_requests=200, timeout=60):
+        self.max_workers = max_workers
+        # Workers are replaced after this many requests to bound their memory
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self._idle = {}
+        self._count = {}
+        self._busy = set()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def lint(self, key, pythonpath, code, options, anonymize=False):
+        worker = self._acquire(key, pythonpath)
+        healthy = False
+        try:
+            output = worker.lint(code, options, anonymize, self.timeout)
+            healthy = True
+            return output
+        finally:
+            self._release(key, worker, healthy)
+
+    def _acquire(self, key, pythonpath):
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise LintWorkerError("Lint worker pool is shut down")
+                idle = self._idle.setdefault(key, [])
+                while idle:
+                    worker = idle.pop()
+                    if worker.alive:
+                        self._busy.add(worker)
+                        return worker
+                    self._count[key] -= 1
+                if self._count.get(key, 0) < self.max_workers:
+                    self._count[key] = self._count.get(key, 0) + 1
+                    break
+                self._condition.wait()
+
+        try:
+            worker = LintWorker(pythonpath)
+        except Exception:
+            with self._condition:
+                self._count[key] -= 1
+                self._condition.notify()
+            raise
+        LogManager.logger.info(f"Started lint worker {worker.pid} for {key}")
+        with self._condition:
+            self._busy.add(worker)
+        return worker
+
+    def _release(self, key, worker, healthy):
+        retire = (
+            not healthy
+            or not worker.alive
+            or worker.requests >= self.max_requests
+            or self._closed
+        )
+        if retire:
+            worker.stop()
+        with self._condition:
+            self._busy.discard(worker)
+            if retire:
+                if key in self._count:
+                    self._count[key] -= 1
+            else:
+                self._idle[key].append(worker)
+            self._condition.notify()
+
+    def pids(self):
+        with self._condition:
+            workers = list(self._busy)
+            for idle in self._idle.values():
+                workers.extend(idle)
+        return {worker.pid for worker in workers}
+
+    def shutdown(self):
+        with self._condition:
+            self._closed = True
+            workers = [worker for idle in self._idle.values() for worker in idle]
+            self._idle.clear()
+            self._count.clear()
+            self._condition.notify_all()
+        for worker in workers:
+            worker.stop()
@@ -2,28 +2,41 @@ from __future__ import annotations
 
 import os
 import signal
-import subprocess
-import sys
-import re
 import psutil
-import shutil
-import time
-import base64
 import zipfile
 
-if "noetic" in str(subprocess.check_output(["bash", "-c", "echo $ROS_DISTRO"])):
+from src.manager.libs.environment import RuntimeEnvironment
+
+if "noetic" in RuntimeEnvironment.ros_distro:
     import rosservice
-import traceback
-from queue import Queue
-from uuid import uuid4
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from queue import Empty, SimpleQueue
 
 
 from transitions import Machine
 
 from src.manager.comms.consumer_message import ManagerConsumerMessageException
+from src.manager.comms.fast_message import FastMessage, RawJson, dumps, loads
+from src.manager.comms.images import ImageStore, references
 from src.manager.comms.new_consumer import ManagerConsumer
-from src.manager.libs.process_utils import check_gpu_acceleration, get_class_from_file
+from src.manager.comms.transcoder import Transcoder
+from src.manager.comms.update_scheduler import UpdateScheduler
+from src.manager.comms.uploads import write_data_url
+from src.manager.libs.process_utils import get_class_from_file
 from src.manager.libs.launch_world_model import ConfigurationManager
+from src.manager.libs.metrics import LatencyStats
+from src.manager.libs.resource_snapshot import ResourceSnapshot
+from src.manager.libs.simulation_control import get_simulation_control
+from src.manager.libs.cancellation import (
+    CancellationToken,
+    TransitionCancelled,
+    check_cancelled,
+    run_with_token,
+)
 from src.manager.manager.launcher.launcher_world import LauncherWorld
 from src.manager.manager.launcher.launcher_visualization import LauncherVisualization
 from src.manager.ram_logging.log_manager import LogManager
@@ -32,8 +45,42 @@ from src.manager.libs.applications.compatibility.file_watchdog import FileWatchd
 from src.manager.manager.application.robotics_python_application_interface import (
     IRoboticsPythonApplication,
 )
-from src.manager.libs.process_utils import stop_process_and_children
+from src.manager.manager.application.zygote import ZygotePool, template_imports
+from src.manager.manager.application.loop_telemetry import LoopTelemetry
+from src.manager.manager.application.profiler import ApplicationProfiler
+from src.manager.manager.application.frequency_control import (
+    add_frequency_control,
+    default_frequency,
+    workspace_folder,
+)
+from src.manager.libs.process_utils import running_process, stop_process_and_children
+from src.manager.libs.template_sync import TemplateSync
+from src.manager.libs.storage import WorkspaceStorage
+from src.manager.libs.universe_cache import UniverseCache
 from src.manager.manager.lint.linter import Lint
+from src.manager.manager.lint.background import BackgroundLinter
+
+
+class TransitionJob:
+    """
+    A transition running on the manager worker thread
+    """
+
+    def __init__(self, message, deadline, on_progress):
+        self.message = message
+        self.deadline = deadline
+        self.token = CancellationToken(on_progress=on_progress)
+        self.started = time.monotonic()
+        self.last_progress = self.started
+        self.last_stage = None
+        self.future = None
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def expired(self):
+        return self.elapsed > self.deadline
 
 
 class Manager:
@@ -123,6 +170,32 @@ class Manager:
         },
     ]
 
+    # Transitions run on the worker thread, with their deadline in seconds
+    long_transitions = {
+        "launch_world": 300,
+        "prepare_visualization": 180,
+        "run_application": 120,
+        "style_check": 120,
+    }
+    # Seconds between progress events sent while a transition is running
+    progress_interval = 1
+    # Seconds after a session reset before checking it did not leak resources
+    leak_check_delay = 2
+    # Threads that outlive sessions by design
+    persistent_threads = (
+        "transition",
+        "environment",
+        "SimulationControl",
+        "GuiRelay",
+        "BackgroundLint",
+        "Zygote",
+        "LoopTelemetry",
+        "UpdateScheduler",
+        "Transcoder",
+        "Profiler",
+        "SessionLeakCheck",
+    )
+
     def __init__(self, host: str, port: int):
 
         self.machine = Machine(
@@ -133,15 +206,57 @@ class Manager:
             send_event=True,
             after_state_change=self.state_change,
         )
-        self.ros_version = subprocess.check_output(["bash", "-c", "echo $ROS_DISTRO"])
-        self.queue = Queue()
+        # Probe the host facts in the background, before the client asks for them
+        RuntimeEnvironment.refresh()
+        self.ros_version = RuntimeEnvironment.ros_distro
+        # SimpleQueue.put is reentrant, so the SIGINT handler can wake the dispatcher
+        self.queue = SimpleQueue()
         self.consumer = ManagerConsumer(host, port, self.queue)
+        self.dispatch_latency = LatencyStats()
+        # Commands answered directly with data, without triggering a transition
+        self.queries = {
+            "metrics": self.get_metrics,
+            "lint": self.lint_in_background,
+            "loop_telemetry": self.get_loop_telemetry,
+            "profile_application": self.profile_application,
+            "storage": self.get_storage,
+            "update_rate": self.update_rate,
+            "transcoding": self.configure_transcoding,
+        }
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="transition"
+        )
+        self.transition_job = None
+        # Control commands received while a transition is running, kept in order
+        self.pending_messages = deque()
+        self.session_latency = LatencyStats()
+        self.resource_baseline = None
+        self.last_session_leaks = {}
         self.world_launcher = None
         self.visualization_launcher = None
         self.application_process = None
         self.running = True
         self.gui_server = None
         self.linter = Lint()
+        self.background_linter = BackgroundLinter(self.linter)
+        self.background_linter.set_sink(self.send_lint_result)
+        self.simulation_control = get_simulation_control()
+        self.template_sync = TemplateSync()
+        self.universe_cache = UniverseCache()
+        # Workspace artifacts used by the current session, never evicted
+        self.artifacts_in_use = set()
+        self.storage = WorkspaceStorage(
+            self.universe_cache, self.consumer.uploads, protected=lambda: self.artifacts_in_use
+        )
+        self.consumer.uploads.before_upload = lambda size: self.storage.enforce(reserve=size)
+        self.zygotes = ZygotePool()
+        self.loop_telemetry = LoopTelemetry()
+        self.profiler = ApplicationProfiler()
+        self.loop_telemetry.set_sink(self.send_loop_telemetry)
+        self.update_scheduler = UpdateScheduler()
+        self.images = ImageStore()
+        self.transcoder = Transcoder()
+        self.update_scheduler.set_sink(self.send_update)
 
         # Creates workspace directories
         worlds_dir = "/workspace/worlds"
@@ -160,14 +275,54 @@ class Manager:
             self.consumer.send_message({"state": self.state}, command="state-changed")
 
     def update(self, data):
+        # Coalesced and rate limited, sent by send_update
+        self.update_scheduler.put(data)
+
+    def send_update(self, data):
         LogManager.logger.debug(f"Sending update to client")
         if self.consumer is not None:
-            self.consumer.send_message({"update": data}, command="update")
+            text = data.text if isinstance(data, RawJson) else dumps(data)
+            if "$image" not in text:
+                self.consumer.send_update(text)
+            elif self.transcoder.engaged():
+                # Slow link: images transcoded and sent by the pool, off the relay
+                self.transcoder.submit(
+                    partial(self.resolve_images, text), self.send_image_update, len(references(text))
+                )
+            else:
+                self.send_image_update(*self.resolve_images(text))
+
+    def resolve_images(self, text, transform=None):
+        """
+        Returns the binary frames of the images an update references, to send
+        before it, and the update text; for clients without binary images the
+        images are inlined as base64 instead
+        """
+        if self.consumer.protocol.image_transport != "binary":
+            return (), self.images.inline(text, transform)
+        return self.images.frames(text, transform), text
+
+    def send_image_update(self, frames, text):
+        start = time.perf_counter()
+        for frame in frames:
+            self.consumer.send_binary(frame)
+        self.consumer.send_update(text)
+        size = len(text) + sum(len(frame) for frame in frames)
+        # Measures the link, to engage transcoding when it cannot keep up
+        self.transcoder.observe(size, time.perf_counter() - start, self.consumer.send_backlog())
 
     def update_bt_studio(self, data):
         LogManager.logger.debug(f"Sending update to client")
         if self.consumer is not None:
-            self.consumer.send_message({"update": data}, command="update")
+            text = dumps(data)
+            if self.consumer.protocol.updates == "delta":
+                # The tree state is sent parsed, so deltas patch its nodes
+                try:
+                    loads(data)
+                    text = data
+                except ValueError:
+                    pass
+            self.consumer.send_update(text)
 
     def on_connect(self, event):
         """
@@ -181,14 +336,14 @@ class Manager:
         - `robotics_backend_version`: The current Robotics Backend version.
         - `ros_version`: The current ROS (Robot Operating System) distribution version.
         - `gpu_avaliable`: Boolean indicating whether GPU acceleration is available.
+        - `protocols`: Message encodings and compression RAM supports, and the active ones.
         """
         self.consumer.send_message(
             {
-                "robotics_backend_version": subprocess.check_output(
-                    ["bash", "-c", "echo $IMAGE_TAG"]
-                ),
+                "robotics_backend_version": RuntimeEnvironment.image_tag,
                 "ros_version": self.ros_version,
-                "gpu_avaliable": check_gpu_acceleration(),
+                "gpu_avaliable": RuntimeEnvironment.gpu_acceleration,
+                "protocols": self.consumer.protocol_state(),
             },
             command="introspection",
         )
@@ -216,7 +371,7 @@ class Manager:
         try:
             cfg_dict = event.kwargs.get("data", {})
             cfg = ConfigurationManager.validate(cfg_dict)
-            if "zip" in cfg_dict:
+            if "zip" in cfg_dict or "upload" in cfg_dict:
                 LogManager.logger.info("Launching universe from received zip")
                 self.prepare_custom_universe(cfg_dict)
             else:
@@ -228,28 +383,37 @@ class Manager:
 
         self.world_launcher = LauncherWorld(**cfg.model_dump())
         LogManager.logger.info(str(self.world_launcher))
-        self.world_launcher.run()
+        try:
+            self.world_launcher.run()
+        except TransitionCancelled:
+            self.world_launcher.terminate()
+            self.world_launcher = None
+            raise
+        if "noetic" not in str(self.ros_version):
+            # Warm up the simulation service clients while the user gets ready
+            self.simulation_control.start()
         LogManager.logger.info("Launch transition finished")
 
     def prepare_custom_universe(self, cfg_dict):
-
-        # Unzip the app
-        if cfg_dict["zip"].startswith("data:"):
-            _, _, zip_file = cfg_dict["zip"].partition("base64,")
-
-        universe_ref = "/workspace/worlds/" + cfg_dict["name"]
-        zip_destination = universe_ref + ".zip"
-        with open(zip_destination, "wb") as result:
-            result.write(base64.b64decode(zip_file))
-
-        # Create the folder if it doesn't exist
-        universe_folder = universe_ref + "/"
-        if not os.path.exists(universe_folder):
-            os.makedirs(universe_folder)
-
-        zip_ref = zipfile.ZipFile(zip_destination, "r")
-        zip_ref.extractall(universe_folder + "/")
-        zip_ref.close()
+        """
+        Installs the universe received from the client in /workspace/worlds/<name>
+        """
+        if "upload" in cfg_dict:
+            # Sent beforehand with upload_start / binary chunks / upload_finish
+            archive = self.consumer.uploads.path(cfg_dict["upload"])
+            sha256 = cfg_dict["upload"]
+            self.artifacts_in_use.add(archive)
+            report = self.universe_cache.install(cfg_dict["name"], archive, sha256)
+        else:
+            archive = f"/workspace/worlds/.{cfg_dict['name']}.zip"
+            try:
+                sha256 = write_data_url(cfg_dict["zip"], archive)
+                report = self.universe_cache.install(cfg_dict["name"], archive, sha256)
+            finally:
+                os.remove(archive)
+        LogManager.logger.info(f"Universe installed: {report}")
+        self.artifacts_in_use.add(self.universe_cache.entry(sha256))
+        self.storage.enforce()
 
     def on_prepare_visualization(self, event):
 
@@ -259,47 +423,109 @@ class Manager:
         self.visualization_launcher = LauncherVisualization(
             visualization=visualization_type
         )
-        self.visualization_launcher.run()
+        try:
+            self.visualization_launcher.run()
+        except TransitionCancelled:
+            self.visualization_launcher.terminate()
+            self.visualization_launcher = None
+            raise
 
         if visualization_type == "gazebo_rae":
-            self.gui_server = Server(2303, self.update)
+            self.gui_server = Server(2303, self.update, self.images.put)
             self.gui_server.start()
         elif visualization_type == "bt_studio":
             self.gui_server = FileWatchdog('/tmp/tree_state', self.update_bt_studio) # TODO: change if type bt
             self.gui_server.start()
 
+        if self.gui_server is not None:
+            self.consumer.gui_relay.set_sink(self.gui_server.send)
+
         LogManager.logger.info("Visualization transition finished")
 
-    def add_frequency_control(self, code):
-        frequency_control_code_imports = """
-import time
-from datetime import datetime
-ideal_cycle = 20
-"""
-        code = frequency_control_code_imports + code
-        infinite_loop = re.search(
-            r"[^ ]while\s*\(\s*True\s*\)\s*:|[^ ]while\s*True\s*:|[^ ]while\s*1\s*:|[^ ]while\s*\(\s*1\s*\)\s*:",
-            code,
+    def add_frequency_control(self, code, frequency=None, policy=None, telemetry=None):
+        """
+        Limits the main loop of the application to the requested frequency (Hz)
+        """
+        return add_frequency_control(
+            code, frequency or default_frequency, policy or "skip", telemetry
         )
-        frequency_control_code_pre = """
-    start_time_internal_freq_control = datetime.now()
-            """
-        code = (
-            code[: infinite_loop.end()]
-            + frequency_control_code_pre
-            + code[infinite_loop.end() :]
+
+    def send_loop_telemetry(self, stats):
+        self.consumer.send_message({"loop_telemetry": stats}, command="update")
+
+    def get_loop_telemetry(self, data=None):
+        return self.loop_telemetry.latest
+
+    def get_storage(self, data=None):
+        return self.storage.stats()
+
+    def update_rate(self, data=None):
+        """
+        Sets the maximum rate of GUI updates sent to the client for this
+        session, if `hz` is given, and returns the update counters
+        """
+        if data and "hz" in data:
+            self.update_scheduler.set_rate(data["hz"])
+        return self.update_scheduler.stats()
+
+    def configure_transcoding(self, data=None):
+        """
+        Enables or disables the transcoding of GUI images (`enabled`) and caps
+        their bitrate (`max_bitrate` in bits/s, null for none) for this session,
+        if given, and returns the transcoding counters
+        """
+        if data:
+            self.transcoder.configure(
+                data.get("enabled"), data.get("max_bitrate", self.transcoder.max_bitrate)
+            )
+        return self.transcoder.stats()
+
+    def profile_application(self, data):
+        """
+        Samples the running application for `duration` seconds without restarting it.
+        The report is sent later as an update.
+        """
+        data = data or {}
+        if not self.application_process or self.loop_telemetry.path is None:
+            raise Exception("No application with a main loop is running")
+        return self.profiler.start(
+            self.application_process.pid,
+            self.loop_telemetry.path,
+            float(data.get("duration", 5)),
+            float(data.get("interval", 0.005)),
+            self.send_profile,
         )
-        frequency_control_code_post = """
-    finish_time_internal_freq_control = datetime.now()
-    dt = finish_time_internal_freq_control - start_time_internal_freq_control
-    ms = (dt.days * 24 * 60 * 60 + dt.seconds) * 1000 + dt.microseconds / 1000.0
-
-    if (ms < ideal_cycle):
-        time.sleep((ideal_cycle - ms) / 1000.0)
-"""
-        code = code + frequency_control_code_post
+
+    def send_profile(self, report):
+        self.consumer.send_message({"profile": report}, command="update")
+
+    def backwards_compatible_code(self, code):
+        code = code.replace("from GUI import GUI", "import GUI")
+        code = code.replace("from HAL import HAL", "import HAL")
         return code
 
+    def lint_in_background(self, data):
+        """
+        Lints the code the user is editing without waiting for run_application.
+        The verdict is sent later as an update, tagged with the returned generation.
+        """
+        data = data or {}
+        py_lint_source = "pylint_checker.py"
+        if data.get("style_check"):
+            py_lint_source = "pylint_checker_style.py"
+        generation = self.background_linter.submit(
+            self.backwards_compatible_code(data["code"]),
+            data["exercise_id"],
+            self.ros_version,
+            py_lint_source,
+        )
+        return {"generation": generation}
+
+    def send_lint_result(self, generation, errors):
+        self.consumer.send_message(
+            {"lint": {"generation": generation, "errors": errors}}, command="update"
+        )
+
     def on_style_check_application(self, event):
         def find_docker_console():
             """Search console in docker different of /dev/pts/0"""
@@ -331,8 +557,7 @@ ideal_cycle = 20
         code = app_cfg["code"]
 
         # Make code backwards compatible
-        code = code.replace("from GUI import GUI", "import GUI")
-        code = code.replace("from HAL import HAL", "import HAL")
+        code = self.backwards_compatible_code(code)
 
         # Create executable app
         errors = self.linter.evaluate_code(code, exercise_id, self.ros_version, py_lint_source="pylint_checker_style.py")
@@ -389,27 +614,30 @@ ideal_cycle = 20
             code_path = "/workspace/code/academy.py"
 
         # Make code backwards compatible
-        code = code.replace("from GUI import GUI", "import GUI")
-        code = code.replace("from HAL import HAL", "import HAL")
+        code = self.backwards_compatible_code(code)
 
         # Create executable app
         errors = self.linter.evaluate_code(code, exercise_id, self.ros_version)
+        check_cancelled()
         if errors == "":
 
-            code = self.add_frequency_control(code)
+            code = self.add_frequency_control(
+                code,
+                app_cfg.get("frequency"),
+                app_cfg.get("rate_policy"),
+                telemetry=self.loop_telemetry.reset(),
+            )
             f = open("/workspace/code/academy.py", "w")
             f.write(code)
             f.close()
 
-            shutil.copytree(application_folder, "/workspace/code", dirs_exist_ok=True)
-            self.application_process = subprocess.Popen(
-                ["python3", code_path],
-                stdout=sys.stdout,
-                stderr=subprocess.STDOUT,
-                bufsize=1024,
-                universal_newlines=True,
+            sync_report = self.template_sync.sync(application_folder, "/workspace/code")
+            LogManager.logger.info(f"Template staged: {sync_report}")
+            self.template_sync.sync(workspace_folder, "/workspace/code")
+            self.application_process = self.spawn_application(
+                code_path, application_folder
             )
-            self.unpause_sim()
+            self.unpause_sim_for_application()
         else:
             console_path = find_docker_console()
             for i in console_path:
@@ -424,43 +652,69 @@ ideal_cycle = 20
     def run_bt_studio_application(self, data):
 
         print("BT Studio application")
+        # No rate controlled main loop, so no telemetry nor profiler
+        self.loop_telemetry.clear()
 
         # Unzip the app
-        if data["code"].startswith("data:"):
-            _, _, code = data["code"].partition("base64,")
-        with open("/workspace/code/app.zip", "wb") as result:
-            result.write(base64.b64decode(code))
-        zip_ref = zipfile.ZipFile("/workspace/code/app.zip", "r")
+        if "upload" in data:
+            app_zip = self.consumer.uploads.path(data["upload"])
+            self.artifacts_in_use.add(app_zip)
+        else:
+            app_zip = "/workspace/code/app.zip"
+            write_data_url(data["code"], app_zip)
+        zip_ref = zipfile.ZipFile(app_zip, "r")
         zip_ref.extractall("/workspace/code")
         zip_ref.close()
 
-        self.application_process = subprocess.Popen(
-            ["python3", "/workspace/code/execute_docker.py"],
-            stdout=sys.stdout,
-            stderr=subprocess.STDOUT,
-            bufsize=1024,
-            universal_newlines=True,
+        self.application_process = self.spawn_application(
+            "/workspace/code/execute_docker.py"
         )
-        self.unpause_sim()
+        self.unpause_sim_for_application()
 
         LogManager.logger.info("Run application transition finished")
 
+    def unpause_sim_for_application(self):
+        """
+        Unpauses the simulation for the application just spawned. If the
+        simulation cannot be unpaused the application is stopped, so the failed
+        transition leaves nothing running and can be retried.
+        """
+        try:
+            self.unpause_sim()
+        except Exception:
+            try:
+                stop_process_and_children(self.application_process)
+            finally:
+                self.application_process = None
+            raise
+
+    def spawn_application(self, path, template=None):
+        """
+        Starts the application, forked from a warm zygote when one is ready
+        """
+        ros_module = "rospy" if "noetic" in str(self.ros_version) else "rclpy"
+        modules = [ros_module, "numpy", "cv2"]
+        if template is not None:
+            modules += [m for m in template_imports(template) if m not in modules]
+        return self.zygotes.spawn(template or "default", path, modules)
+
     def on_terminate_application(self, event):
 
+        self.loop_telemetry.clear()
         if self.application_process:
             try:
                 stop_process_and_children(self.application_process)
-                self.application_process = None
-                self.pause_sim()
-                self.reset_sim()
             except Exception:
-                LogManager.logger.exception("No application running")
-                print(traceback.format_exc())
+                LogManager.logger.exception("Exception stopping application process")
+            finally:
+                self.application_process = None
+                self.pause_and_reset_sim()
 
     def on_terminate_visualization(self, event):
 
         self.visualization_launcher.terminate()
         if self.gui_server != None:
+            self.consumer.gui_relay.set_sink(None)
             self.gui_server.stop()
             self.gui_server = None
 
@@ -469,17 +723,25 @@ ideal_cycle = 20
         self.world_launcher.terminate()
 
     def on_disconnect(self, event):
-        try:
-            self.consumer.stop()
-        except Exception as e:
-            LogManager.logger.exception("Exception stopping consumer")
+        """
+        Resets the session in process: stops everything the session launched and
+        accepts the next client, without restarting RAM
+        """
+        if self.gui_server is not None:
+            self.consumer.gui_relay.set_sink(None)
+            try:
+                self.gui_server.stop()
+            except Exception as e:
+                LogManager.logger.exception("Exception stopping GUI server")
+            self.gui_server = None
 
         if self.application_process:
             try:
                 stop_process_and_children(self.application_process)
-                self.application_process = None
             except Exception as e:
                 LogManager.logger.exception("Exception stopping application process")
+            self.application_process = None
+        self.loop_telemetry.clear()
 
         if self.visualization_launcher:
             try:
@@ -488,64 +750,252 @@ ideal_cycle = 20
                 LogManager.logger.exception(
                     "Exception terminating visualization launcher"
                 )
+            self.visualization_launcher = None
 
         if self.world_launcher:
             try:
                 self.world_launcher.terminate()
             except Exception as e:
                 LogManager.logger.exception("Exception terminating world launcher")
-
-        # Reiniciar el script
-        python = sys.executable
-        os.execl(python, python, *sys.argv)
+            self.world_launcher = None
+
+        self.background_linter.cancel()
+        self.update_scheduler.reset()
+        self.images.clear()
+        self.transcoder.reset()
+        self.artifacts_in_use = set()
+        self.consumer.reset()
+
+        # Threads and sockets of the closed session take a moment to finish
+        leak_check = threading.Timer(self.leak_check_delay, self.check_session_leaks)
+        leak_check.name = "SessionLeakCheck"
+        leak_check.daemon = True
+        leak_check.start()
+
+    def persistent_pids(self):
+        """
+        Child processes meant to outlive sessions
+        """
+        return self.linter.pool.pids() | self.zygotes.pids()
+
+    def check_session_leaks(self):
+        snapshot = ResourceSnapshot()
+        leaks = snapshot.leaks(
+            self.resource_baseline,
+            persistent_threads=self.persistent_threads,
+            persistent_pids=self.persistent_pids(),
+        )
+        if leaks:
+            LogManager.logger.warning(f"Resources leaked by the last session: {leaks}")
+        else:
+            LogManager.logger.info("Session reset without leaking resources")
+        self.last_session_leaks = leaks
+        self.resource_baseline = snapshot
+
+    def get_metrics(self, data=None):
+        return {
+            "dispatch_latency": self.dispatch_latency.as_dict(),
+            "gui_relay": self.consumer.gui_relay.stats(),
+            "gui_updates": self.update_scheduler.stats(),
+            "images": self.images.stats(),
+            "transcoding": self.transcoder.stats(),
+            "deltas": self.consumer.deltas.stats(),
+            "uploads": self.consumer.uploads.stats(),
+            "traffic": self.consumer.server.traffic.stats(),
+            "lint_cache": self.linter.cache.stats(),
+            "background_lint": self.background_linter.stats(),
+            "template_sync": self.template_sync.last_report,
+            "universe_cache": self.universe_cache.last_report,
+            "zygotes": self.zygotes.stats(),
+            "session": {
+                "time_to_accept": self.session_latency.as_dict().get("disconnect"),
+                "last_reset_leaks": self.last_session_leaks,
+            },
+        }
 
     def process_message(self, message):
-        if message.command == "gui":
-            self.gui_server.send(message.data)
+        if message.command in self.queries:
+            result = self.queries[message.command](message.data)
+            self.consumer.send_message(
+                FastMessage(message.id, "ack", result)
+            )
+            return
+
+        if self.transition_job is not None:
+            self.defer_message(message)
+            return
+
+        if message.command in self.long_transitions:
+            self.start_transition(message)
             return
 
         self.trigger(message.command, data=message.data or None)
         response = {"message": f"Exercise state changed to {self.state}"}
         self.consumer.send_message(message.response(response))
 
+        if message.command == "disconnect" and message.queued_time() is not None:
+            time_to_accept = message.queued_time()
+            self.session_latency.add("disconnect", time_to_accept)
+            LogManager.logger.info(
+                f"Ready for the next client {time_to_accept * 1000:.1f} ms after disconnect"
+            )
+
+    def defer_message(self, message):
+        """
+        Keeps a control command until the running transition finishes.
+        A disconnect cancels the running transition and discards the commands
+        waiting behind it.
+        """
+        if message.command == "disconnect":
+            self.transition_job.token.cancel(
+                f"{self.transition_job.message.command} cancelled by disconnect"
+            )
+            while self.pending_messages:
+                discarded = self.pending_messages.popleft()
+                self.consumer.send_message(
+                    ManagerConsumerMessageException(
+                        id=discarded.id, message="Cancelled by disconnect"
+                    )
+                )
+        self.pending_messages.append(message)
+
+    def start_transition(self, message):
+        """
+        Runs a long transition on the worker thread. The client is told the
+        manager is transitioning and receives progress events until it finishes.
+        """
+        job = TransitionJob(
+            message,
+            self.long_transitions[message.command],
+            on_progress=lambda: self.queue.put(None),
+        )
+        self.transition_job = job
+        self.consumer.send_message(
+            {"state": "transitioning", "transition": message.command},
+            command="state-changed",
+        )
+        job.future = self.executor.submit(
+            run_with_token,
+            job.token,
+            self.trigger,
+            message.command,
+            data=message.data or None,
+        )
+        # Wake up the dispatcher when the transition finishes
+        job.future.add_done_callback(lambda future: self.queue.put(None))
+
+    def check_transition(self):
+        """
+        Finishes the running transition if it is done, otherwise enforces its
+        deadline and sends progress to the client
+        """
+        job = self.transition_job
+        if job.future.done():
+            self.transition_job = None
+            try:
+                job.future.result()
+                response = {"message": f"Exercise state changed to {self.state}"}
+                self.consumer.send_message(job.message.response(response))
+            except Exception as e:
+                LogManager.logger.error(e, exc_info=True)
+                self.consumer.send_message(
+                    ManagerConsumerMessageException(id=job.message.id, message=str(e))
+                )
+                # The state did not change, tell the client it is not transitioning
+                self.consumer.send_message({"state": self.state}, command="state-changed")
+            return
+
+        if job.expired():
+            job.token.cancel(
+                f"{job.message.command} exceeded its deadline of {job.deadline} seconds"
+            )
+
+        now = time.monotonic()
+        stage = job.token.stage
+        if stage != job.last_stage or now - job.last_progress >= self.progress_interval:
+            job.last_stage = stage
+            job.last_progress = now
+            self.consumer.send_message(
+                {
+                    "transition": job.message.command,
+                    "stage": stage,
+                    "elapsed": round(job.elapsed, 1),
+                    "deadline": job.deadline,
+                },
+                command="transition-progress",
+            )
+
+    def transition_timeout(self):
+        """
+        How long the dispatcher can block waiting for messages
+        """
+        if self.transition_job is None:
+            return None
+        return self.progress_interval
+
+    def dispatch(self, message):
+        try:
+            queued_time = message.queued_time()
+            if queued_time is not None:
+                self.dispatch_latency.add(message.command, queued_time)
+                LogManager.logger.debug(
+                    f"Dispatching {message.command} after {queued_time * 1000:.3f} ms in queue"
+                )
+            self.process_message(message)
+        except Exception as e:
+            ex = ManagerConsumerMessageException(id=message.id, message=str(e))
+            self.consumer.send_message(ex)
+            LogManager.logger.error(e, exc_info=True)
+
     def on_pause(self, msg):
-        proc = psutil.Process(self.application_process.pid)
-        proc.suspend()
+        # The simulation first: if it cannot be paused, nothing changed
         self.pause_sim()
+        proc = self.running_application()
+        if proc is not None:
+            proc.suspend()
 
     def on_resume(self, msg):
-        proc = psutil.Process(self.application_process.pid)
-        proc.resume()
         self.unpause_sim()
+        proc = self.running_application()
+        if proc is not None:
+            proc.resume()
+
+    def running_application(self):
+        """
+        psutil handle of the application, None if it already exited
+        """
+        if self.application_process is None:
+            return None
+        try:
+            return running_process(self.application_process)
+        except psutil.NoSuchProcess:
+            LogManager.logger.warning("The application already exited")
+            return None
 
     def pause_sim(self):
         if "noetic" in str(self.ros_version):
             rosservice.call_service("/gazebo/pause_physics", [])
         else:
-            self.call_service("/pause_physics", "std_srvs/srv/Empty")
+            self.simulation_control.pause()
 
     def unpause_sim(self):
         if "noetic" in str(self.ros_version):
             rosservice.call_service("/gazebo/unpause_physics", [])
         else:
-            self.call_service("/unpause_physics", "std_srvs/srv/Empty")
+            self.simulation_control.unpause()
 
     def reset_sim(self):
         if "noetic" in str(self.ros_version):
             rosservice.call_service("/gazebo/reset_world", [])
         else:
-            self.call_service("/reset_world", "std_srvs/srv/Empty")
-
-    def call_service(self, service, service_type):
-        command = f"ros2 service call {service} {service_type}"
-        subprocess.call(
-            f"{command}",
-            shell=True,
-            stdout=sys.stdout,
-            stderr=subprocess.STDOUT,
-            bufsize=1024,
-            universal_newlines=True,
-        )
+            self.simulation_control.reset()
+
+    def pause_and_reset_sim(self):
+        if "noetic" in str(self.ros_version):
+            self.pause_sim()
+            self.reset_sim()
+        else:
+            self.simulation_control.pause_and_reset()
 
     def start(self):
         """
@@ -557,63 +1007,85 @@ ideal_cycle = 20
         )
 
         self.consumer.start()
+        self.background_linter.start()
+        self.loop_telemetry.start()
+        self.update_scheduler.start()
+        self.storage.enforce()
+        self.resource_baseline = ResourceSnapshot()
 
         def signal_handler(sign, frame):
             print("\nprogram exiting gracefully")
             self.running = False
-            if self.gui_server is not None:
-                try:
-                    self.gui_server.stop()
-                except Exception as e:
-                    LogManager.logger.exception("Exception stopping GUI server")
+            # Wake up the dispatcher, which is blocked waiting for messages
+            self.queue.put(None)
+
+        signal.signal(signal.SIGINT, signal_handler)
+
+        while self.running:
             try:
-                self.consumer.stop()
-            except Exception as e:
-                LogManager.logger.exception("Exception stopping consumer")
+                message = self.queue.get(timeout=self.transition_timeout())
+            except Empty:
+                message = None
 
-            if self.application_process:
-                try:
-                    stop_process_and_children(self.application_process)
-                    self.application_process = None
-                except Exception as e:
-                    LogManager.logger.exception(
-                        "Exception stopping application process"
-                    )
+            if self.transition_job is not None:
+                self.check_transition()
+            if message is not None:
+                self.dispatch(message)
+            while self.transition_job is None and self.pending_messages:
+                self.dispatch(self.pending_messages.popleft())
 
-            if self.visualization_launcher:
-                try:
-                    self.visualization_launcher.terminate()
-                except Exception as e:
-                    LogManager.logger.exception(
-                        "Exception terminating visualization launcher"
-                    )
+        self.shutdown()
 
-            if self.world_launcher:
-                try:
-                    self.world_launcher.terminate()
-                except Exception as e:
-                    LogManager.logger.exception("Exception terminating world launcher")
+    def shutdown(self):
+        """
+        Stops the consumer and every process launched by RAM
+        """
+        LogManager.logger.info(
+            f"Dispatch latency per command: {self.dispatch_latency.as_dict()}"
+        )
+        if self.transition_job is not None:
+            self.transition_job.token.cancel("RAM is shutting down")
+        self.executor.shutdown(wait=False)
+        self.background_linter.stop()
+        self.linter.shutdown()
+        self.zygotes.shutdown()
+        self.loop_telemetry.stop()
+        self.update_scheduler.stop()
+        self.transcoder.stop()
+        try:
+            self.simulation_control.shutdown()
+        except Exception as e:
+            LogManager.logger.exception("Exception stopping simulation control")
+        if self.gui_server is not None:
+            try:
+                self.gui_server.stop()
+            except Exception as e:
+                LogManager.logger.exception("Exception stopping GUI server")
+        try:
+            self.consumer.stop()
+        except Exception as e:
+            LogManager.logger.exception("Exception stopping consumer")
 
-        signal.signal(signal.SIGINT, signal_handler)
+        if self.application_process:
+            try:
+                stop_process_and_children(self.application_process)
+                self.application_process = None
+            except Exception as e:
+                LogManager.logger.exception("Exception stopping application process")
 
-        while self.running:
-            message = None
+        if self.visualization_launcher:
             try:
-                if self.queue.empty():
-                    time.sleep(0.1)
-                else:
-                    message = self.queue.get()
-                    self.process_message(message)
+                self.visualization_launcher.terminate()
             except Exception as e:
-                if message is not None:
-                    ex = ManagerConsumerMessageException(id=message.id, message=str(e))
-                else:
-                    ex = ManagerConsumerMessageException(
-                        id=str(uuid4()), message=str(e)
-                    )
-                self.consumer.send_message(ex)
-                LogManager.logger.error(e, exc_info=True)
+                LogManager.logger.exception(
+                    "Exception terminating visualization launcher"
+                )
 
+        if self.world_launcher:
+            try:
+                self.world_launcher.terminate()
+            except Exception as e:
+                LogManager.logger.exception("Exception terminating world launcher")
 
 if __name__ == "__main__":
     import argparse
@@ -5,6 +5,8 @@ import subprocess
 from typing import List, Any
 import os
 from src.manager.libs.process_utils import wait_for_xserver
+from src.manager.libs.cancellation import cancellable_sleep, report_progress
+from src.manager.libs.environment import RuntimeEnvironment
 
 
 class Vnc_server:
@@ -65,6 +67,7 @@ class Vnc_server:
         self.create_gzclient_icon()
 
     def wait_for_port(self, host, port, timeout=20):
+        report_progress(f"Waiting for port {port}")
         start_time = time.time()
         while True:
             if time.time() - start_time > timeout:
@@ -77,13 +80,13 @@ class Vnc_server:
                     sock.connect((host, port))
                 break
             except (ConnectionRefusedError, TimeoutError):
-                time.sleep(1)
+                cancellable_sleep(1)
 
     def is_running(self):
         return self.running
 
     def terminate(self):
-        for thread in self.threads:
+        for thread in list(self.threads):
             if thread.is_alive():
                 thread.terminate()
                 thread.join()
@@ -91,8 +94,7 @@ class Vnc_server:
         self.running = False
 
     def get_ros_version(self):
-        output = subprocess.check_output(["bash", "-c", "echo $ROS_VERSION"])
-        return output.decode("utf-8").strip()
+        return RuntimeEnvironment.ros_version
 
     def create_desktop_icon(self):
         try:
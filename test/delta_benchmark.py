@@ -0,0 +1,82 @@
+"""
+Benchmark of delta encoding of GUI state updates.
+
+Sends a stream of updates of a large, mostly static GUI state (a map with a
+path, the robot pose and a score that change every tick) and compares, per
+update:
+- full: the whole state in every update, parsed by the client;
+- delta: JSON patches of the changed fields, with periodic keyframes,
+  parsed and applied by the client.
+
+    python3 test/delta_benchmark.py [updates]
+"""
+
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.comms.delta import DeltaEncoder, apply_patch
+from src.manager.comms.fast_message import dumps
+
+
+def states(updates):
+    obstacles = [{"x": i % 40, "y": i // 40, "kind": "wall"} for i in range(1500)]
+    path = [[round(math.cos(i / 50), 3), round(math.sin(i / 50), 3)] for i in range(300)]
+    for tick in range(updates):
+        state = {
+            "map": {"obstacles": obstacles, "resolution": 0.05},
+            "path": path[: 200 + tick % 100],
+            "pose": [round(math.cos(tick / 10), 3), round(math.sin(tick / 10), 3), tick / 100],
+            "score": tick // 10,
+        }
+        yield dumps(state)
+
+
+def main():
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    texts = list(states(updates))
+
+    full_bytes = 0
+    start = time.perf_counter()
+    for text in texts:
+        message = '{"update":' + text + "}"
+        full_bytes += len(message)
+        json.loads(message)
+    full_time = time.perf_counter() - start
+
+    encoder = DeltaEncoder(keyframe_interval=1)
+    client = {}
+    delta_bytes = 0
+    encode_time = 0.0
+    client_time = 0.0
+    for text in texts:
+        start = time.perf_counter()
+        data = encoder.encode(text)
+        encode_time += time.perf_counter() - start
+        if data is None:
+            continue
+        delta_bytes += len(data)
+        start = time.perf_counter()
+        message = json.loads(data)
+        if "update" in message:
+            client[message["stream"]] = message["update"]
+        else:
+            client[message["stream"]] = apply_patch(client[message["stream"]], message["patch"])
+        client_time += time.perf_counter() - start
+    assert client[message["stream"]] == json.loads(texts[-1])
+
+    stats = encoder.stats()
+    print(f"{updates} updates of {len(texts[0]) / 1024:.0f} KiB, {stats['keyframes']} keyframes")
+    print(f"{'updates':<8}{'bytes/update':>14}{'client ms/update':>18}{'RAM ms/update':>15}")
+    print(f"{'full':<8}{full_bytes / updates:>14,.0f}{full_time / updates * 1000:>18.3f}{0:>15.3f}")
+    print(
+        f"{'delta':<8}{delta_bytes / updates:>14,.0f}{client_time / updates * 1000:>18.3f}"
+        f"{encode_time / updates * 1000:>15.3f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
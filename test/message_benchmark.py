@@ -0,0 +1,87 @@
+"""
+Micro-benchmark of the serialization of the hot RAM messages.
+
+Compares messages/second of the pydantic ManagerConsumerMessage path (uuid4 ids,
+.json(), json.loads + validation) with the FastMessage path used for `update`,
+`ack` and `gui` messages.
+
+    python3 test/message_benchmark.py [seconds per case]
+"""
+
+import base64
+import json
+import os
+import sys
+import time
+from uuid import uuid4
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from manager.comms.consumer_message import ManagerConsumerMessage
+from manager.comms import fast_message
+from manager.comms.fast_message import FastMessage
+
+
+def measure(fn, seconds):
+    count = 0
+    batch = 100
+    start = time.perf_counter()
+    while True:
+        for _ in range(batch):
+            fn()
+        count += batch
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    small_update = {"update": {"#pose": [1.5, -2.25, 0.785], "v": 0.5, "w": -0.1}}
+    image_update = {
+        "update": {
+            "image": base64.b64encode(os.urandom(48 * 1024)).decode(),
+            "shape": [240, 320, 3],
+            "#pose": [1.5, -2.25, 0.785],
+        }
+    }
+    ack = {"id": str(uuid4()), "command": "ack", "data": {"generation": 12}}
+    gui = json.dumps({"id": str(uuid4()), "command": "gui", "data": "#ack"})
+
+    def validated_gui():
+        message = ManagerConsumerMessage(**json.loads(gui))
+        return message.command == "gui" and message.data
+
+    def fast_gui():
+        message = fast_message.loads(gui)
+        return message.get("command") == "gui" and message.get("data")
+
+    cases = [
+        (
+            "update (small)",
+            lambda: str(ManagerConsumerMessage(id=str(uuid4()), command="update", data=small_update)),
+            lambda: str(FastMessage.new("update", small_update)),
+        ),
+        (
+            "update (48 KiB image)",
+            lambda: str(ManagerConsumerMessage(id=str(uuid4()), command="update", data=image_update)),
+            lambda: str(FastMessage.new("update", image_update)),
+        ),
+        (
+            "ack",
+            lambda: str(ManagerConsumerMessage(id=ack["id"], command="ack", data=ack["data"])),
+            lambda: str(FastMessage(ack["id"], "ack", ack["data"])),
+        ),
+        ("gui (decode)", validated_gui, fast_gui),
+    ]
+
+    backend = "orjson" if fast_message.orjson is not None else "json"
+    print(f"Fast JSON backend: {backend}")
+    print(f"{'message':<24}{'pydantic msg/s':>16}{'fast msg/s':>14}{'speedup':>10}")
+    for name, before, after in cases:
+        slow = measure(before, seconds)
+        fast = measure(after, seconds)
+        print(f"{name:<24}{slow:>16,.0f}{fast:>14,.0f}{fast / slow:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
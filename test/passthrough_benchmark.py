@@ -0,0 +1,75 @@
+"""
+Benchmark of the relay of GUI template messages to the client.
+
+Measures the CPU time per frame of forwarding a template message received by
+the GUI server (compatibility/server.py) to the client:
+- before: the library unmasks the frame byte by byte, then the message is
+  parsed with json.loads, wrapped and serialized again by pydantic;
+- after: the frame is unmasked in one pass and the raw payload is spliced
+  into the update envelope (passthrough).
+
+    python3 test/passthrough_benchmark.py [frames]
+"""
+
+import base64
+import json
+import os
+import sys
+import time
+from uuid import uuid4
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from manager.comms.binary_websocket import unmask
+from manager.comms.consumer_message import ManagerConsumerMessage
+from manager.comms.fast_message import FastMessage, RawJson
+
+
+def library_unmask(payload, masks):
+    # Same loop as websocket_server.WebSocketHandler.read_next_message
+    message_bytes = bytearray()
+    for message_byte in payload:
+        message_byte ^= masks[len(message_bytes) % 4]
+        message_bytes.append(message_byte)
+    return message_bytes
+
+
+def before(frame, masks):
+    message = library_unmask(frame, masks).decode("utf8")
+    payload = json.loads(message)
+    return str(ManagerConsumerMessage(id=str(uuid4()), command="update", data={"update": payload}))
+
+
+def after(frame, masks):
+    message = unmask(frame, masks).decode("utf8")
+    payload = RawJson(message)
+    return str(FastMessage.new("update", RawJson('{"update":' + payload.text + "}")))
+
+
+def cpu_per_frame(fn, frame, masks, frames):
+    start = time.process_time()
+    for _ in range(frames):
+        fn(frame, masks)
+    return (time.process_time() - start) / frames
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    masks = os.urandom(4)
+    print(f"{'template message':<26}{'before ms':>11}{'after ms':>10}{'saved ms':>10}{'speedup':>9}")
+    for name, size in (("pose (100 B)", 0), ("image 32 KiB", 32), ("image 160 KiB", 160)):
+        message = {"#pose": [1.5, -2.25, 0.785], "v": 0.5}
+        if size:
+            message = {
+                "image": base64.b64encode(os.urandom(size * 1024)).decode(),
+                "shape": [240, 320, 3],
+            }
+        text = json.dumps(message).encode()
+        frame = unmask(text, masks)
+        assert json.loads(after(frame, masks))["data"]["update"] == message
+        slow = cpu_per_frame(before, frame, masks, frames) * 1000
+        fast = cpu_per_frame(after, frame, masks, frames) * 1000
+        print(f"{name:<26}{slow:>11.3f}{fast:>10.3f}{slow - fast:>10.3f}{slow / fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Tests of the frames read and sent by the websocket handler, plain and
+compressed with permessage-deflate.
+
+    python3 -m pytest test/test_binary_websocket.py
+"""
+
+import io
+import os
+import random
+import struct
+import sys
+import threading
+import types
+import zlib
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.comms.binary_websocket import BinaryWebSocketHandler, PerMessageDeflate, Traffic
+
+# Text messages delivered to the server
+received = []
+
+
+class Socket:
+    def __init__(self):
+        self.data = b""
+
+    def sendall(self, data):
+        self.data += data
+
+
+def handler(frame=b"", extensions=None):
+    handler = BinaryWebSocketHandler.__new__(BinaryWebSocketHandler)
+    handler.rfile = io.BytesIO(frame)
+    handler.request = Socket()
+    handler.deflate, _ = PerMessageDeflate.negotiate(extensions)
+    handler.keep_alive = True
+    handler._send_lock = threading.Lock()
+    handler.server = types.SimpleNamespace(
+        traffic=Traffic(),
+        _ping_received_=lambda client, message: client.send_pong(message),
+        _message_received_=lambda client, message: received.append(message),
+    )
+    return handler
+
+
+def masked_frame(opcode, payload, rsv1=False):
+    mask = b"\x01\x02\x03\x04"
+    masked = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    first = 0x80 | (0x40 if rsv1 else 0) | opcode
+    if len(payload) <= 125:
+        header = struct.pack("BB", first, 0x80 | len(payload))
+    else:
+        header = struct.pack(">BBH", first, 0x80 | 126, len(payload))
+    return header + mask + masked
+
+
+def sent_frames(data):
+    """
+    (first byte, payload) of the unmasked frames sent by the server
+    """
+    frames = []
+    while data:
+        first, length = data[0], data[1]
+        data = data[2:]
+        if length == 126:
+            length, = struct.unpack(">H", data[:2])
+            data = data[2:]
+        elif length == 127:
+            length, = struct.unpack(">Q", data[:8])
+            data = data[8:]
+        frames.append((first, data[:length]))
+        data = data[length:]
+    return frames
+
+
+def client_inflate(decompressor, payload):
+    return decompressor.decompress(payload + b"\x00\x00\xff\xff")
+
+
+def client_deflate(compressor, payload):
+    return (compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH))[:-4]
+
+
+def test_ping_with_binary_payload_is_echoed():
+    payload = b"\xff\x00\xfe\x80"
+    client = handler(masked_frame(0x9, payload))
+    client.read_next_message()
+    assert client.keep_alive
+    assert client.request.data == struct.pack("BB", 0x80 | 0xA, len(payload)) + payload
+
+
+def test_negotiation():
+    deflate, response = PerMessageDeflate.negotiate(
+        "x-webkit-deflate-frame, permessage-deflate; server_max_window_bits=8, "
+        "permessage-deflate; server_no_context_takeover; client_max_window_bits"
+    )
+    # Window bits below 9 are not supported, the next offer is accepted
+    assert response == "permessage-deflate; server_no_context_takeover"
+    assert deflate.server_no_context_takeover
+    assert PerMessageDeflate.negotiate("permessage-deflate; server_max_window_bits=10")[1] == (
+        "permessage-deflate; server_max_window_bits=10"
+    )
+    assert PerMessageDeflate.negotiate("x-webkit-deflate-frame") == (None, None)
+    assert PerMessageDeflate.negotiate(None) == (None, None)
+
+
+def test_messages_below_threshold_are_not_compressed():
+    client = handler(extensions="permessage-deflate")
+    client.send_text("x" * 255)
+    [(first, payload)] = sent_frames(client.request.data)
+    assert first == 0x81
+    assert payload == b"x" * 255
+
+
+def test_compressed_messages_share_the_context():
+    client = handler(extensions="permessage-deflate")
+    rng = random.Random(19)
+    message = '{"update": {"map": [%s]}}' % ",".join(str(rng.randint(0, 10**6)) for _ in range(100))
+    client.send_text(message)
+    client.send_text(message)
+    client.send_binary(message.encode())
+    decompressor = zlib.decompressobj(-15)
+    frames = sent_frames(client.request.data)
+    assert [first for first, _ in frames] == [0xC1, 0xC1, 0xC2]
+    for _, payload in frames:
+        assert client_inflate(decompressor, payload) == message.encode()
+    # The repeated message refers to the first one
+    assert len(frames[1][1]) < len(frames[0][1]) / 4
+    assert client.server.traffic.bytes_sent == 3 * len(message)
+
+
+def test_no_context_takeover():
+    client = handler(extensions="permessage-deflate; server_no_context_takeover")
+    message = "abcdefgh" * 100
+    client.send_text(message)
+    client.send_text(message)
+    frames = sent_frames(client.request.data)
+    assert frames[0][1] == frames[1][1]
+    # Each message decompresses alone
+    for _, payload in frames:
+        assert client_inflate(zlib.decompressobj(-15), payload) == message.encode()
+
+
+def test_compressed_client_messages_are_inflated():
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    messages = ['{"command": "%s", "data": "%s"}' % (name, "y" * 300) for name in ("load", "run")]
+    frames = b"".join(
+        masked_frame(0x1, client_deflate(compressor, message.encode()), rsv1=True) for message in messages
+    )
+    client = handler(frames, extensions="permessage-deflate")
+    received.clear()
+    client.read_next_message()
+    client.read_next_message()
+    assert received == messages
+    assert client.keep_alive
+
+
+def test_compressed_frame_without_negotiation_closes_the_connection():
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    client = handler(masked_frame(0x1, client_deflate(compressor, b"hello"), rsv1=True))
+    received.clear()
+    client.read_next_message()
+    assert not client.keep_alive
+    assert received == []
@@ -0,0 +1,115 @@
+"""
+Tests of the delta encoding of GUI updates: applying diff(old, new) to old must
+give new exactly, with the same JSON types.
+
+    python3 -m pytest test/test_delta.py
+"""
+
+import json
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.comms.delta import DeltaEncoder, apply_patch, diff
+
+
+def strict_equal(a, b):
+    """
+    == that tells 1, 1.0 and True apart, like a JSON client does
+    """
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(strict_equal(a[key], b[key]) for key in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(strict_equal(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def round_trip(old, new):
+    patched = apply_patch(json.loads(json.dumps(old)), json.loads(json.dumps(diff(old, new))))
+    return strict_equal(patched, new)
+
+
+scalars = [0, 1, -1, 1.0, 0.0, True, False, None, "", "1", "a/b", "~0"]
+
+
+def random_value(rng, depth=0):
+    kind = rng.random()
+    if depth < 3 and kind < 0.25:
+        return {rng.choice("abc/~"): random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    if depth < 3 and kind < 0.5:
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return rng.choice(scalars)
+
+
+def mutate(rng, value):
+    if isinstance(value, dict):
+        value = dict(value)
+        for key in list(value):
+            if rng.random() < 0.3:
+                value[key] = mutate(rng, value[key])
+            elif rng.random() < 0.1:
+                del value[key]
+        if rng.random() < 0.2:
+            value[rng.choice("abcd")] = random_value(rng, 2)
+        return value
+    if isinstance(value, list):
+        value = [mutate(rng, item) if rng.random() < 0.3 else item for item in value]
+        if rng.random() < 0.2:
+            value.append(random_value(rng, 2))
+        if value and rng.random() < 0.2:
+            value.pop()
+        return value
+    return rng.choice(scalars) if rng.random() < 0.5 else value
+
+
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        ({"a": {"x": True}}, {"a": {"x": 1}}),
+        ({"a": {"x": 0}}, {"a": {"x": False}}),
+        ({"a": [1]}, {"a": [1.0]}),
+        ([[1, True]], [[True, 1]]),
+        ({"a": 1}, [1]),
+        ({"a/b": 1, "~": 2}, {"a/b": 2}),
+        ([1, 2, 3], [1]),
+        ([1], [1, 2, 3]),
+    ],
+)
+def test_round_trip_is_type_strict(old, new):
+    assert round_trip(old, new)
+
+
+def test_round_trip_fuzz():
+    rng = random.Random(2303)
+    for _ in range(3000):
+        old = random_value(rng)
+        new = mutate(rng, old)
+        assert round_trip(old, new), (old, new)
+
+
+def test_equal_states_have_no_patch():
+    assert diff({"a": [1, {"b": 2.5}], "c": "x"}, {"c": "x", "a": [1, {"b": 2.5}]}) == []
+
+
+def test_encoder_sends_keyframe_then_patches():
+    encoder = DeltaEncoder(keyframe_interval=60)
+    state = {"map": list(range(200)), "pose": [0, 0]}
+    client = {}
+    for step in range(5):
+        state["pose"] = [step, step * 2]
+        data = encoder.encode(json.dumps(state))
+        message = json.loads(data)
+        assert message["seq"] == step + 1
+        if step == 0:
+            assert "update" in message
+            client = message["update"]
+        else:
+            client = apply_patch(client, message["patch"])
+        assert strict_equal(client, state)
+    assert encoder.encode(json.dumps(state)) is None
+    assert encoder.stats()["keyframes"] == 1
@@ -0,0 +1,98 @@
+"""
+Tests of the in process checks run before pylint. They must never report an
+error pylint would not report.
+
+    python3 -m pytest test/test_fast_check.py
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.manager.lint.fast_check import fast_check
+
+loop = "\nwhile True:\n    pass\n"
+undefined = re.compile(r"user_code:(\d+):\d+: E0602: Undefined variable '(\w+)'")
+
+# Code that pylint accepts: no name may be reported
+accepted = {
+    "class_body": "class A:\n    name = __qualname__\n    module = __module__\n" + loop,
+    "method_class": "class A:\n    def f(self):\n        return __class__\n" + loop,
+    "module_names": "print(__file__, __name__, __doc__, __spec__, __builtins__)" + loop,
+    "comprehension": "squares = [x * x for x in range(3)]" + loop,
+    "later_function": "def f():\n    return g()\n\ndef g():\n    return 1\n" + loop,
+    "guarded": "try:\n    profile\nexcept NameError:\n    profile = None\n" + loop,
+    "star_import": "from math import *\nprint(pi)" + loop,
+    "match": "match 1:\n    case [a, *rest]:\n        print(a, rest)\n    case {**others}:\n        print(others)\n" + loop,
+    "globals": "def f():\n    global counter\n    counter = 1\nprint(counter)" + loop,
+    "walrus": "if (n := 3) > 2:\n    print(n)" + loop,
+}
+
+# Code with undefined names
+rejected = {
+    "typo": ("import math\nwhile True:\n    print(mth.pi)\n", [(3, "mth")]),
+    "qualname_outside_class": ("print(__qualname__)" + loop, [(1, "__qualname__")]),
+    "in_function": ("def f():\n    return speed\n" + loop, [(2, "speed")]),
+}
+
+
+@pytest.mark.parametrize("name", sorted(accepted))
+def test_accepted_code_has_no_error(name):
+    errors, main_loop = fast_check(accepted[name])
+    assert errors == ""
+    assert main_loop is not None
+
+
+@pytest.mark.parametrize("name", sorted(rejected))
+def test_undefined_names_are_reported(name):
+    code, expected = rejected[name]
+    errors, _ = fast_check(code)
+    reported = [(int(line), variable) for line, variable in undefined.findall(errors)]
+    assert reported == expected
+
+
+def test_syntax_error_is_reported():
+    errors, main_loop = fast_check("while True\n    pass\n")
+    assert "E0001" in errors
+    assert main_loop is None
+
+
+def test_code_without_main_loop():
+    assert fast_check("print(1)\n") == ("", None)
+
+
+def pylint_undefined(folder, names):
+    """
+    (file, line, name) of the undefined-variable errors pylint reports
+    """
+    result = subprocess.run(
+        [sys.executable, "-m", "pylint", "--disable=all", "--enable=undefined-variable"]
+        + [os.path.join(folder, f"{name}.py") for name in names],
+        capture_output=True,
+        text=True,
+    )
+    return set(
+        (os.path.basename(path)[:-3], int(line), variable)
+        for path, line, variable in re.findall(
+            r"^(.*?\.py):(\d+):\d+: E0602: Undefined variable '(\w+)'", result.stdout, re.M
+        )
+    )
+
+
+def test_fast_check_agrees_with_pylint(tmp_path):
+    pytest.importorskip("pylint")
+    samples = dict(accepted)
+    samples.update({name: code for name, (code, _) in rejected.items()})
+    for name, code in samples.items():
+        (tmp_path / f"{name}.py").write_text(code)
+
+    expected = pylint_undefined(str(tmp_path), samples)
+    for name, code in samples.items():
+        errors, _ = fast_check(code)
+        for line, variable in undefined.findall(errors):
+            assert (name, int(line), variable) in expected
+    assert {name for name, _, _ in expected} == set(rejected)
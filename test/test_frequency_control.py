@@ -0,0 +1,126 @@
+"""
+Tests of the main loop rate control: which loop is rewritten, and the deadlines
+of RateController, on a virtual clock.
+
+    python3 -m pytest test/test_frequency_control.py
+"""
+
+import ast
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.manager.application.frequency_control import add_frequency_control
+from src.manager.manager.application.workspace import ram_rate_control
+from src.manager.manager.application.workspace.ram_rate_control import RateController
+from src.manager.manager.lint.fast_check import fast_check
+
+tick_call = '__import__("ram_rate_control").tick('
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import HAL\nwhile True:\n    HAL.setV(1)\n",
+        "x = 0\nwhile 1:  # main loop\n    x += 1\n",
+        "def main():\n    while True:\n        pass\n\nmain()\n",
+        "while x < 10:\n    x += 1\n",
+        "class A:\n    while True:\n        pass\n",
+    ],
+)
+def test_splicer_rewrites_the_loop_the_linter_accepts(code):
+    _, lint_loop = fast_check(code)
+    rewritten = add_frequency_control(code, 20)
+    assert (tick_call in rewritten) == (lint_loop is not None)
+    if lint_loop is not None:
+        # Only the loop header changes, so line numbers still match
+        assert rewritten.splitlines()[lint_loop.lineno - 1].startswith("while " + tick_call)
+        assert len(rewritten.splitlines()) == len(code.splitlines())
+        ast.parse(rewritten)
+
+
+class Clock:
+    """
+    Virtual time.perf_counter_ns / time.sleep
+    """
+
+    def __init__(self):
+        self.now = 1_000_000_000
+        self.sleeps = []
+
+    def perf_counter_ns(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += int(seconds * 1e9)
+
+    def work(self, seconds):
+        self.now += int(seconds * 1e9)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ram_rate_control, "time", types.SimpleNamespace(
+        perf_counter_ns=clock.perf_counter_ns, sleep=clock.sleep))
+    return clock
+
+
+def test_deadlines_do_not_drift(clock):
+    rate = RateController(100)
+    start = clock.now
+    for _ in range(101):
+        rate.tick()
+        clock.work(0.003)
+    # 100 periods after the first tick, whatever the work took
+    assert clock.now - start == pytest.approx(100 * 10_000_000 + 3_000_000, abs=1000)
+    assert rate.overruns == 0
+    assert all(sleep == pytest.approx(0.007, abs=1e-6) for sleep in clock.sleeps)
+
+
+def test_skip_policy_keeps_the_phase(clock):
+    rate = RateController(100, "skip")
+    rate.tick()
+    first_deadline = rate.deadline
+    clock.work(0.035)
+    rate.tick()
+    # Deadlines at 10, 20 and 30 ms passed: this late iteration takes the last one
+    assert rate.overruns == 1
+    assert rate.skipped == 2
+    # Next deadline on the original grid
+    assert (rate.deadline - first_deadline) % rate.period_ns == 0
+    assert rate.deadline > clock.now
+
+
+def test_catch_up_policy_runs_missed_cycles_back_to_back(clock):
+    rate = RateController(100, "catch_up")
+    rate.tick()
+    clock.work(0.035)
+    # One iteration per missed deadline (10, 20 and 30 ms), then back on time
+    for _ in range(3):
+        rate.tick()
+    assert clock.sleeps == []
+    assert rate.overruns == 3
+    assert rate.skipped == 0
+    rate.tick()
+    assert clock.sleeps == [pytest.approx(0.005)]
+
+
+def test_catch_up_policy_skips_long_stalls(clock):
+    rate = RateController(100, "catch_up", max_burst=5)
+    rate.tick()
+    clock.work(0.5)
+    rate.tick()
+    assert rate.skipped == 49
+    assert rate.deadline > clock.now
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        RateController(0)
+    with pytest.raises(ValueError):
+        RateController(10, "fastest")
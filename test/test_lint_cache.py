@@ -0,0 +1,65 @@
+"""
+Tests of the lint result cache: what the key depends on, the LRU bound and the
+entries kept on disk.
+
+    python3 -m pytest test/test_lint_cache.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.manager.lint.lint_cache import LintCache
+
+
+def test_key_depends_on_everything_the_result_depends_on():
+    cache = LintCache()
+    base = ("x = 1\n", "follow_line", "humble", "pylint")
+    key = cache.key(*base)
+    assert cache.key(*base) == key
+    for index, other in enumerate(("x = 2\n", "vacuum_cleaner", "noetic", "fast")):
+        changed = list(base)
+        changed[index] = other
+        assert cache.key(*changed) != key
+    assert cache.key(*base, warnings=True) != key
+
+    cache._pylint_version = "0.0.1"
+    assert cache.key(*base) != key
+
+
+def test_key_parts_cannot_be_shifted():
+    cache = LintCache()
+    assert cache.key("code", "a", "b", "c") != cache.key("code", "a", "bc", "")
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LintCache(max_entries=2)
+    cache.put("a", "errors a")
+    cache.put("b", "errors b")
+    assert cache.get("a") == "errors a"
+    cache.put("c", "errors c")
+    assert cache.get("b") is None
+    assert cache.get("a") == "errors a"
+    assert cache.get("c") == "errors c"
+    assert cache.stats() == {"hits": 3, "misses": 1, "hit_ratio": 0.75, "entries": 2}
+
+
+def test_entries_survive_a_restart(tmp_path):
+    cache = LintCache(directory=str(tmp_path))
+    key = cache.key("x = 1\n", "follow_line", "humble", "pylint")
+    cache.put(key, "")
+    cache.put("other", "E0602")
+
+    cache = LintCache(max_entries=1, directory=str(tmp_path))
+    assert cache.get(key) == ""
+    assert cache.get("other") == "E0602"
+    assert cache.get("missing") is None
+    assert cache.stats()["entries"] == 1
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    (tmp_path / "broken.json").write_text("{not json")
+    cache = LintCache(directory=str(tmp_path))
+    assert cache.get("broken") is None
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,195 @@
+"""
+Tests of the simulation control client and of the order in which the manager
+calls it around the application.
+
+    python3 -m pytest test/test_simulation_control.py
+"""
+
+import os
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.libs import simulation_control
+from src.manager.libs.simulation_control import SimulationControl, SimulationControlError
+
+
+class Future:
+    """
+    rclpy future answered after `delay` seconds, or never when delay is None
+    """
+
+    def __init__(self, delay):
+        self._done = threading.Event()
+        self.cancelled = False
+        if delay is not None:
+            threading.Timer(delay, self._done.set).start()
+
+    def done(self):
+        return self._done.is_set()
+
+    def add_done_callback(self, callback):
+        def wait():
+            self._done.wait()
+            callback(self)
+
+        threading.Thread(target=wait, daemon=True).start()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def exception(self):
+        return None
+
+
+class Client:
+    def __init__(self, ready=True, delay=0.0):
+        self.ready = ready
+        self.delay = delay
+        self.futures = []
+
+    def service_is_ready(self):
+        return self.ready
+
+    def wait_for_service(self, timeout_sec):
+        time.sleep(timeout_sec)
+        return self.ready
+
+    def call_async(self, request):
+        future = Future(self.delay)
+        self.futures.append(future)
+        return future
+
+
+@pytest.fixture
+def fake_ros(monkeypatch):
+    """
+    SimulationControl with rclpy replaced by clients answering as configured
+    """
+    monkeypatch.setattr(simulation_control, "rclpy", types.SimpleNamespace())
+    monkeypatch.setattr(simulation_control, "Empty", types.SimpleNamespace(Request=object), raising=False)
+
+    def control(**clients):
+        control = SimulationControl(timeout=0.2)
+        control.node = object()
+        control.clients = {name: clients.get(name, Client()) for name in control.services}
+        return control
+
+    return control
+
+
+def test_fallback_calls_the_cli(monkeypatch):
+    commands = []
+    monkeypatch.setattr(simulation_control, "rclpy", None)
+    monkeypatch.setattr(simulation_control.subprocess, "call", lambda command, **kwargs: commands.append(command))
+
+    SimulationControl().pause_and_reset()
+
+    assert commands == [
+        "ros2 service call /pause_physics std_srvs/srv/Empty",
+        "ros2 service call /reset_world std_srvs/srv/Empty",
+    ]
+
+
+def test_calls_run_concurrently(fake_ros):
+    pause, reset = Client(delay=0.1), Client(delay=0.1)
+    control = fake_ros(pause=pause, reset=reset)
+
+    start = time.monotonic()
+    control.pause_and_reset()
+
+    assert time.monotonic() - start < 0.19
+    assert len(pause.futures) == len(reset.futures) == 1
+
+
+def test_unanswered_call_times_out(fake_ros):
+    unpause = Client(delay=None)
+    control = fake_ros(unpause=unpause)
+
+    start = time.monotonic()
+    with pytest.raises(SimulationControlError, match="did not answer"):
+        control.unpause()
+
+    assert time.monotonic() - start < 0.5
+    assert unpause.futures[0].cancelled
+
+
+def test_missing_service_times_out(fake_ros):
+    control = fake_ros(reset=Client(ready=False))
+
+    with pytest.raises(SimulationControlError, match="not available"):
+        control.reset()
+
+
+@pytest.mark.skipif(simulation_control.rclpy is None, reason="rclpy is not installed")
+def test_stand_in_services():
+    services = {name: f"/ram_test{service}" for name, service in SimulationControl.services.items()}
+    stand_in = simulation_control.SimulationServicesStandIn(services)
+    threading.Thread(target=stand_in.spin, daemon=True).start()
+    control = SimulationControl(timeout=5, services=services)
+    try:
+        control.pause_and_reset()
+        control.unpause()
+        assert sorted(stand_in.calls) == sorted(services.values())
+    finally:
+        control.shutdown()
+        stand_in.shutdown()
+
+
+class Process:
+    def __init__(self):
+        self.calls = []
+
+    def suspend(self):
+        self.calls.append("suspend")
+
+    def resume(self):
+        self.calls.append("resume")
+
+
+def failing_sim():
+    raise SimulationControlError("Service /pause_physics did not answer within 2.0 seconds")
+
+
+def manager(**attributes):
+    from src.manager.manager.manager import Manager
+
+    fake = types.SimpleNamespace(**attributes)
+    for name in ("running_application", "unpause_sim_for_application"):
+        if name not in attributes:
+            setattr(fake, name, getattr(Manager, name).__get__(fake))
+    return Manager, fake
+
+
+@pytest.mark.parametrize("transition", ["on_pause", "on_resume"])
+def test_process_untouched_when_the_simulation_fails(transition):
+    process = Process()
+    Manager, fake = manager(
+        pause_sim=failing_sim,
+        unpause_sim=failing_sim,
+        running_application=lambda: process,
+    )
+
+    with pytest.raises(SimulationControlError):
+        getattr(Manager, transition)(fake, None)
+
+    assert process.calls == []
+
+
+def test_application_stopped_when_the_simulation_fails(monkeypatch):
+    from src.manager.manager import manager as manager_module
+
+    stopped = []
+    monkeypatch.setattr(manager_module, "stop_process_and_children", stopped.append)
+    application = object()
+    _, fake = manager(application_process=application, unpause_sim=failing_sim)
+
+    with pytest.raises(SimulationControlError):
+        fake.unpause_sim_for_application()
+
+    assert stopped == [application]
+    assert fake.application_process is None
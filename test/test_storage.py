@@ -0,0 +1,124 @@
+"""
+Tests of the workspace storage budget: least recently used artifacts are evicted
+first, and protected, in use, young or in progress artifacts never are.
+
+    python3 -m pytest test/test_storage.py
+"""
+
+import hashlib
+import os
+import sys
+import time
+import zipfile
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.comms.uploads import UploadStore
+from src.manager.libs.storage import WorkspaceStorage, min_age, parse_size, tree_size
+from src.manager.libs.universe_cache import UniverseCache
+
+kib = 1024
+
+
+def write(path, size, age):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    used = time.time() - age
+    os.utime(path, (used, used))
+    return str(path)
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    universes = UniverseCache(str(tmp_path / "worlds"))
+    uploads = UploadStore(str(tmp_path / "uploads"))
+    protected = set()
+    storage = WorkspaceStorage(
+        universes, uploads, budget=100 * kib, workspace=str(tmp_path), protected=lambda: protected
+    )
+    storage.protected_paths = protected
+    return storage
+
+
+def install_universe(storage, tmp_path, name, size, age):
+    path = tmp_path / f"{name}.zip"
+    with zipfile.ZipFile(path, "w") as zip_ref:
+        zip_ref.writestr(f"{name}/model.dae", os.urandom(size))
+    sha256 = hashlib.sha256(path.read_bytes()).hexdigest()
+    storage.universe_cache.install(name, str(path), sha256)
+    used = time.time() - age
+    os.utime(storage.universe_cache._manifest_path(sha256), (used, used))
+    return storage.universe_cache.entry(sha256)
+
+
+def test_parse_size():
+    assert parse_size(5000) == 5000
+    assert parse_size("500M") == 500 * 1024 * 1024
+    assert parse_size("20GiB") == 20 * 1024 ** 3
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_hardlinked_files_are_counted_once(tmp_path):
+    first = write(tmp_path / "a" / "file", 10 * kib, 0)
+    os.makedirs(tmp_path / "b")
+    os.link(first, tmp_path / "b" / "file")
+    assert tree_size(str(tmp_path / "a")) + tree_size(str(tmp_path / "b")) == 10 * kib
+
+
+def test_within_budget_nothing_is_evicted(workspace):
+    write(os.path.join(workspace.binaries, "a"), 50 * kib, 3600)
+    assert workspace.enforce() == []
+
+
+def test_least_recently_used_are_evicted_first(workspace):
+    oldest = write(os.path.join(workspace.binaries, "oldest"), 40 * kib, 3 * 3600)
+    older = write(os.path.join(workspace.binaries, "older"), 40 * kib, 2 * 3600)
+    recent = write(os.path.join(workspace.binaries, "recent"), 40 * kib, 3600)
+    assert workspace.enforce() == [oldest]
+    assert workspace.enforce(reserve=30 * kib) == [older]
+    assert os.path.exists(recent)
+    assert workspace.evictions == 2
+    assert workspace.evicted_bytes == 80 * kib
+
+
+def test_young_artifacts_are_kept(workspace):
+    young = write(os.path.join(workspace.binaries, "young"), 80 * kib, min_age / 2)
+    old = write(os.path.join(workspace.binaries, "old"), 30 * kib, 2 * min_age)
+    assert workspace.enforce(reserve=50 * kib) == [old]
+    assert os.path.exists(young)
+
+
+def test_protected_artifacts_are_kept(workspace, tmp_path):
+    # Least recently used, but the universe of the running world
+    in_use = install_universe(workspace, tmp_path, "running", 60 * kib, 3 * 3600)
+    workspace.protected_paths.add(in_use)
+    unused = install_universe(workspace, tmp_path, "unused", 30 * kib, 3600)
+    write(os.path.join(workspace.code, "academy.py"), 30 * kib, 3600)
+
+    assert workspace.enforce() == [unused]
+    assert os.path.isdir(in_use)
+    assert os.path.exists(os.path.join(workspace.code, "academy.py"))
+    # Its name no longer points to a removed entry
+    assert not os.path.lexists(os.path.join(workspace.universe_cache.directory, "unused"))
+    assert workspace.universe_cache.current("running") == os.path.basename(in_use)
+
+
+def test_uploads_in_progress_are_kept(workspace):
+    content = b"x" * (80 * kib)
+    sha256 = hashlib.sha256(content).hexdigest()
+    workspace.uploads.start({"sha256": sha256, "size": len(content) * 2})
+    part = os.path.join(workspace.uploads.directory, sha256 + ".part")
+    write(part, len(content), 3600)
+    finished = write(os.path.join(workspace.uploads.directory, "0" * 64), 40 * kib, 2 * 3600)
+    assert workspace.enforce() == [finished]
+    assert os.path.exists(part)
+
+
+def test_over_budget_with_everything_in_use(workspace):
+    young = write(os.path.join(workspace.binaries, "young"), 150 * kib, 0)
+    assert workspace.enforce() == []
+    assert os.path.exists(young)
+    assert workspace.stats()["used"] == 150 * kib
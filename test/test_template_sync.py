@@ -0,0 +1,94 @@
+"""
+Tests of the incremental staging of exercise templates: only changed files are
+copied, and files modified in the destination are staged again.
+
+    python3 -m pytest test/test_template_sync.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.libs.template_sync import TemplateSync
+
+
+@pytest.fixture
+def template(tmp_path):
+    source = tmp_path / "template"
+    (source / "interfaces").mkdir(parents=True)
+    (source / "empty").mkdir()
+    (source / "HAL.py").write_text("def setV(v): pass\n")
+    (source / "GUI.py").write_text("class GUI: pass\n")
+    (source / "interfaces" / "motors.py").write_text("speed = 0\n")
+    return source
+
+
+def read(destination, relative):
+    return (destination / relative).read_text()
+
+
+def test_first_sync_copies_everything(template, tmp_path):
+    destination = tmp_path / "code"
+    report = TemplateSync().sync(str(template), str(destination))
+    assert report["files"] == 3
+    assert report["files_copied"] == 3
+    assert report["bytes_copied"] == sum(
+        (template / relative).stat().st_size for relative in ("HAL.py", "GUI.py", "interfaces/motors.py")
+    )
+    assert read(destination, "interfaces/motors.py") == "speed = 0\n"
+    assert (destination / "empty").is_dir()
+
+
+def test_unchanged_template_copies_nothing(template, tmp_path):
+    destination = tmp_path / "code"
+    sync = TemplateSync()
+    sync.sync(str(template), str(destination))
+    report = sync.sync(str(template), str(destination))
+    assert report["files_copied"] == 0
+    assert report["bytes_copied"] == 0
+    assert sync.last_report is report
+
+
+def test_only_changed_files_are_copied(template, tmp_path):
+    destination = tmp_path / "code"
+    sync = TemplateSync()
+    sync.sync(str(template), str(destination))
+    (template / "HAL.py").write_text("def setV(v, w=0): pass\n")
+    (template / "interfaces" / "camera.py").write_text("image = None\n")
+    report = sync.sync(str(template), str(destination))
+    assert report["files"] == 4
+    assert report["files_copied"] == 2
+    assert read(destination, "HAL.py") == "def setV(v, w=0): pass\n"
+    assert read(destination, "interfaces/camera.py") == "image = None\n"
+
+
+def test_touched_but_identical_template_file_is_not_copied(template, tmp_path):
+    destination = tmp_path / "code"
+    sync = TemplateSync()
+    sync.sync(str(template), str(destination))
+    os.utime(template / "GUI.py", ns=(1, 1))
+    assert sync.sync(str(template), str(destination))["files_copied"] == 0
+
+
+def test_destination_changes_are_staged_again(template, tmp_path):
+    destination = tmp_path / "code"
+    sync = TemplateSync()
+    sync.sync(str(template), str(destination))
+    (destination / "GUI.py").write_text("broken by the application")
+    (destination / "interfaces" / "motors.py").unlink()
+    (destination / "academy.py").write_text("while True: pass\n")
+    report = sync.sync(str(template), str(destination))
+    assert report["files_copied"] == 2
+    assert read(destination, "GUI.py") == "class GUI: pass\n"
+    assert read(destination, "interfaces/motors.py") == "speed = 0\n"
+    # Files that are not part of the template are left alone
+    assert read(destination, "academy.py") == "while True: pass\n"
+
+
+def test_destinations_are_tracked_separately(template, tmp_path):
+    sync = TemplateSync()
+    sync.sync(str(template), str(tmp_path / "a"))
+    assert sync.sync(str(template), str(tmp_path / "b"))["files_copied"] == 3
+    assert sync.sync(str(template), str(tmp_path / "a"))["files_copied"] == 0
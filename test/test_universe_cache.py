@@ -0,0 +1,129 @@
+"""
+Tests of the cache of extracted universes: cached versions are reused, unchanged
+entries of a new version are hardlinked, and the name is swapped atomically.
+
+    python3 -m pytest test/test_universe_cache.py
+"""
+
+import hashlib
+import os
+import sys
+import threading
+import zipfile
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.libs import universe_cache
+from src.manager.libs.universe_cache import UniverseCache
+
+
+def archive(tmp_path, files):
+    path = tmp_path / f"universe-{len(os.listdir(tmp_path))}.zip"
+    with zipfile.ZipFile(path, "w") as zip_ref:
+        for name, content in files.items():
+            zip_ref.writestr(name, content)
+    with open(path, "rb") as f:
+        return str(path), hashlib.sha256(f.read()).hexdigest()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return UniverseCache(str(tmp_path / "worlds"), workers=4)
+
+
+version_1 = {"world/": "", "world/model.sdf": "<sdf/>", "world/meshes/wall.dae": "wall" * 100}
+version_2 = dict(version_1, **{"world/model.sdf": "<sdf version='2'/>", "world/launch.py": "pass"})
+
+
+def read(cache, name, relative):
+    with open(os.path.join(cache.directory, name, relative)) as f:
+        return f.read()
+
+
+def test_cached_version_is_not_extracted_again(cache, tmp_path):
+    path, sha256 = archive(tmp_path, version_1)
+    report = cache.install("maze", path, sha256)
+    assert not report["cached"]
+    assert report["files_extracted"] == 2
+    assert report["files_reused"] == 0
+
+    os.remove(path)
+    report = cache.install("maze", path, sha256)
+    assert report["cached"]
+    assert cache.current("maze") == sha256
+    assert read(cache, "maze", "world/model.sdf") == "<sdf/>"
+
+
+def test_unchanged_entries_are_hardlinked(cache, tmp_path):
+    path, sha1 = archive(tmp_path, version_1)
+    cache.install("maze", path, sha1)
+    path, sha2 = archive(tmp_path, version_2)
+    report = cache.install("maze", path, sha2)
+    assert report["files_extracted"] == 2
+    assert report["files_reused"] == 1
+    assert report["bytes_extracted"] == len(version_2["world/model.sdf"]) + len("pass")
+
+    wall = os.path.join("world", "meshes", "wall.dae")
+    assert os.path.samefile(os.path.join(cache.entry(sha1), wall), os.path.join(cache.entry(sha2), wall))
+    # The previous version is left as it was
+    with open(os.path.join(cache.entry(sha1), "world", "model.sdf")) as f:
+        assert f.read() == "<sdf/>"
+    assert read(cache, "maze", "world/model.sdf") == "<sdf version='2'/>"
+
+
+def test_unsafe_names_are_never_reused():
+    assert not universe_cache._safe_name("../escape")
+    assert not universe_cache._safe_name("/absolute")
+    assert universe_cache._safe_name("world/model.sdf")
+
+
+def test_failed_extraction_leaves_no_entry(cache, tmp_path, monkeypatch):
+    path, sha256 = archive(tmp_path, version_1)
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(universe_cache, "_extract_entries", fail)
+    with pytest.raises(OSError):
+        cache.install("maze", path, sha256)
+    assert os.listdir(cache.store) == []
+    assert cache.current("maze") is None
+
+
+def test_directory_of_an_older_ram_is_replaced(cache, tmp_path):
+    os.makedirs(os.path.join(cache.directory, "maze", "old"))
+    path, sha256 = archive(tmp_path, version_1)
+    cache.install("maze", path, sha256)
+    assert os.path.islink(os.path.join(cache.directory, "maze"))
+    assert read(cache, "maze", "world/model.sdf") == "<sdf/>"
+
+
+def test_symlink_is_swapped_atomically(cache, tmp_path):
+    path1, sha1 = archive(tmp_path, version_1)
+    path2, sha2 = archive(tmp_path, version_2)
+    cache.install("maze", path1, sha1)
+    cache.install("maze", path2, sha2)
+
+    link = os.path.join(cache.directory, "maze")
+    seen = set()
+    missing = []
+    done = threading.Event()
+
+    def watch():
+        while not done.is_set():
+            try:
+                seen.add(os.path.basename(os.readlink(link)))
+            except OSError:
+                missing.append(True)
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    for _ in range(200):
+        cache.install("maze", path1, sha1)
+        cache.install("maze", path2, sha2)
+    done.set()
+    watcher.join()
+    assert not missing
+    assert seen <= {sha1, sha2}
+    assert [name for name in os.listdir(cache.directory) if ".link-" in name] == []
@@ -0,0 +1,35 @@
+"""
+Tests of the coalescing of GUI updates: parsed and unparsed updates of the same
+kind replace each other.
+
+    python3 -m pytest test/test_update_scheduler.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.comms.fast_message import RawJson
+from src.manager.comms.update_scheduler import UpdateScheduler
+
+
+def test_parsed_and_unparsed_updates_share_the_key():
+    scheduler = UpdateScheduler()
+    text = '{"map": [1, 2], "pose": [0, 0]}'
+    assert scheduler.coalescing_key({"map": [1, 2], "pose": [0, 0]}) == scheduler.coalescing_key(RawJson(text))
+    assert scheduler.coalescing_key({"map": [1]}) == scheduler.coalescing_key(RawJson(text))
+    assert scheduler.coalescing_key({"pose": [0, 0]}) != scheduler.coalescing_key(RawJson(text))
+
+
+def test_updates_of_unknown_kind_are_not_merged():
+    scheduler = UpdateScheduler()
+    assert scheduler.coalescing_key({}) != scheduler.coalescing_key({})
+    assert scheduler.coalescing_key(RawJson("[1]")) != scheduler.coalescing_key(RawJson("[1]"))
+
+
+def test_latest_update_of_a_kind_wins():
+    scheduler = UpdateScheduler()
+    scheduler.put({"image": 1, "fps": 10})
+    scheduler.put(RawJson('{"image": 2}'))
+    assert scheduler.merged == 1
+    assert [update.text for update in scheduler._pending.values()] == ['{"image": 2}']
@@ -0,0 +1,99 @@
+"""
+Tests of the chunked uploads: chunks out of order, larger than announced or
+with a wrong checksum are rejected, and interrupted uploads resume.
+
+    python3 -m pytest test/test_uploads.py
+"""
+
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.comms.uploads import UploadError, UploadStore, chunk_header, chunk_magic
+
+content = bytes(range(256)) * 40
+sha256 = hashlib.sha256(content).hexdigest()
+
+
+def chunk(offset, data, digest=sha256):
+    return chunk_header.pack(chunk_magic, bytes.fromhex(digest), offset) + data
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(str(tmp_path))
+
+
+def test_upload_in_chunks(store):
+    assert store.start({"sha256": sha256, "size": len(content)})["offset"] == 0
+    assert store.write_chunk(chunk(0, content[:4000])) == (sha256, 4000)
+    assert store.write_chunk(chunk(4000, content[4000:])) == (sha256, len(content))
+    assert store.finish({"sha256": sha256}) == {"upload": sha256, "size": len(content), "complete": True}
+    with open(store.path(sha256), "rb") as f:
+        assert f.read() == content
+    # Already uploaded
+    assert store.start({"sha256": sha256, "size": len(content)})["complete"]
+
+
+def test_wrong_offset_is_rejected(store):
+    store.start({"sha256": sha256, "size": len(content)})
+    store.write_chunk(chunk(0, content[:100]))
+    for offset in (0, 50, 200):
+        with pytest.raises(UploadError, match="expected offset 100"):
+            store.write_chunk(chunk(offset, content[offset : offset + 100]))
+    assert store.write_chunk(chunk(100, content[100:200])) == (sha256, 200)
+
+
+def test_chunk_beyond_size_is_rejected(store):
+    store.start({"sha256": sha256, "size": len(content)})
+    with pytest.raises(UploadError, match="larger than announced"):
+        store.write_chunk(chunk(0, content + b"x"))
+    assert store.write_chunk(chunk(0, content)) == (sha256, len(content))
+
+
+def test_invalid_start_is_rejected(store):
+    with pytest.raises(UploadError):
+        store.start({"sha256": "abc", "size": 1})
+    with pytest.raises(UploadError):
+        store.start({"sha256": sha256, "size": -1})
+    with pytest.raises(UploadError):
+        store.start({"sha256": sha256})
+    with pytest.raises(UploadError, match="was not started"):
+        store.write_chunk(chunk(0, content))
+    with pytest.raises(UploadError):
+        store.write_chunk(chunk_magic + b"short")
+
+
+def test_checksum_mismatch_is_rejected(store):
+    other = hashlib.sha256(b"other").hexdigest()
+    store.start({"sha256": other, "size": len(content)})
+    store.write_chunk(chunk(0, content, other))
+    with pytest.raises(UploadError, match="checksum mismatch"):
+        store.finish({"sha256": other})
+    # The upload starts over
+    with pytest.raises(UploadError, match="Unknown upload"):
+        store.path(other)
+    assert store.start({"sha256": other, "size": len(content)})["offset"] == 0
+
+
+def test_incomplete_upload_is_rejected(store):
+    store.start({"sha256": sha256, "size": len(content)})
+    store.write_chunk(chunk(0, content[:10]))
+    with pytest.raises(UploadError, match="incomplete"):
+        store.finish({"sha256": sha256})
+
+
+def test_interrupted_upload_resumes(tmp_path):
+    store = UploadStore(str(tmp_path))
+    store.start({"sha256": sha256, "size": len(content)})
+    store.write_chunk(chunk(0, content[:3000]))
+
+    # A new store, as after a restart of RAM
+    store = UploadStore(str(tmp_path))
+    assert store.start({"sha256": sha256, "size": len(content)})["offset"] == 3000
+    store.write_chunk(chunk(3000, content[3000:]))
+    assert store.finish({"sha256": sha256})["complete"]
+    assert store.stats() == {"in_progress": 0, "completed": 1, "bytes_received": len(content) - 3000}
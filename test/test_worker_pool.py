@@ -0,0 +1,125 @@
+"""
+Tests of the pool of lint workers, with a stub worker speaking the protocol of
+lint_worker.py: reuse, recycling, failures and the fallback to a checker process.
+
+    python3 -m pytest test/test_worker_pool.py
+"""
+
+import os
+import sys
+import threading
+import types
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.manager.lint import linter, worker_pool
+from src.manager.manager.lint.worker_pool import LintWorkerError, LintWorkerPool
+
+stub_worker = """
+import json, os, sys, time
+
+for line in sys.stdin:
+    request = json.loads(line)
+    code = request["code"]
+    if code == "crash":
+        sys.exit(1)
+    if code == "hang":
+        time.sleep(30)
+    if code == "fail":
+        reply = {"id": request["id"], "error": "ValueError: fail"}
+    else:
+        reply = {"id": request["id"], "output": f"{os.getpid()}|{code}|{request['options']}"}
+    print(json.dumps(reply), flush=True)
+"""
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    script = tmp_path / "stub_worker.py"
+    script.write_text(stub_worker)
+    monkeypatch.setattr(worker_pool, "worker_script", str(script))
+    pool = LintWorkerPool(max_workers=2, max_requests=3, timeout=2)
+    yield pool
+    pool.shutdown()
+
+
+def lint(pool, code="x = 1", key="humble"):
+    pid, linted, options = pool.lint(key, "/templates", code, ["--disable=C0114"]).split("|")
+    assert linted == code
+    assert options == "['--disable=C0114']"
+    return int(pid)
+
+
+def test_worker_is_reused(pool):
+    pid = lint(pool)
+    assert lint(pool) == pid
+    assert pool.pids() == {pid}
+
+
+def test_workers_per_key(pool):
+    assert lint(pool, key="humble") != lint(pool, key="noetic")
+    assert len(pool.pids()) == 2
+
+
+def test_worker_is_recycled_after_max_requests(pool):
+    pids = [lint(pool) for _ in range(4)]
+    assert pids[:3] == [pids[0]] * 3
+    assert pids[3] != pids[0]
+    assert pool.pids() == {pids[3]}
+
+
+def test_failed_workers_are_replaced(pool):
+    pid = lint(pool)
+    with pytest.raises(LintWorkerError, match="exited"):
+        pool.lint("humble", "/templates", "crash", [])
+    assert lint(pool) != pid
+
+    pid = lint(pool)
+    with pytest.raises(LintWorkerError, match="did not answer"):
+        pool.lint("humble", "/templates", "hang", [])
+    assert lint(pool) != pid
+
+
+def test_error_reply_retires_the_worker(pool):
+    pid = lint(pool)
+    with pytest.raises(LintWorkerError, match="ValueError: fail"):
+        pool.lint("humble", "/templates", "fail", [])
+    assert lint(pool) != pid
+
+
+def test_concurrent_requests_are_bounded(pool):
+    pids = []
+    threads = [threading.Thread(target=lambda: pids.append(lint(pool))) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(pids) == 6
+    assert len(set(pids)) <= 2 * 2
+
+
+def test_shut_down_pool_refuses_requests(pool):
+    pool.shutdown()
+    with pytest.raises(LintWorkerError):
+        lint(pool)
+
+
+def test_lint_falls_back_to_checker_process(pool, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    commands = []
+
+    def run(command, **kwargs):
+        commands.append(command)
+        return types.SimpleNamespace(stdout="checker output")
+
+    monkeypatch.setattr(linter.subprocess, "run", run)
+    lint = linter.Lint()
+    lint.pool = pool
+    assert lint.run_pylint("x = 1", "follow_line", "humble", "pylint_checker.py").split("|")[1] == "x = 1"
+    assert commands == []
+
+    pool.shutdown()
+    assert lint.run_pylint("x = 1", "follow_line", "humble", "pylint_checker.py") == "checker output"
+    assert "pylint_checker.py" in commands[0]
+    assert (tmp_path / "user_code.py").read_text() == "x = 1"
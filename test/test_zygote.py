@@ -0,0 +1,65 @@
+"""
+Tests of the applications forked by a zygote: exit status reported by the
+zygote, and applications of cancelled fork requests killed.
+
+    python3 -m pytest test/test_zygote.py
+"""
+
+import os
+import signal
+import sys
+import time
+
+import psutil
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.libs.process_utils import stop_process_and_children
+from src.manager.manager.application.zygote import Zygote
+
+
+@pytest.fixture
+def zygote():
+    zygote = Zygote([])
+    assert zygote.started.wait(10)
+    assert zygote.ready
+    yield zygote
+    zygote.stop()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def application(tmp_path, code):
+    path = tmp_path / "academy.py"
+    path.write_text(code)
+    return str(path)
+
+
+@pytest.mark.parametrize("code, returncode", [("pass", 0), ("import sys\nsys.exit(3)", 3), ("1 / 0", 1)])
+def test_exit_status_is_reported(zygote, tmp_path, code, returncode):
+    process = zygote.fork(application(tmp_path, code))
+    wait_for(lambda: process.poll() is not None)
+    assert process.returncode == returncode
+
+
+def test_killed_application_reports_the_signal(zygote, tmp_path):
+    process = zygote.fork(application(tmp_path, "import time\ntime.sleep(30)"))
+    assert process.poll() is None
+    stop_process_and_children(process, signal.SIGKILL)
+    wait_for(lambda: process.poll() is not None)
+    assert process.returncode == -signal.SIGKILL
+
+
+def test_cancelled_fork_is_killed(zygote, tmp_path):
+    path = application(tmp_path, "import time\ntime.sleep(30)")
+    with pytest.raises(TimeoutError):
+        zygote.fork(path, timeout=0)
+    # Forked anyway, then killed by the zygote
+    wait_for(lambda: zygote._returncodes)
+    assert list(zygote._returncodes.values()) == [-signal.SIGKILL]
+    assert psutil.Process(zygote.pid).children(recursive=True) == []
@@ -0,0 +1,82 @@
+"""
+Benchmark of the relay of GUI camera images over a slow link.
+
+Relays a 30 fps stream of 640x480 JPEG images to a client behind an emulated
+link of the given bandwidth (sending blocks for the time the bytes take on
+the link), as Manager.send_update does:
+- before: images forwarded as received, the relay blocks on every send;
+- after: the Transcoder measures the link and, once it is congested, fits the
+  images to it in its thread pool.
+
+    python3 test/transcoding_benchmark.py [link kbit/s] [seconds]
+"""
+
+import os
+import sys
+import time
+from functools import partial
+
+import cv2
+import numpy
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.manager.comms.images import ImageStore, pack_image, references
+from src.manager.comms.transcoder import Transcoder
+
+
+def camera_image():
+    noise = numpy.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=numpy.uint8)
+    ok, encoded = cv2.imencode(".jpg", cv2.GaussianBlur(noise, (31, 31), 0), (cv2.IMWRITE_JPEG_QUALITY, 95))
+    return encoded.tobytes()
+
+
+def relay(link, seconds, transcoder):
+    images = ImageStore()
+    delivered = []
+
+    def resolve(text, transform=None):
+        return images.frames(text, transform), text
+
+    def deliver(frames, text):
+        start = time.perf_counter()
+        size = len(text) + sum(len(frame) for frame in frames)
+        time.sleep(8 * size / link)
+        delivered.append(size)
+        if transcoder is not None:
+            transcoder.observe(size, time.perf_counter() - start, None)
+
+    payload = camera_image()
+    blocked = []
+    start = time.monotonic()
+    image_id = 0
+    while time.monotonic() - start < seconds:
+        image_id += 1
+        images.put(pack_image(image_id, 1, 640, 480, 3, payload))
+        text = '{"image":{"$image":%d}}' % image_id
+        sent = time.perf_counter()
+        if transcoder is not None and transcoder.engaged():
+            transcoder.submit(partial(resolve, text), deliver, len(references(text)))
+        else:
+            deliver(*resolve(text))
+        elapsed = time.perf_counter() - sent
+        blocked.append(elapsed)
+        time.sleep(max(0.0, 1 / 30 - elapsed))
+    elapsed = time.monotonic() - start
+    blocked.sort()
+    return len(delivered) / elapsed, 8 * sum(delivered) / elapsed / 1000, blocked[len(blocked) // 2] * 1000
+
+
+def main():
+    link = float(sys.argv[1]) * 1000 if len(sys.argv) > 1 else 2_000_000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    print(f"Link of {link / 1000:.0f} kbit/s, 30 fps of 640x480 JPEG images")
+    print(f"{'relay':<12}{'images/s':>10}{'kbit/s':>10}{'median relay ms':>17}")
+    transcoder = Transcoder()
+    for name, stage in (("before", None), ("after", transcoder)):
+        fps, kbps, blocked = relay(link, seconds, stage)
+        print(f"{name:<12}{fps:>10.1f}{kbps:>10.0f}{blocked:>17.2f}")
+    transcoder.stop()
+
+
+if __name__ == "__main__":
+    main()